@@ -17,6 +17,11 @@ def clear_mongo():
     result = col.delete_many({})
     print(f"🗑️ Deleted {result.deleted_count} docs from MongoDB collection '{config.MONGO_COLLECTION}'")
 
+    # Gap records written by subscriber.py's seq tracking
+    gaps_name = getattr(config, "MONGO_GAPS_COLLECTION", config.MONGO_COLLECTION + "_gaps")
+    result = db[gaps_name].delete_many({})
+    print(f"🗑️ Deleted {result.deleted_count} gap records from MongoDB collection '{gaps_name}'")
+
     # Optional: Drop collection entirely
     # col.drop()
     # print(f"🔥 Dropped MongoDB collection '{config.MONGO_COLLECTION}'")
@@ -1,18 +1,30 @@
 #!/usr/bin/env python3
 import json
+import sys
+import time
 from collections import deque
 from datetime import datetime, timezone
+from pathlib import Path
 
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
+import numpy as np
 import paho.mqtt.client as mqtt
 import config  # uses your MQTT_* settings
+from seqtrack import SeqTracker
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # shared helpers at the repo root
+from hotmetrics import Throttle, counter, gauge, histogram, serve
+from streamfilt import make_filter
 
 # -------- settings you can tweak --------
 WINDOW_SECONDS = 30          # rolling window on the x-axis
 MAX_POINTS = 1200            # ring buffer cap to avoid huge memory
 CSV_PATH = None              # e.g. "live_samples.csv" to save as you stream
 REDRAW_MS = 200              # refresh rate of the plot in milliseconds
+METRICS_PORT = 9227          # http://127.0.0.1:9227/metrics
+FILTER = "median:5+ema:0.2"  # drawn over the raw trace; None = raw only (see streamfilt.py)
+SAMPLE_HZ = 50               # publish rate, only used by "butter:..." filters
 # ----------------------------------------
 
 # ring buffers
@@ -23,6 +35,28 @@ zv = deque(maxlen=MAX_POINTS)
 
 t0 = None  # start time (set on first sample)
 
+# filtered copy: new samples wait in `pending` and are filtered as one block per redraw
+filt = make_filter(FILTER, fs=SAMPLE_HZ)
+pending = deque(maxlen=MAX_POINTS)   # bounded in case the window stops redrawing
+ft = deque(maxlen=MAX_POINTS)
+fx = deque(maxlen=MAX_POINTS)
+fy = deque(maxlen=MAX_POINTS)
+fz = deque(maxlen=MAX_POINTS)
+
+# seq gaps reported by the tracker (MQTT thread) wait here until the next redraw shades them
+new_gaps = deque()
+gap_spans = deque()          # (end_s, [patches]) currently drawn, oldest first
+tracker = SeqTracker(on_gap=new_gaps.append)
+
+# ---------- metrics: a counter per message, a histogram per redraw ----------
+APP = {"app": "live_plot"}
+MSGS_IN = counter("sit225_samples_in_total", "Samples received", APP)
+PARSE_ERRORS = counter("sit225_parse_errors_total", "Input lines or messages that could not be parsed", APP)
+REDRAW_S = histogram("sit225_callback_seconds", "Callback run time", {**APP, "callback": "redraw"})
+gauge("sit225_queue_depth", "Samples waiting in a buffer", {**APP, "queue": "window"}, fn=lambda: len(t))
+bad_log = Throttle(2.0)   # a burst of bad messages prints one line, not one per message
+tracker.register_metrics(APP)
+
 def ts_iso():
     return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
 
@@ -37,6 +71,17 @@ ln_z, = ax_z.plot([], [], label="Z")
 ln_all_x, = ax_all.plot([], [], label="X")
 ln_all_y, = ax_all.plot([], [], label="Y")
 ln_all_z, = ax_all.plot([], [], label="Z")
+raw_lines = (ln_x, ln_y, ln_z, ln_all_x, ln_all_y, ln_all_z)
+filt_lines = ()
+if filt is not None:
+    # raw traces fade into the background, the filtered ones take their colours
+    filt_lines = tuple(ax.plot([], [], color=ln.get_color(), lw=1.6)[0]
+                       for ax, ln in zip((ax_x, ax_y, ax_z, ax_all, ax_all, ax_all), raw_lines))
+    for ln in raw_lines:
+        ln.set_alpha(0.3)
+        ln.set_label("_nolegend_")
+    for ln, name in zip(filt_lines[3:], "XYZ"):
+        ln.set_label(f"{name} ({filt!r})")
 
 for ax, title in zip(
     (ax_x, ax_y, ax_z, ax_all),
@@ -59,6 +104,7 @@ fig.canvas.mpl_connect("key_press_event", on_key)
 def redraw(_):
     if not t:
         return
+    start = time.perf_counter()
     # keep a rolling window
     tmax = t[-1]
     tmin = max(0.0, tmax - WINDOW_SECONDS)
@@ -72,8 +118,30 @@ def redraw(_):
     ln_all_x.set_data(t, xv)
     ln_all_y.set_data(t, yv)
     ln_all_z.set_data(t, zv)
+
+    if filt is not None and pending:
+        block = np.array([pending.popleft() for _ in range(len(pending))])
+        ft.extend(block[:, 0])
+        out = filt(block[:, 1:])
+        fx.extend(out[:, 0]); fy.extend(out[:, 1]); fz.extend(out[:, 2])
+        for ln, vals in zip(filt_lines, (fx, fy, fz, fx, fy, fz)):
+            ln.set_data(ft, vals)
     ax_all.relim(); ax_all.autoscale_view(True, True, True)
 
+    # shade missing seq ranges, drop the ones that scrolled out of the window
+    while new_gaps:
+        g = new_gaps.popleft()
+        g0 = (datetime.fromisoformat(g["t_from"]) - t0).total_seconds()
+        g1 = (datetime.fromisoformat(g["t_to"]) - t0).total_seconds()
+        gap_spans.append((g1, [ax.axvspan(g0, g1, color="red", alpha=0.15, lw=0)
+                               for ax in (ax_x, ax_y, ax_z, ax_all)]))
+    while gap_spans and gap_spans[0][0] < tmin:
+        for patch in gap_spans.popleft()[1]:
+            patch.remove()
+    if tracker.devices:
+        fig.suptitle(tracker.brief(), fontsize=9)
+    REDRAW_S.since(start)
+
 # ---------- MQTT callbacks (Paho v2) ----------
 def on_connect(client, userdata, flags, reason_code, properties=None):
     if reason_code == 0:
@@ -85,6 +153,7 @@ def on_connect(client, userdata, flags, reason_code, properties=None):
 
 def on_message(client, userdata, msg):
     global t0
+    MSGS_IN.inc()
     try:
         payload = msg.payload.decode("utf-8", errors="replace").strip()
         data = json.loads(payload)  # expect {"x":..,"y":..,"z":..}
@@ -92,18 +161,24 @@ def on_message(client, userdata, msg):
         x = float(data["x"]); y = float(data["y"]); z = float(data["z"])
 
         now = datetime.now(timezone.utc)
+        if tracker.observe(data, now.timestamp()).kind == "dup":
+            return
         if t0 is None:
             t0 = now
         elapsed = (now - t0).total_seconds()
 
         t.append(elapsed); xv.append(x); yv.append(y); zv.append(z)
+        if filt is not None:
+            pending.append((elapsed, x, y, z))
 
         if CSV_PATH:
             with open(CSV_PATH, "a", encoding="utf-8") as f:
                 f.write(f"{ts_iso()},{x},{y},{z}\n")
 
     except Exception as e:
-        print(f"⚠️ Bad message: {e} | raw: {msg.payload[:120]}")
+        PARSE_ERRORS.inc()
+        if (n := bad_log()):
+            print(f"⚠️ Bad message ({n} since last report): {e} | raw: {msg.payload[:120]}")
 
 def on_disconnect(client, userdata, reason_code, properties=None):
     print(f"🔌 Disconnected (code={reason_code})")
@@ -116,6 +191,7 @@ mqtt_client.on_connect = on_connect
 mqtt_client.on_message = on_message
 mqtt_client.on_disconnect = on_disconnect
 
+serve(METRICS_PORT)
 print("🚀 Connecting to HiveMQ…")
 mqtt_client.connect(config.MQTT_BROKER, int(config.MQTT_PORT), keepalive=60)
 
@@ -128,3 +204,5 @@ try:
 finally:
     mqtt_client.loop_stop()
     mqtt_client.disconnect()
+    tracker.close()
+    print(f"📶 {tracker.brief()}")
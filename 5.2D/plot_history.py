@@ -3,21 +3,25 @@
 Read historical gyro data from MongoDB (and/or Redis) and make report-ready plots:
   1) three stacked subplots (X, Y, Z)
   2) one combined plot (X, Y, Z together)
-Also writes a CSV.
+Also writes a CSV. Missing intervals (gap records from subscriber.py's seq
+tracking) are shaded on both plots.
 
 Requires: pymongo, redis (optional), pandas, matplotlib
 """
 
 import os
-import json
-from datetime import datetime
-from typing import List, Dict, Optional
+import sys
+from pathlib import Path
+from typing import List, Optional
 
 import pandas as pd
 import matplotlib.pyplot as plt
 
 import config
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # shared helpers at the repo root
+from timequery import MongoSource, RedisSource, parse_times, read, to_time
+
 # ---------- Where to save outputs ----------
 OUT_DIR = "figures"
 CSV_PATH = os.path.join(OUT_DIR, "gyro_history.csv")
@@ -28,94 +32,65 @@ os.makedirs(OUT_DIR, exist_ok=True)
 
 
 # ---------- Loaders ----------
-def load_from_mongo(limit: Optional[int] = None) -> List[Dict]:
-    from pymongo import MongoClient
-    client = MongoClient(config.MONGO_URI)
-    col = client[config.MONGO_DB][config.MONGO_COLLECTION]
-
-    cursor = col.find({}, {"_id": 0}).sort("ts_iso", 1)
-    if limit:
-        cursor = cursor.limit(limit)
-    docs = list(cursor)
-    client.close()
-    return docs
+# Both go through timequery (repo root): the time range is pushed into the
+# Mongo filter / Redis sorted-set index instead of loading everything, and
+# `limit` keeps the newest N rows of that range (a descending sort + limit in
+# Mongo, ZREVRANGEBYSCORE ... LIMIT in Redis).
+def load_from_mongo(limit: Optional[int] = None, start=None, end=None) -> pd.DataFrame:
+    return read(MongoSource.from_config(config), start=start, end=end, columns=["x", "y", "z"], newest=limit)
 
 
-def load_from_redis(limit: Optional[int] = None) -> List[Dict]:
+def load_from_redis(limit: Optional[int] = None, start=None, end=None) -> pd.DataFrame:
     # only if Redis creds present in config
     need = ("REDIS_HOST", "REDIS_PORT", "REDIS_USER", "REDIS_PASS")
     if not all(hasattr(config, k) for k in need):
-        return []
-
-    import redis
-
-    # Try TLS first, then non-TLS as fallback (Windows OpenSSL quirk)
-    def _connect(ssl_flag: bool):
-        return redis.Redis(
-            host=config.REDIS_HOST,
-            port=int(config.REDIS_PORT),
-            username=getattr(config, "REDIS_USER", None),
-            password=config.REDIS_PASS,
-            ssl=ssl_flag,
-            ssl_cert_reqs=None if ssl_flag else None,
-            socket_timeout=3,
-        )
-
-    try:
-        r = _connect(True)
-        r.ping()
-    except Exception:
-        r = _connect(False)
-        r.ping()
-
-    keys = sorted([k.decode() if isinstance(k, bytes) else k for k in r.keys("*")])
-    if limit:
-        keys = keys[-limit:]
-
-    docs = []
-    for k in keys:
-        val = r.get(k)
-        if not val:
-            continue
-        try:
-            d = json.loads(val)
-            # ensure ordering and types
-            docs.append({
-                "ts_iso": d.get("ts_iso", k),
-                "x": float(d["x"]),
-                "y": float(d["y"]),
-                "z": float(d["z"]),
-            })
-        except Exception:
-            # skip malformed rows
-            continue
-    return docs
+        return pd.DataFrame()
+    return read(RedisSource.from_config(config), start=start, end=end, columns=["x", "y", "z"], newest=limit)
+
+
+def load_gaps(start=None, end=None) -> pd.DataFrame:
+    """Gap records overlapping [start, end): columns t_from, t_to (UTC), device, missing."""
+    coll = getattr(config, "MONGO_GAPS_COLLECTION", config.MONGO_COLLECTION + "_gaps")
+    src = MongoSource(config.MONGO_URI, config.MONGO_DB, coll, time_field="t_from")
+    # a gap that starts before `start` can still reach into the range: only `end` is pushed down
+    df = read(src, end=end, columns=["t_to", "device", "missing"]).rename(columns={"time": "t_from"})
+    if df.empty:
+        return df
+    df["t_to"] = parse_times(df["t_to"]).to_numpy()
+    if start is not None:
+        df = df[df["t_to"] > to_time(start)]
+    return df.reset_index(drop=True)
 
 
 # ---------- Build DataFrame ----------
-def make_dataframe(use_mongo=True, use_redis=False, limit=None) -> pd.DataFrame:
-    rows: List[Dict] = []
+def make_dataframe(use_mongo=True, use_redis=False, limit=None, start=None, end=None) -> pd.DataFrame:
+    frames: List[pd.DataFrame] = []
     if use_mongo:
-        rows.extend(load_from_mongo(limit=limit))
+        frames.append(load_from_mongo(limit=limit, start=start, end=end))
     if use_redis:
-        rows.extend(load_from_redis(limit=limit))
+        frames.append(load_from_redis(limit=limit, start=start, end=end))
+    frames = [f for f in frames if not f.empty]
 
-    if not rows:
+    if not frames:
         raise RuntimeError("No data found. Make sure Mongo/Redis contain documents.")
 
-    # Remove dupes by (ts_iso, x, y, z) and sort
-    df = pd.DataFrame(rows).drop_duplicates().sort_values("ts_iso")
-    # Parse timestamp and set index for nice plotting
-    df["ts"] = pd.to_datetime(df["ts_iso"], errors="coerce")
-    df = df.dropna(subset=["ts"])
-    df = df.set_index("ts")
+    # Remove dupes by (time, x, y, z) and sort; times are UTC
+    df = pd.concat(frames, ignore_index=True).drop_duplicates().rename(columns={"time": "ts"})
+    df = df.dropna(subset=["ts"]).sort_values("ts").set_index("ts")
     # Keep only numeric columns
     df = df[["x", "y", "z"]].astype(float)
-    return df
+    return df.tail(limit) if limit else df
 
 
 # ---------- Plotting ----------
-def plot_and_save(df: pd.DataFrame) -> None:
+def shade_gaps(ax, gaps: Optional[pd.DataFrame]) -> None:
+    if gaps is None or gaps.empty:
+        return
+    for i, g in enumerate(gaps.itertuples()):
+        ax.axvspan(g.t_from, g.t_to, color="red", alpha=0.15, lw=0, label="missing" if i == 0 else None)
+
+
+def plot_and_save(df: pd.DataFrame, gaps: Optional[pd.DataFrame] = None) -> None:
     # 1) Subplots
     fig, axes = plt.subplots(3, 1, figsize=(11, 7), sharex=True)
     axes[0].plot(df.index, df["x"], label="X")
@@ -125,6 +100,7 @@ def plot_and_save(df: pd.DataFrame) -> None:
     axes[1].set_title("Gyroscope Y")
     axes[2].set_title("Gyroscope Z")
     for ax in axes:
+        shade_gaps(ax, gaps)
         ax.set_ylabel("Value")
         ax.grid(True)
         ax.legend(loc="upper right")
@@ -138,6 +114,7 @@ def plot_and_save(df: pd.DataFrame) -> None:
     ax.plot(df.index, df["x"], label="X")
     ax.plot(df.index, df["y"], label="Y")
     ax.plot(df.index, df["z"], label="Z")
+    shade_gaps(ax, gaps)
     ax.set_title("Gyroscope X, Y, Z Combined")
     ax.set_xlabel("Timestamp")
     ax.set_ylabel("Value")
@@ -162,12 +139,20 @@ if __name__ == "__main__":
     # Optional: limit to most recent N samples (None = all)
     LIMIT = None
 
+    # Optional: time range (UTC, e.g. "2025-09-28 05:00"); None = open-ended
+    START = None
+    END = None
+
     print("📥 Loading data…")
-    df = make_dataframe(use_mongo=USE_MONGO, use_redis=USE_REDIS, limit=LIMIT)
+    df = make_dataframe(use_mongo=USE_MONGO, use_redis=USE_REDIS, limit=LIMIT, start=START, end=END)
+
+    gaps = load_gaps(start=START, end=END) if USE_MONGO else None
+    if gaps is not None and not gaps.empty:
+        print(f"🕳️ {len(gaps)} gap record(s), {int(gaps['missing'].sum())} samples missing")
 
     print(f"✅ Loaded {len(df)} rows. Writing CSV and plots…")
     to_csv(df)
-    plot_and_save(df)
+    plot_and_save(df, gaps)
 
     print(f"📄 CSV:  {CSV_PATH}")
     print(f"🖼  PNG:  {PNG_SUBPLOTS}")
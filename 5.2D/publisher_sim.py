@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Local gyro publisher with injectable loss, duplicates, reordering and delay.
+
+Publishes the sequenced payload (see seqtrack.py) so subscriber.py and
+live_plot.py can be tested without the Nano 33 and without waiting for real
+network trouble:
+    {"device": "sim-1", "seq": n, "ts_dev": <epoch ms>, "x": .., "y": .., "z": ..}
+
+Impairments (each an independent probability per message, fixed --seed):
+  --loss P        drop the message
+  --burst P:N     start dropping the next N messages
+  --dup P         send it twice
+  --reorder P     hold it back and send it after the next one
+  --delay MS      publish 0..MS ms after the device timestamp (latency jitter)
+  --restart K     the device reboots after K samples and counts from seq 0 again
+                  and its last sample arrives after the new seq 1 (--selftest
+                  does this half way through unless given 0)
+
+Usage:
+    python publisher_sim.py --rate 50 --seconds 60 --loss 0.02 --dup 0.01 --reorder 0.01
+    python publisher_sim.py --local --port 1883 ...   # plain MQTT broker on localhost (no TLS, no auth)
+    python publisher_sim.py --selftest --loss 0.05 --burst 0.002:25
+        # no broker: feed the stream into SeqTracker and compare injected vs detected
+"""
+import argparse
+import json
+import math
+import random
+import time
+
+from seqtrack import SeqTracker
+
+
+def stream(n, rate, loss=0.0, burst=(0.0, 0), dup=0.0, reorder=0.0, delay_ms=0.0, device="sim-1",
+           seed=225, t0=None, restart=0):
+    """
+    Yield (send_time_s, payload dict) in send order, and fill `stream.injected`
+    with what was done to the stream: lost/dup/reordered/restart counts. With a
+    restart, the last sample before it arrives after the first two samples of
+    the new count (a straggler the receiver must count as late).
+    """
+    rng = random.Random(seed)
+    t0 = time.time() if t0 is None else t0
+    restart = restart if 2 <= restart < n - 2 else 0
+    injected = {"sent": 0, "lost": 0, "dup": 0, "reordered": 0, "late": 1 if restart else 0,
+                "restarts": 1 if restart else 0}
+    stream.injected = injected
+    held = straggler = None
+    drop_left = 0
+    for i in range(n):
+        seq = i - restart if restart and i >= restart else i
+        t = t0 + i / rate
+        payload = {"device": device, "seq": seq, "ts_dev": int(t * 1000),
+                   "x": round(40 * math.sin(i / rate), 2), "y": round(40 * math.cos(i / rate), 2),
+                   "z": round(rng.gauss(0, 3), 2)}
+        send_t = t + rng.uniform(0, delay_ms) / 1000.0
+        # a receiver cannot see loss before its first or after its last seq of a session
+        edge = i in (0, n - 1) or (restart and restart - 2 <= i <= restart + 1)
+        if restart and i == restart - 1:
+            straggler = payload
+            continue
+        if not edge:
+            if drop_left == 0 and burst[0] and rng.random() < burst[0]:
+                drop_left = burst[1]
+            if drop_left:
+                drop_left -= 1
+                injected["lost"] += 1
+                continue
+            if rng.random() < loss:
+                injected["lost"] += 1
+                continue
+            if held is None and rng.random() < reorder:
+                held = payload
+                continue
+        out = [payload] * (2 if not edge and rng.random() < dup else 1)
+        injected["dup"] += len(out) - 1
+        if held is not None:
+            out.append(held)
+            injected["reordered"] += 1
+            held = None
+        if restart and i == restart + 1:
+            out.append(straggler)
+        for p in out:
+            injected["sent"] += 1
+            yield send_t, p
+
+
+def selftest(args):
+    gaps = []
+    tracker = SeqTracker(on_gap=gaps.append)
+    n = int(args.rate * args.seconds)
+    t0 = time.perf_counter()
+    for send_t, p in stream(n, args.rate, args.loss, args.burst, args.dup, args.reorder, args.delay,
+                            args.device, args.seed, t0=1_700_000_000.0,
+                            restart=n // 2 if args.restart is None else args.restart):
+        tracker.observe(p, send_t + 0.02)      # fixed 20 ms broker + store delay
+    tracker.close()
+    took = time.perf_counter() - t0
+    inj = stream.injected
+    s = tracker.summary()[args.device]
+    print(f"{n:,} messages generated, {inj['sent']:,} sent, tracked in {took:.2f}s "
+          f"({took / max(1, inj['sent']) * 1e6:.1f} us/message)")
+    print(f"{'':<10}{'injected':>10}{'detected':>10}")
+    rows = [("lost", inj["lost"], s["missing"]), ("dup", inj["dup"], s["dup"]),
+            ("reordered", inj["reordered"], s["reordered"]), ("late", inj["late"], s["late"]),
+            ("restarts", inj["restarts"], s["resets"])]
+    for label, a, b in rows:
+        print(f"{label:<10}{a:>10}{b:>10}{'' if a == b else '   MISMATCH'}")
+    print(f"gap records: {len(gaps)} covering {sum(g['missing'] for g in gaps)} seqs; "
+          f"latency p50 {s['p50_ms']} ms p95 {s['p95_ms']} ms")
+    return 0 if all(a == b for _, a, b in rows) else 1
+
+
+def publish(args):
+    import paho.mqtt.client as mqtt
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    if args.local:
+        host, port, topic = "localhost", args.port, args.topic or "nano33/gyroscope"
+    else:
+        import config
+        client.username_pw_set(config.MQTT_USER, config.MQTT_PASS)
+        client.tls_set()
+        host, port, topic = config.MQTT_BROKER, int(config.MQTT_PORT), args.topic or config.MQTT_TOPIC
+    client.connect(host, port, keepalive=60)
+    client.loop_start()
+    n = int(args.rate * args.seconds)
+    print(f"🚀 Publishing {n} samples at {args.rate} Hz to {host}:{port} '{topic}'")
+    start = time.time()
+    try:
+        for send_t, p in stream(n, args.rate, args.loss, args.burst, args.dup, args.reorder, args.delay,
+                                args.device, args.seed, t0=start, restart=args.restart or 0):
+            wait = send_t - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            client.publish(topic, json.dumps(p), qos=args.qos)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.loop_stop()
+        client.disconnect()
+    inj = stream.injected
+    print(f"✅ Sent {inj['sent']} | injected lost {inj['lost']} dup {inj['dup']} reordered {inj['reordered']} "
+          f"restarts {inj['restarts']}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Publish sequenced gyro samples with injected loss.")
+    ap.add_argument("--rate", type=float, default=50.0, help="samples per second")
+    ap.add_argument("--seconds", type=float, default=60.0)
+    ap.add_argument("--device", default="sim-1")
+    ap.add_argument("--loss", type=float, default=0.0)
+    ap.add_argument("--burst", default="0:0", help="P:N, start a run of N drops with probability P")
+    ap.add_argument("--dup", type=float, default=0.0)
+    ap.add_argument("--reorder", type=float, default=0.0)
+    ap.add_argument("--delay", type=float, default=0.0, help="max extra delay in ms")
+    ap.add_argument("--restart", type=int, default=None, help="reboot the device after K samples (seq back to 0)")
+    ap.add_argument("--seed", type=int, default=225)
+    ap.add_argument("--qos", type=int, default=1)
+    ap.add_argument("--topic", default=None)
+    ap.add_argument("--local", action="store_true", help="plain MQTT on localhost instead of config.py's broker")
+    ap.add_argument("--port", type=int, default=1883)
+    ap.add_argument("--selftest", action="store_true", help="no broker: check SeqTracker against the injections")
+    args = ap.parse_args()
+    p, k = args.burst.split(":")
+    args.burst = (float(p), int(k))
+    if args.selftest:
+        raise SystemExit(selftest(args))
+    publish(args)
+
+
+if __name__ == "__main__":
+    main()
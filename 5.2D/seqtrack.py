@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Loss, duplicate, reorder and latency accounting for the MQTT gyro stream.
+
+Payload contract (the extra fields are optional; plain {"x","y","z"} still works):
+    {"x": 1.2, "y": -0.4, "z": 0.1, "device": "nano33-1", "seq": 1234, "ts_dev": 1727500000123}
+  seq     per-device counter, +1 per published sample
+  ts_dev  device time of the sample: epoch milliseconds (number) or ISO-8601 text (UTC if naive)
+  device  sender id; "default" when missing
+
+Per device the tracker keeps the highest seq seen (the head) and its ts_dev:
+  - seq == head + 1      in order
+  - seq >  head + 1      the skipped seqs become pending; they stay pending for
+                         REORDER_WINDOW more seqs, so a late arrival is counted as
+                         reordered instead of lost
+  - ts_dev older than    late, checked first: a straggler from before a reboot
+    the last restart,    (or a sample numbered above the head but taken before
+    or seq > head with   it); the head and the holes are left alone
+    an older ts_dev
+  - seq <= head, with a  device restart (checked before duplicates): a resent or
+    newer ts_dev         reordered sample is never newer than the head, so this
+                         is a new count; pending holes are closed and counting
+                         restarts from that seq. Without ts_dev, a seq more than
+                         RESET_JUMP below the head counts as a restart
+  - seq < head, pending  reordered (fills a pending hole)
+  - seq already seen     duplicate (callers should not store it again)
+  - other seq < head     late: arrived after its hole was already reported as lost
+A hole is kept as [a, b] runs of missing seqs, not one entry per seq, so a
+huge forward jump (a corrupt or hostile seq) costs no more than a small one and
+ends up as a single gap record. Holes still missing when they leave the window
+are reported through on_gap as gap records, one per contiguous seq range, with
+the time interval between the neighbouring received samples (store time, the
+same clock as ts_iso).
+Publish-to-store latency is t_store - ts_dev (needs device clocks in sync,
+e.g. NTP); percentiles come from the last LATENCY_KEEP samples per device.
+
+API:
+    tracker = SeqTracker(on_gap=save_gap)    # save_gap(dict) e.g. inserts into Mongo
+    obs = tracker.observe(data, time.time()) # obs.kind: ok | dup | reordered | late | reset | untracked
+    tracker.summary()                        # {device: {received, missing, loss_pct, dup, ..., p50_ms, p95_ms}}
+    tracker.brief()                          # one line for logs / plot titles
+    tracker.close()                          # report holes still pending (on shutdown)
+"""
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, NamedTuple, Optional
+
+import numpy as np
+
+REORDER_WINDOW = 64      # seqs a hole may stay open for a late arrival
+DUP_WINDOW = 4096        # recent seqs remembered for duplicate detection
+RESET_JUMP = 1000        # a seq this far below the head means the device restarted (no ts_dev)
+LATENCY_KEEP = 10_000    # latencies kept per device for percentiles
+
+
+class Observation(NamedTuple):
+    kind: str
+    device: str
+    seq: Optional[int]
+    latency_s: Optional[float]
+
+
+def device_time(v) -> Optional[float]:
+    """ts_dev -> epoch seconds (number: ms if large, else s; text: ISO-8601, naive = UTC)."""
+    if v is None:
+        return None
+    if isinstance(v, (int, float)):
+        return v / 1000.0 if v > 1e11 else float(v)
+    try:
+        t = datetime.fromisoformat(str(v).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=timezone.utc)
+    return t.timestamp()
+
+
+def iso_utc(t: float) -> str:
+    """Epoch seconds -> the ts_iso format subscriber.py stores."""
+    return datetime.fromtimestamp(t, timezone.utc).isoformat(timespec="milliseconds")
+
+
+def _count(runs) -> int:
+    return sum(b - a + 1 for a, b in runs)
+
+
+def _take(runs, seq) -> bool:
+    """Remove seq from the sorted [a, b] runs it falls in; False if it is not missing."""
+    for k, (a, b) in enumerate(runs):
+        if a <= seq <= b:
+            runs[k:k + 1] = [r for r in ([a, seq - 1], [seq + 1, b]) if r[0] <= r[1]]
+            return True
+        if seq < a:
+            break
+    return False
+
+
+class _Device:
+    def __init__(self, seq: int, t: float, t_dev: Optional[float]):
+        self.head, self.t_head, self.dev_head = seq, t, t_dev
+        self.dev_reset = None   # ts_dev of the sample that started the current count
+        self.seen = {seq}
+        self.order = deque([seq])
+        self.holes = []         # [lo, hi, t_from, t_to, [[a, b], ...] still missing], oldest first
+        self.received = 1
+        self.missing = self.dup = self.reordered = self.late = self.resets = 0
+        self.latency = deque(maxlen=LATENCY_KEEP)
+
+    def remember(self, seq):
+        self.seen.add(seq)
+        self.order.append(seq)
+        if len(self.order) > DUP_WINDOW:
+            self.seen.discard(self.order.popleft())
+
+
+class SeqTracker:
+    def __init__(self, on_gap: Optional[Callable[[dict], None]] = None):
+        self.on_gap = on_gap
+        self.devices: Dict[str, _Device] = {}
+        self.untracked = 0      # payloads without seq
+
+    # ---------- per sample ----------
+    def observe(self, data: dict, t_store: float) -> Observation:
+        device = str(data.get("device") or "default")
+        t_dev = device_time(data.get("ts_dev"))
+        lat = (t_store - t_dev) if t_dev is not None else None
+        try:
+            seq = int(data["seq"])
+        except (KeyError, TypeError, ValueError):
+            self.untracked += 1
+            return Observation("untracked", device, None, lat)
+
+        d = self.devices.get(device)
+        if d is None:
+            d = self.devices[device] = _Device(seq, t_store, t_dev)
+            if lat is not None:
+                d.latency.append(lat)
+            return Observation("ok", device, seq, lat)
+
+        # sampled before the head yet numbered above it, or sampled before the last
+        # restart: a straggler from the previous count, so it moves nothing
+        if t_dev is not None and ((seq > d.head and d.dev_head is not None and t_dev < d.dev_head)
+                                  or (d.dev_reset is not None and t_dev < d.dev_reset)):
+            d.received += 1
+            d.late += 1
+            if lat is not None:
+                d.latency.append(lat)
+            return Observation("late", device, seq, lat)
+
+        if seq <= d.head:
+            if t_dev is not None and d.dev_head is not None:
+                restarted = t_dev > d.dev_head
+            else:
+                restarted = seq < d.head - RESET_JUMP
+        else:
+            restarted = False
+        if not restarted and seq in d.seen:
+            d.dup += 1
+            return Observation("dup", device, seq, lat)
+        d.received += 1
+        if lat is not None:
+            d.latency.append(lat)
+
+        if restarted:
+            self._close_holes(device, d, None)
+            d.resets += 1
+            d.head, d.t_head, d.dev_head, d.dev_reset = seq, t_store, t_dev, t_dev
+            d.seen, d.order = {seq}, deque([seq])
+            return Observation("reset", device, seq, lat)
+
+        if seq > d.head:
+            if seq > d.head + 1:
+                d.holes.append([d.head + 1, seq - 1, d.t_head, t_store, [[d.head + 1, seq - 1]]])
+            d.head, d.t_head, d.dev_head = seq, t_store, t_dev
+            d.remember(seq)
+            self._close_holes(device, d, seq - REORDER_WINDOW)
+            return Observation("ok", device, seq, lat)
+
+        d.remember(seq)
+        for hole in d.holes:
+            if hole[0] <= seq <= hole[1] and _take(hole[4], seq):
+                d.reordered += 1
+                return Observation("reordered", device, seq, lat)
+        d.late += 1
+        return Observation("late", device, seq, lat)
+
+    def _close_holes(self, device, d: _Device, below: Optional[int]):
+        """Report holes whose whole range is below `below` (None = all)."""
+        while d.holes and (below is None or d.holes[0][1] < below):
+            lo, hi, t_from, t_to, runs = d.holes.pop(0)
+            d.missing += _count(runs)
+            if self.on_gap is None:
+                continue
+            # one record per contiguous still-missing range, times interpolated by seq
+            span = (t_to - t_from) / (hi - lo + 2)
+            for start, prev in runs:
+                self.on_gap({
+                    "device": device, "seq_from": start, "seq_to": prev, "missing": prev - start + 1,
+                    "t_from": iso_utc(t_from + (start - lo) * span),
+                    "t_to": iso_utc(t_from + (prev - lo + 2) * span),
+                    "detected_at": iso_utc(datetime.now(timezone.utc).timestamp()),
+                })
+
+    def close(self):
+        for device, d in self.devices.items():
+            self._close_holes(device, d, None)
+
+    # ---------- reporting ----------
+    def summary(self) -> Dict[str, dict]:
+        out = {}
+        for device, d in self.devices.items():
+            pending = sum(_count(h[4]) for h in d.holes)
+            lat = np.asarray(d.latency) * 1000.0
+            expected = d.received + d.missing + pending
+            out[device] = {
+                "received": d.received, "missing": d.missing, "pending": pending,
+                "loss_pct": round(100.0 * (d.missing + pending) / expected, 3) if expected else 0.0,
+                "dup": d.dup, "reordered": d.reordered, "late": d.late, "resets": d.resets,
+                "p50_ms": round(float(np.percentile(lat, 50)), 1) if len(lat) else None,
+                "p95_ms": round(float(np.percentile(lat, 95)), 1) if len(lat) else None,
+                "p99_ms": round(float(np.percentile(lat, 99)), 1) if len(lat) else None,
+            }
+        return out
+
+    def brief(self) -> str:
+        parts = []
+        for device, s in self.summary().items():
+            lat = f" | latency p50 {s['p50_ms']} ms p95 {s['p95_ms']} ms" if s["p50_ms"] is not None else ""
+            parts.append(f"{device}: lost {s['missing'] + s['pending']} ({s['loss_pct']}%) dup {s['dup']} "
+                         f"reordered {s['reordered']}{lat}")
+        if self.untracked:
+            parts.append(f"{self.untracked} without seq")
+        return " ; ".join(parts) or "no sequenced samples yet"
+
+    def register_metrics(self, labels: Dict[str, str]):
+        """Totals over all devices on the hotmetrics endpoint (read at scrape time)."""
+        from hotmetrics import counter
+
+        def total(attr):
+            return lambda: sum(getattr(d, attr) for d in list(self.devices.values()))
+        counter("sit225_samples_missing_total", "Sequence numbers reported lost", labels, fn=total("missing"))
+        counter("sit225_samples_duplicate_total", "Duplicate sequence numbers received", labels, fn=total("dup"))
+        counter("sit225_samples_reordered_total", "Samples that arrived after a later seq", labels,
+                fn=lambda: sum(d.reordered + d.late for d in list(self.devices.values())))
@@ -1,16 +1,45 @@
 #!/usr/bin/env python3
 import json
-from datetime import datetime, timezone
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
 
 import paho.mqtt.client as mqtt
 from pymongo import MongoClient
 
 import config  # your credentials
+from seqtrack import SeqTracker, iso_utc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # shared helpers at the repo root
+from hotmetrics import Throttle, counter, histogram, serve
+from timequery import REDIS_INDEX
+
+# ---------- Metrics (http://127.0.0.1:9225/metrics) ----------
+METRICS_PORT = 9225
+PRINT_EVERY_S = 2.0   # one "Saved" line per interval instead of one per message
+TIME_EVERY = 16       # histograms sample 1 message in 16; all four on every message cost ~1.5 us
+APP = {"app": "subscriber"}
+MSGS_IN = counter("sit225_samples_in_total", "Samples received", APP)
+PARSE_ERRORS = counter("sit225_parse_errors_total", "Input lines or messages that could not be parsed", APP)
+WRITE_ERRORS = counter("sit225_write_errors_total", "Samples that failed to store", APP)
+ROWS_OUT = {k: counter("sit225_rows_written_total", "Rows written to storage", {**APP, "store": k})
+            for k in ("mongo", "redis")}
+WRITE_S = {k: histogram("sit225_write_seconds", "Storage write latency", {**APP, "store": k})
+           for k in ("mongo", "redis")}
+CALLBACK_S = histogram("sit225_callback_seconds", "Callback run time", {**APP, "callback": "on_message"})
+LATENCY_S = histogram("sit225_publish_to_store_seconds", "ts_dev to store time (payloads with ts_dev)", APP)
+saved_log = Throttle(PRINT_EVERY_S)
+bad_log = Throttle(PRINT_EVERY_S)
+error_log = Throttle(PRINT_EVERY_S)
+gap_log = Throttle(PRINT_EVERY_S)
 
 # ---------- MongoDB ----------
 mongo_client = MongoClient(config.MONGO_URI)
 mongo_db = mongo_client[config.MONGO_DB]
 mongo_col = mongo_db[config.MONGO_COLLECTION]
+# Missing seq ranges (seqtrack gap records) for plot_history.py to shade
+mongo_gaps = mongo_db[getattr(config, "MONGO_GAPS_COLLECTION", config.MONGO_COLLECTION + "_gaps")]
 
 # ---------- Optional Redis ----------
 use_redis = all(
@@ -50,19 +79,45 @@ if use_redis:
             rclient = None
             use_redis = False
 
-def save_to_mongo(doc: dict) -> dict:
+def save_to_mongo(doc: dict, timed: bool = True) -> dict:
     """Insert a copy into Mongo. Return a JSON-serializable copy with _id as str."""
     to_insert = dict(doc)
+    t0 = time.perf_counter() if timed else 0.0
     result = mongo_col.insert_one(to_insert)
+    if timed:
+        WRITE_S["mongo"].since(t0)
+    ROWS_OUT["mongo"].inc()
     safe = dict(to_insert)
     safe["_id"] = str(result.inserted_id)
     return safe
 
-def save_to_redis(doc: dict) -> None:
+def save_to_redis(doc: dict, timed: bool = True) -> None:
     if not (use_redis and rclient):
         return
-    # Avoid ObjectId; ensure JSON always works
-    rclient.set(doc["ts_iso"], json.dumps(doc, default=str))
+    # Avoid ObjectId; ensure JSON always works. The sorted-set index (score =
+    # epoch seconds) lets timequery fetch a time range without scanning keys.
+    t0 = time.perf_counter() if timed else 0.0
+    pipe = rclient.pipeline()
+    pipe.set(doc["ts_iso"], json.dumps(doc, default=str))
+    pipe.zadd(REDIS_INDEX, {doc["ts_iso"]: datetime.fromisoformat(doc["ts_iso"]).timestamp()})
+    pipe.execute()
+    if timed:
+        WRITE_S["redis"].since(t0)
+    ROWS_OUT["redis"].inc()
+
+def save_gap(gap: dict) -> None:
+    try:
+        mongo_gaps.insert_one(dict(gap))
+    except Exception as e:
+        WRITE_ERRORS.inc()
+        print(f"⚠️ Could not store gap record: {e}")
+    if (n := gap_log()):
+        print(f"🕳️ {n} gap(s) since last report, latest: {gap['device']} seq {gap['seq_from']}-{gap['seq_to']} "
+              f"({gap['missing']} missing, {gap['t_from']} → {gap['t_to']})")
+
+# ---------- Sequence tracking (payloads with device/seq/ts_dev) ----------
+tracker = SeqTracker(on_gap=save_gap)
+tracker.register_metrics(APP)
 
 # ---------- MQTT callbacks (API v2) ----------
 def on_connect(client, userdata, flags, reason_code, properties=None):
@@ -74,6 +129,9 @@ def on_connect(client, userdata, flags, reason_code, properties=None):
         print(f"❌ MQTT connect failed (code={reason_code})")
 
 def on_message(client, userdata, msg):
+    MSGS_IN.inc()
+    timed = MSGS_IN.value % TIME_EVERY == 0
+    t0 = time.perf_counter() if timed else 0.0
     try:
         payload = msg.payload.decode("utf-8", errors="replace").strip()
         data = json.loads(payload)
@@ -85,48 +143,80 @@ def on_message(client, userdata, msg):
 
         # Coerce to float
         x = float(data["x"]); y = float(data["y"]); z = float(data["z"])
+    except (ValueError, TypeError) as e:   # bad JSON is a ValueError too
+        PARSE_ERRORS.inc()
+        if (n := bad_log()):
+            print(f"⚠️ Bad message ({n} since last report): {e}")
+        if timed:
+            CALLBACK_S.since(t0)
+        return
 
-        ts_iso = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+    try:
+        t_store = time.time()
+        obs = tracker.observe(data, t_store)
+        if obs.kind == "dup":      # already stored; counted by the tracker
+            if timed:
+                CALLBACK_S.since(t0)
+            return
+        ts_iso = iso_utc(t_store)
         base_doc = {"ts_iso": ts_iso, "x": x, "y": y, "z": z}
+        if obs.seq is not None:
+            base_doc.update(device=obs.device, seq=obs.seq)
+        if obs.latency_s is not None:
+            base_doc.update(ts_dev=iso_utc(t_store - obs.latency_s), latency_ms=round(obs.latency_s * 1000, 1))
+            if timed:
+                LATENCY_S.observe(obs.latency_s)
 
         # 1) Mongo
-        safe_doc = save_to_mongo(base_doc)
+        safe_doc = save_to_mongo(base_doc, timed)
 
         # 2) Redis (store without _id to keep it simple)
         if use_redis:
-            redis_doc = {"ts_iso": ts_iso, "x": x, "y": y, "z": z}
-            save_to_redis(redis_doc)
+            redis_doc = dict(base_doc)
+            save_to_redis(redis_doc, timed)
             dests = "MongoDB & Redis"
         else:
             dests = "MongoDB"
 
-        print(f"💾 Saved to {dests}: {safe_doc}")
+        if (n := saved_log()):
+            print(f"💾 Saved {n} message(s) to {dests}, latest: {safe_doc}")
+            if tracker.devices:
+                print(f"   📶 {tracker.brief()}")
 
     except Exception as e:
-        print(f"⚠️ Error processing message: {e}")
+        WRITE_ERRORS.inc()
+        if (n := error_log()):
+            print(f"⚠️ Error processing message ({n} since last report): {e}")
+    if timed:
+        CALLBACK_S.since(t0)
 
 def on_disconnect(client, userdata, reason_code, properties=None):
     print(f"🔌 Disconnected (code={reason_code})")
 
 # ---------- MQTT client (API v2) ----------
-mqtt_client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
-mqtt_client.username_pw_set(config.MQTT_USER, config.MQTT_PASS)
-mqtt_client.tls_set()  # HiveMQ Cloud requires TLS
-
-mqtt_client.on_connect = on_connect
-mqtt_client.on_message = on_message
-mqtt_client.on_disconnect = on_disconnect
-
-print("🚀 Connecting to HiveMQ…")
-mqtt_client.connect(config.MQTT_BROKER, int(config.MQTT_PORT), keepalive=60)
-
-try:
-    mqtt_client.loop_forever()
-except KeyboardInterrupt:
-    print("\n🛑 Stopping subscriber…")
-finally:
+# Only when run as a script, so the callbacks can be imported (bench/cases.py).
+if __name__ == "__main__":
+    serve(METRICS_PORT)
+    mqtt_client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    mqtt_client.username_pw_set(config.MQTT_USER, config.MQTT_PASS)
+    mqtt_client.tls_set()  # HiveMQ Cloud requires TLS
+
+    mqtt_client.on_connect = on_connect
+    mqtt_client.on_message = on_message
+    mqtt_client.on_disconnect = on_disconnect
+
+    print("🚀 Connecting to HiveMQ…")
+    mqtt_client.connect(config.MQTT_BROKER, int(config.MQTT_PORT), keepalive=60)
+
     try:
-        mqtt_client.disconnect()
-    except Exception:
-        pass
-    mongo_client.close()
+        mqtt_client.loop_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping subscriber…")
+    finally:
+        try:
+            mqtt_client.disconnect()
+        except Exception:
+            pass
+        tracker.close()          # holes still pending become gap records
+        print(f"📶 {tracker.brief()}")
+        mongo_client.close()
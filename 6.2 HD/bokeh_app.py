@@ -3,7 +3,8 @@
 # Run:
 #   pip install bokeh pandas numpy
 #   bokeh serve --show bokeh_app.py --args ./data
-# Or pass a single CSV path instead of a folder.
+# Or pass a single CSV path instead of a folder. All chunk CSVs in the folder
+# are paged as one continuous series (see chunkset.py).
 
 import sys
 from pathlib import Path
@@ -12,29 +13,22 @@ import pandas as pd
 
 from bokeh.io import curdoc
 from bokeh.layouts import column, row
-from bokeh.models import ColumnDataSource, Select, MultiSelect, TextInput, Button, Div, DataTable, TableColumn
+from bokeh.models import (ColumnDataSource, Select, MultiSelect, TextInput, Button, Div, DataTable, TableColumn,
+                          CDSView, IndexFilter, Legend, LegendItem)
+from bokeh.palettes import Category10_10
 from bokeh.plotting import figure
 
-# ---------- data helpers ----------
-def list_csvs(folder: Path):
-    if not folder.exists():
-        return []
-    return sorted(folder.glob("*.csv"), key=lambda p: p.stat().st_mtime)
+from chunkset import ChunkSet
+from histsketch import HistogramIndex
 
-def latest_csv_path(folder: Path):
-    files = list_csvs(folder)
-    return files[-1] if files else None
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # shared helpers at the repo root
+from winstats import WindowStats
 
-def load_csv(path: Path):
-    try:
-        df = pd.read_csv(path)
-    except Exception as e:
-        return pd.DataFrame(), f"Error reading {path}: {e}"
-    df.columns = [c.strip() for c in df.columns]
-    if "sample" not in df.columns:
-        df["sample"] = np.arange(len(df))
-    return df, f"Loaded: {path.name} ({len(df)} rows)"
+ROLLOVER = 50_000      # max rows resident in the browser (and in df)
+RESIDENT_PAD = 2_000   # extra rows loaded around a window so paging stays local
+WHOLE = "Histogram (whole recording)"
 
+# ---------- data helpers ----------
 def get_axis_options(df: pd.DataFrame):
     preferred = [c for c in ["gyro_x", "gyro_y", "gyro_z"] if c in df.columns]
     if preferred:
@@ -58,34 +52,42 @@ if len(args) >= 1:
 if watch_folder is None and single_csv is None:
     watch_folder = Path("./data")
 
-df = pd.DataFrame()
-file_info = "No data loaded yet."
-
-if single_csv:
-    df, file_info = load_csv(single_csv)
-else:
-    newest = latest_csv_path(watch_folder)
-    if newest:
-        df, file_info = load_csv(newest)
+# All chunk files in the folder behave as one continuous series; only the
+# resident block [res_start, res_start + len(df)) is held in memory and in the
+# browser, and paging outside it loads just the overlapping chunks.
+dataset = ChunkSet(single_csv or watch_folder)
+total_rows = len(dataset)
+file_info = dataset.describe() if total_rows else "No data loaded yet."
 
+res_start = max(0, total_rows - RESIDENT_PAD)
+df = dataset.rows(res_start, total_rows)
 if df.empty:
     df = pd.DataFrame({"sample": [], "gyro_x": [], "gyro_y": [], "gyro_z": []})
 
 axes_default = get_axis_options(df) or []
-start_idx = 0
-window_n_default = min(200, len(df) if len(df) > 0 else 200)
+
+# prefix-sum / sparse-table index over the whole series: O(1) window summaries
+stats = WindowStats(axes_default)
+for _, block in dataset.iter_blocks():
+    stats.extend(block)
+# mergeable per-chunk histograms: the whole-recording view only re-reads chunks that changed
+hists = HistogramIndex(axes_default)
+hists.sync(dataset)
+window_n_default = min(200, total_rows if total_rows > 0 else 200)
+start_idx = max(0, total_rows - window_n_default)  # open on the newest window
 
 # ---------- widgets ----------
 title = Div(text="<h2>Gyroscope Dashboard — Bokeh</h2>")
 file_label = Div(text=f"<b>Data source</b>: {file_info}")
 
-chart_select = Select(title="Chart type", value="Line", options=["Line", "Scatter", "Histogram"])
+chart_select = Select(title="Chart type", value="Line", options=["Line", "Scatter", "Histogram", WHOLE])
 axis_select = MultiSelect(title="Axes", value=axes_default, options=axes_default, size=4)
 n_input = TextInput(title="Number of samples (N)", value=str(window_n_default))
 
 prev_btn = Button(label="Previous")
 next_btn = Button(label="Next")
 
+summary_title = Div(text="<b>Summary (current window)</b>")
 summary_src = ColumnDataSource(dict(axis=[], mean=[], std=[], min=[], max=[]))
 summary_table = DataTable(
     source=summary_src,
@@ -100,7 +102,15 @@ summary_table = DataTable(
 )
 
 plot = figure(height=350, sizing_mode="stretch_width", x_axis_label="Sample", y_axis_label="Reading")
-renderers = []
+legend = Legend(items=[])
+plot.add_layout(legend)
+
+# Long-lived per-axis sources and renderers: widgets only toggle visibility and
+# move the shared window filter; new rows arrive through source.stream().
+window_filter = IndexFilter(indices=[])
+sources = {}     # axis -> ColumnDataSource(sample, value) holding the resident rows
+hist_srcs = {}   # axis -> ColumnDataSource(top, left, right) for the window histogram
+glyphs = {}      # axis -> {"Line": renderer, "Scatter": renderer, "Histogram": renderer}
 
 # ---------- logic ----------
 def parse_n():
@@ -110,11 +120,10 @@ def parse_n():
         return 200
 
 def window_slice():
-    global start_idx
     n = parse_n()
-    L = len(df)
+    L = total_rows
     start = clamp(start_idx, 0, max(0, L - 1))
-    end = clamp(start + n, 1, L)
+    end = clamp(start + n, 1, max(1, L))
     return start, end
 
 def update_axes_options():
@@ -123,54 +132,112 @@ def update_axes_options():
     if not axis_select.value or any(a not in options for a in axis_select.value):
         axis_select.value = options
 
-def update_summary(window_df: pd.DataFrame, axes: list[str]):
-    if len(window_df) == 0 or len(axes) == 0:
+def update_summary(start: int, end: int, axes: list[str]):
+    axes = [a for a in axes if a in stats.columns]
+    if end <= start or len(axes) == 0:
         summary_src.data = dict(axis=[], mean=[], std=[], min=[], max=[])
         return
-    s = window_df[axes].agg(["mean", "std", "min", "max"]).T.reset_index().rename(columns={"index": "axis"})
-    for col in ["mean", "std", "min", "max"]:
-        s[col] = s[col].round(4)
-    summary_src.data = s.to_dict(orient="list")
-
-def clear_plot():
-    for r in list(renderers):
-        try:
-            plot.renderers.remove(r)
-        except Exception:
-            pass
-        renderers.remove(r)
+    rows = stats.summary(start, end, axes)
+    data = {k: [r[k] if k == "axis" else round(r[k], 4) for r in rows] for k in ["axis", "mean", "std", "min", "max"]}
+    summary_src.data = data
+
+def ensure_axis(axis: str):
+    if axis in glyphs:
+        return
+    color = Category10_10[len(glyphs) % len(Category10_10)]
+    src = ColumnDataSource(dict(sample=df["sample"].to_numpy(), value=df[axis].to_numpy()))
+    hsrc = ColumnDataSource(dict(top=[], left=[], right=[]))
+    view = CDSView(filter=window_filter)
+    sources[axis] = src
+    hist_srcs[axis] = hsrc
+    glyphs[axis] = {
+        "Line": plot.line(x="sample", y="value", source=src, view=view, color=color, visible=False),
+        "Scatter": plot.scatter(x="sample", y="value", source=src, view=view, color=color, size=5, visible=False),
+        "Histogram": plot.quad(top="top", bottom=0, left="left", right="right", alpha=0.5, color=color,
+                               source=hsrc, visible=False),
+    }
+
+def reset_sources():
+    # one full transfer when the resident block moves
+    for axis, src in sources.items():
+        if axis in df.columns:
+            src.data = dict(sample=df["sample"].to_numpy(), value=df[axis].to_numpy())
+        else:
+            src.data = dict(sample=[], value=[])
+
+def stream_rows(new_df: pd.DataFrame):
+    global df, res_start
+    for axis, src in sources.items():
+        if axis in new_df.columns:
+            src.stream(dict(sample=new_df["sample"].to_numpy(), value=new_df[axis].to_numpy()), rollover=ROLLOVER)
+    df = pd.concat([df, new_df], ignore_index=True)
+    if len(df) > ROLLOVER:
+        res_start += len(df) - ROLLOVER
+        df = df.iloc[-ROLLOVER:].reset_index(drop=True)
+
+def ensure_resident(start: int, end: int):
+    """Make sure global rows [start, end) are in df/sources; reload a block around them if not."""
+    global df, res_start
+    if res_start <= start and end <= res_start + len(df):
+        return
+    pad = max(RESIDENT_PAD, end - start)
+    lo = max(0, start - pad)
+    hi = min(total_rows, max(end + pad, lo + min(ROLLOVER, 4 * pad)))
+    if total_rows - hi <= pad:
+        hi = total_rows  # keep the live tail resident so new rows can stream in
+    lo = min(start, max(lo, hi - ROLLOVER))
+    block = dataset.rows(lo, hi)
+    if block.empty:
+        return
+    res_start, df = lo, block
+    reset_sources()
 
 def draw_plot():
-    clear_plot()
-    axes = list(axis_select.value)
+    mode = chart_select.value
+    glyph_mode = "Histogram" if mode == WHOLE else mode
     start, end = window_slice()
-    window_df = df.iloc[start:end].copy()
-
-    if chart_select.value in ("Line", "Scatter"):
-        for axis in axes:
-            source = ColumnDataSource(dict(sample=window_df["sample"], value=window_df[axis]))
-            if chart_select.value == "Line":
-                r = plot.line(x="sample", y="value", source=source, legend_label=axis)
+    ensure_resident(start, end)
+    axes = [a for a in axis_select.value if a in df.columns]
+    # window in resident-block coordinates
+    start, end = start - res_start, end - res_start
+    window_filter.indices = list(range(max(0, start), min(end, len(df))))
+
+    for axis in axes:
+        ensure_axis(axis)
+    items = []
+    for axis, by_mode in glyphs.items():
+        shown = axis in axes
+        for m, r in by_mode.items():
+            r.visible = shown and m == glyph_mode
+        if shown:
+            items.append(LegendItem(label=axis, renderers=[by_mode[glyph_mode]]))
+        if shown and mode == WHOLE:
+            hist, edges = hists.bins(axis, 30) if axis in hists.total else ([], [0])
+            hist_srcs[axis].data = dict(top=hist, left=edges[:-1], right=edges[1:])
+        elif shown and mode == "Histogram":
+            vals = df[axis].to_numpy()[start:end]
+            vals = vals[~np.isnan(vals)]
+            if len(vals):
+                hist, edges = np.histogram(vals, bins=30)
+                hist_srcs[axis].data = dict(top=hist, left=edges[:-1], right=edges[1:])
             else:
-                r = plot.circle(x="sample", y="value", source=source, legend_label=axis, size=5)
-            renderers.append(r)
-        plot.legend.visible = True
-        plot.xaxis.axis_label = "Sample"
-        plot.yaxis.axis_label = "Reading"
-    else:
-        for axis in axes:
-            vals = window_df[axis].dropna().values
-            if len(vals) == 0:
-                continue
-            hist, edges = np.histogram(vals, bins=30)
-            source = ColumnDataSource(dict(top=hist, left=edges[:-1], right=edges[1:]))
-            r = plot.quad(top="top", bottom=0, left="left", right="right", alpha=0.5, source=source, legend_label=axis)
-            renderers.append(r)
-        plot.legend.visible = True
+                hist_srcs[axis].data = dict(top=[], left=[], right=[])
+    legend.items = items
+    legend.visible = bool(items)
+
+    if glyph_mode == "Histogram":
         plot.xaxis.axis_label = "Reading bins"
         plot.yaxis.axis_label = "Count"
+    else:
+        plot.xaxis.axis_label = "Sample"
+        plot.yaxis.axis_label = "Reading"
 
-    update_summary(window_df, axes)
+    if mode == WHOLE:
+        summary_title.text = "<b>Summary (whole recording)</b>"
+        update_summary(0, total_rows, axes)
+    else:
+        summary_title.text = "<b>Summary (current window)</b>"
+        update_summary(start + res_start, end + res_start, axes)
 
 def on_prev():
     global start_idx
@@ -181,7 +248,7 @@ def on_prev():
 def on_next():
     global start_idx
     n = parse_n()
-    L = len(df)
+    L = total_rows
     start_idx = min(max(0, L - n), start_idx + n)
     draw_plot()
 
@@ -196,27 +263,38 @@ axis_select.on_change("value", on_controls_change)
 n_input.on_change("value", on_controls_change)
 
 def poll_for_new_data():
-    global df, file_info, start_idx
-    if single_csv:
-        return
-    newest = latest_csv_path(watch_folder)
-    if not newest:
+    global df, res_start, total_rows, file_info, start_idx, stats, hists
+    status = dataset.refresh()
+    if status == "same":
         return
-    new_mtime = newest.stat().st_mtime
-    last_name = getattr(curdoc(), "_last_file", None)
-    last_mtime = getattr(curdoc(), "_last_mtime", 0.0)
-    if newest.name != last_name or new_mtime > last_mtime:
-        new_df, info = load_csv(newest)
-        if not new_df.empty:
-            df = new_df
-            file_info = info
-            curdoc()._last_file = newest.name
-            curdoc()._last_mtime = new_mtime
-            update_axes_options()
-            n = parse_n()
-            start_idx = max(0, len(df) - n)
-            file_label.text = f"<b>Data source</b>: {file_info}"
-            draw_plot()
+    n = parse_n()
+    old_total, new_total = total_rows, len(dataset)
+    at_end = start_idx >= max(0, old_total - n)
+    if status == "reset":
+        # files were removed or rewritten: drop the resident block and reload
+        res_start, df = 0, dataset.rows(0, min(50, new_total))
+        total_rows = new_total
+        reset_sources()
+        update_axes_options()
+        stats = WindowStats(get_axis_options(df))
+        for _, block in dataset.iter_blocks():
+            stats.extend(block)
+        hists = HistogramIndex(get_axis_options(df))
+        hists.sync(dataset)
+        at_end = True
+    else:
+        tail_resident = res_start + len(df) == old_total
+        total_rows = new_total
+        new_rows = dataset.rows(old_total, new_total)
+        stats.extend(new_rows)
+        hists.sync(dataset)
+        if tail_resident and new_total - old_total <= ROLLOVER:
+            stream_rows(new_rows)
+    if at_end:
+        start_idx = max(0, new_total - n)
+    file_info = dataset.describe()
+    file_label.text = f"<b>Data source</b>: {file_info}"
+    draw_plot()
 
 # initial render
 update_axes_options()
@@ -224,7 +302,7 @@ draw_plot()
 
 # layout
 controls = column(chart_select, axis_select, n_input, row(prev_btn, next_btn), width=350)
-layout = row(controls, column(file_label, plot, Div(text="<b>Summary (current window)</b>"), summary_table), sizing_mode="stretch_width")
+layout = row(controls, column(file_label, plot, summary_title, summary_table), sizing_mode="stretch_width")
 curdoc().add_root(column(title, layout))
 
 # poll every 10s
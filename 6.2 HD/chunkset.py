@@ -0,0 +1,403 @@
+# chunkset.py
+"""
+Virtual concatenated dataset over the chunk CSVs in a watch folder (SIT225 6.2HD helper).
+
+Why:
+real_writer.py writes one CSV per 500 samples, so an hour of data is hundreds
+of files. The dashboards used to show only the newest one. ChunkSet keeps a
+lightweight index of every chunk (first/last `sample`, row count, mtime, size)
+and serves any row range by loading only the chunks that overlap it, through
+an LRU cache of parsed chunks. A chunk that grows is re-indexed and re-read
+from its previous byte offset, not from the start, as long as the bytes it
+already had are unchanged (its first and last FINGERPRINT bytes are compared);
+a rewritten chunk is indexed and parsed again from scratch. Hourly partitions written
+by compact.py are used in place of the CSVs they cover.
+
+API:
+    ds = ChunkSet("./data")            # folder (or a single CSV path)
+    ds.refresh()                       # -> "same" | "appended" | "reset"
+    len(ds)                            # total rows across all chunks
+    ds.rows(start, end)                # global row positions [start, end)
+    ds.sample_range(s0, s1)            # rows with s0 <= sample < s1 (every session)
+    ds.version(start, end)             # (path, mtime, size) key of the chunks behind a range
+    for offset, block in ds.iter_blocks(start): ...
+"""
+from __future__ import annotations
+
+import bisect
+import io
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from compact import COMPACT_DIR, MANIFEST, load_partition, read_manifest
+
+FINGERPRINT = 64     # bytes at the start and just before the scanned offset that must not change
+
+
+class CsvTail:
+    """
+    Follow a CSV by byte offset: each read parses only the complete lines
+    appended since the previous read (a half-written last line waits).
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.offset = 0
+        self.columns = None
+        self.rows = 0
+
+    def read_new(self) -> pd.DataFrame:
+        size = self.path.stat().st_size
+        if size < self.offset:  # truncated or replaced: start over
+            self.offset, self.columns, self.rows = 0, None, 0
+        if size == self.offset:
+            return pd.DataFrame()
+        with self.path.open("rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            return pd.DataFrame()
+        self.offset += end
+        data = chunk[:end]
+        if self.columns is None:
+            nl = data.index(b"\n")
+            self.columns = _split_header(data[:nl])
+            data = data[nl + 1:]
+        if not data.strip():
+            return pd.DataFrame()
+        new = pd.read_csv(io.BytesIO(data), names=self.columns, header=None)
+        if "sample" not in new.columns:
+            new["sample"] = np.arange(self.rows, self.rows + len(new))
+        self.rows += len(new)
+        return new
+
+
+def _partition_frame(path: Path) -> pd.DataFrame:
+    """A compacted partition, with timestamps back in real_writer's ISO text form."""
+    df = load_partition(path)
+    for c in df.columns:
+        if np.issubdtype(df[c].dtype, np.datetime64):
+            df[c] = np.datetime_as_string(df[c].to_numpy("datetime64[ms]"), unit="ms")
+    return df
+
+
+def _split_header(line: bytes) -> List[str]:
+    return [c.strip() for c in line.decode("utf-8", errors="replace").strip().split(",")]
+
+
+def _first_field(line: bytes) -> Optional[int]:
+    try:
+        return int(float(line.split(b",", 1)[0]))
+    except ValueError:
+        return None
+
+
+@dataclass
+class Chunk:
+    path: Path
+    mtime: float
+    size: int
+    header: tuple
+    rows: int = 0                        # complete data rows
+    first_sample: Optional[int] = None
+    last_sample: Optional[int] = None
+    offset: int = 0                      # global row position of the first row
+    scanned: int = 0                     # bytes counted so far (up to the last newline)
+    head: bytes = b""                    # first FINGERPRINT bytes
+    mark: bytes = b""                    # FINGERPRINT bytes just before `scanned`
+
+
+def _appended_to(path: Path, ch: Chunk) -> bool:
+    """The file still starts with the bytes `ch` indexed, so only new bytes follow."""
+    try:
+        with path.open("rb") as f:
+            head = f.read(len(ch.head))
+            f.seek(ch.scanned - len(ch.mark))
+            mark = f.read(len(ch.mark))
+    except OSError:
+        return False
+    return head == ch.head and mark == ch.mark
+
+
+def _index_file(path: Path, prev: Optional[Chunk] = None) -> Optional[Chunk]:
+    """Count rows and read the first/last `sample` without parsing the whole file."""
+    st = path.stat()
+    start = prev.scanned if prev is not None and st.st_size >= prev.size else 0
+    with path.open("rb") as f:
+        f.seek(start)
+        data = f.read(st.st_size - start)
+    end = data.rfind(b"\n") + 1
+    data = data[:end]
+    if start == 0:
+        if not end:
+            return None
+        nl = data.index(b"\n")
+        header = tuple(_split_header(data[:nl]))
+        body = data[nl + 1:]
+        ch = Chunk(path, st.st_mtime, st.st_size, header)
+    else:
+        ch, body = prev, data
+        ch.mtime, ch.size = st.st_mtime, st.st_size
+    lines = [ln for ln in body.split(b"\n") if ln.strip()]
+    if lines and ch.header and ch.header[0] == "sample":
+        if ch.first_sample is None:
+            ch.first_sample = _first_field(lines[0])
+        ch.last_sample = _first_field(lines[-1])
+    ch.rows += len(lines)
+    ch.scanned = start + end
+    if start == 0:
+        ch.head = data[:FINGERPRINT]
+    ch.mark = (ch.mark + data)[-FINGERPRINT:] if start else data[-FINGERPRINT:]
+    return ch
+
+
+class ChunkSet:
+    def __init__(self, source, pattern: str = "*.csv", cache_chunks: int = 64):
+        self.source = Path(source)
+        self.pattern = pattern
+        self.cache_chunks = cache_chunks
+        self.chunks: List[Chunk] = []
+        self.columns: List[str] = []
+        self._index = {}                 # path -> Chunk (every CSV seen, any header)
+        self._cache = OrderedDict()      # path -> (CsvTail, DataFrame)
+        self._offsets: List[int] = []
+        self.generation = 0              # bumped on every "reset" so derived indexes can rebuild
+        self._manifest, self._manifest_stamp = None, None
+        self._lock = threading.RLock()   # one ChunkSet may serve several threads (Streamlit sessions)
+        self.refresh()
+
+    # ---------- index ----------
+    def _read_manifest(self):
+        try:
+            stamp = (self.source / COMPACT_DIR / MANIFEST).stat().st_mtime_ns
+        except OSError:
+            return None
+        if stamp != self._manifest_stamp:
+            self._manifest, self._manifest_stamp = read_manifest(self.source), stamp
+        return self._manifest
+
+    def _paths(self):
+        """[(path, partition entry or None)] in time order; partitions replace the CSVs they cover."""
+        if self.source.is_file():
+            return [(self.source, None)]
+        if not self.source.exists():
+            return []
+        items, covered = [], set()
+        manifest = self._read_manifest()
+        if manifest:
+            for e in manifest["partitions"].values():
+                covered.update(e["sources"])
+                items.append((e["sort_key"], self.source / COMPACT_DIR / e["file"],
+                              dict(e, columns=manifest["columns"])))
+        # real_writer names embed the write time, so name order is time order
+        items += [(p.name, p, None) for p in self.source.glob(self.pattern) if p.name not in covered]
+        items.sort(key=lambda t: t[0])
+        return [(p, part) for _, p, part in items]
+
+    def refresh(self) -> str:
+        """
+        Re-stat the folder and update the index.
+        Returns "same", "appended" (only new rows at the end) or "reset".
+        """
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> str:
+        old = [(c.path, c.rows) for c in self.chunks]
+        seen = {}
+        rewritten = False
+        for p, part in self._paths():
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            prev = self._index.get(p)
+            if prev is not None and prev.size == st.st_size and prev.mtime == st.st_mtime:
+                seen[p] = prev
+                continue
+            if part is not None:  # partitions are immutable; the manifest already has their index
+                seen[p] = Chunk(p, st.st_mtime, st.st_size, tuple(part["columns"]), part["rows"],
+                                part["first_sample"], part["last_sample"], scanned=st.st_size)
+                continue
+            grown = prev is not None and st.st_size > prev.size and _appended_to(p, prev)
+            if not grown:
+                self._cache.pop(p, None)  # rewritten: drop the parsed copy
+                rewritten = rewritten or prev is not None
+            try:
+                ch = _index_file(p, prev if grown else None)
+            except (OSError, ValueError):
+                continue
+            if ch is not None:
+                seen[p] = ch
+        self._index = seen
+
+        # keep the header that holds most rows (skips e.g. annotations.csv in the same folder)
+        headers = Counter()
+        for c in seen.values():
+            headers[c.header] += c.rows
+        if not headers:
+            self.chunks, self.columns, self._offsets = [], [], []
+            if old:
+                self.generation += 1
+                return "reset"
+            return "same"
+        main = headers.most_common(1)[0][0]
+        self.columns = list(main)
+        self.chunks = [c for c in seen.values() if c.header == main and c.rows > 0]
+        total = 0
+        for c in self.chunks:
+            c.offset = total
+            total += c.rows
+        self._offsets = [c.offset for c in self.chunks]
+        for p in list(self._cache):
+            if p not in seen:
+                del self._cache[p]
+
+        new = [(c.path, c.rows) for c in self.chunks]
+        if rewritten:
+            self.generation += 1
+            return "reset"
+        if new == old:
+            return "same"
+        k = len(old)
+        if k == 0:
+            return "appended"
+        if len(new) >= k and new[:k - 1] == old[:k - 1] and new[k - 1][0] == old[-1][0] and new[k - 1][1] >= old[-1][1]:
+            return "appended"
+        self.generation += 1
+        return "reset"
+
+    def __len__(self):
+        return self.chunks[-1].offset + self.chunks[-1].rows if self.chunks else 0
+
+    @property
+    def newest(self) -> Optional[Path]:
+        return self.chunks[-1].path if self.chunks else None
+
+    # ---------- loading ----------
+    def _load(self, ch: Chunk) -> pd.DataFrame:
+        with self._lock:      # the LRU OrderedDict and the CsvTail offsets are shared state
+            return self._load_locked(ch)
+
+    def _load_locked(self, ch: Chunk) -> pd.DataFrame:
+        entry = self._cache.get(ch.path)
+        if entry is not None:
+            self._cache.move_to_end(ch.path)
+            tail, df = entry
+            if tail is not None and len(df) < ch.rows:  # file grew: parse only the appended bytes
+                new = tail.read_new()
+                if not new.empty:
+                    df = pd.concat([df, new], ignore_index=True)
+                    self._cache[ch.path] = (tail, df)
+            return df.iloc[:ch.rows]
+        if ch.path.suffix == ".npz":
+            tail, df = None, _partition_frame(ch.path)
+        else:
+            tail = CsvTail(ch.path)
+            df = tail.read_new()
+        self._cache[ch.path] = (tail, df)
+        while len(self._cache) > self.cache_chunks:
+            self._cache.popitem(last=False)
+        return df.iloc[:ch.rows]
+
+    def _chunk_at(self, pos: int) -> int:
+        return max(0, bisect.bisect_right(self._offsets, pos) - 1)
+
+    def rows(self, start: int, end: int) -> pd.DataFrame:
+        """Rows at global positions [start, end), loading only overlapping chunks."""
+        with self._lock:      # chunks/offsets from one refresh for the whole range
+            start, end = max(0, int(start)), min(len(self), int(end))
+            if end <= start:
+                return pd.DataFrame(columns=self.columns)
+            parts = []
+            i = self._chunk_at(start)
+            while i < len(self.chunks) and self.chunks[i].offset < end:
+                ch = self.chunks[i]
+                lo = max(start, ch.offset) - ch.offset
+                hi = min(end, ch.offset + ch.rows) - ch.offset
+                parts.append(self._load(ch).iloc[lo:hi])
+                i += 1
+        return pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0].reset_index(drop=True)
+
+    def iter_blocks(self, start: int = 0, end: Optional[int] = None):
+        """Yield (global_offset, DataFrame) one chunk at a time."""
+        end = len(self) if end is None else min(end, len(self))
+        pos = max(0, start)
+        while pos < end:
+            ch = self.chunks[self._chunk_at(pos)]
+            hi = min(end, ch.offset + ch.rows)
+            yield pos, self._load(ch).iloc[pos - ch.offset:hi - ch.offset]
+            pos = hi
+
+    # ---------- sample lookups ----------
+    def _sessions(self) -> List[tuple]:
+        """[(i0, i1)] chunk index runs in which `sample` keeps rising (real_writer restarts it at 0 per run)."""
+        runs, i0 = [], 0
+        for i in range(1, len(self.chunks)):
+            if self.chunks[i].first_sample <= self.chunks[i - 1].last_sample:
+                runs.append((i0, i))
+                i0 = i
+        return runs + [(i0, len(self.chunks))] if self.chunks else runs
+
+    def _position_in(self, i0: int, i1: int, sample: int) -> int:
+        """Global position of the first row with `sample` >= the given value in chunks [i0, i1)."""
+        firsts = [c.first_sample for c in self.chunks[i0:i1]]
+        i = i0 + max(0, bisect.bisect_right(firsts, sample) - 1)
+        ch = self.chunks[i]
+        if sample > ch.last_sample:
+            return ch.offset + ch.rows
+        if ch.last_sample - ch.first_sample + 1 == ch.rows:  # contiguous chunk
+            return ch.offset + max(0, int(sample) - ch.first_sample)
+        col = self._load(ch)["sample"].to_numpy()
+        return ch.offset + int(np.searchsorted(col, sample))
+
+    def _indexed(self) -> bool:
+        return bool(self.chunks) and all(c.first_sample is not None for c in self.chunks)
+
+    def position_of(self, sample: int) -> int:
+        """Global position of the first row with `sample` >= the given value, in the first session that has one."""
+        with self._lock:
+            if not self._indexed():
+                return max(0, min(int(sample), len(self)))
+            for i0, i1 in self._sessions():
+                pos = self._position_in(i0, i1, sample)
+                if pos < self.chunks[i1 - 1].offset + self.chunks[i1 - 1].rows:
+                    return pos
+            return len(self)
+
+    def sample_range(self, s0: int, s1: int) -> pd.DataFrame:
+        """Rows with s0 <= sample < s1, from every session that has them, in order."""
+        with self._lock:
+            if not self._indexed():
+                return self.rows(self.position_of(s0), self.position_of(s1))
+            parts = []
+            for i0, i1 in self._sessions():
+                lo, hi = self._position_in(i0, i1, s0), self._position_in(i0, i1, s1)
+                if lo < hi:
+                    parts.append(self.rows(lo, hi))
+        if not parts:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+    def version(self, start: int, end: int) -> tuple:
+        """(path, mtime, size) of every chunk overlapping [start, end): a cache key for derived data."""
+        out = []
+        i = self._chunk_at(max(0, start))
+        while i < len(self.chunks) and self.chunks[i].offset < end:
+            ch = self.chunks[i]
+            out.append((str(ch.path), ch.mtime, ch.size))
+            i += 1
+        return tuple(out)
+
+    def describe(self) -> str:
+        if not self.chunks:
+            return f"{self.source}: no chunks"
+        parts = sum(c.path.suffix == ".npz" for c in self.chunks)
+        compacted = f" ({parts} compacted)" if parts else ""
+        return f"{len(self.chunks)} chunks{compacted}, {len(self)} rows • newest {self.newest.name}"
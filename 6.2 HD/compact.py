@@ -0,0 +1,264 @@
+# compact.py
+"""
+Compact closed chunk CSVs into hourly typed columnar partitions (SIT225 6.2HD helper).
+
+Why:
+real_writer.py writes a new 500-row CSV every few seconds, so a day of
+recording is thousands of files and every reader pays an open + CSV parse per
+chunk. This merges closed chunks into one .npz per hour (int64 sample,
+datetime64[ms] timestamp, float64 axes; no extra dependency) under
+<folder>/compacted/, with manifest.json recording each partition's sample and
+time range and the exact source files (name, size, mtime, rows) it holds.
+Rows stay in write order; an hour that spans a restart of real_writer (which
+starts `sample` at 0 again) gets one partition per session, so `sample` only
+rises inside a partition, as it does inside a chunk.
+ChunkSet reads the manifest, serves partitions in place of the CSVs they
+cover, and keeps reading any CSV not compacted yet.
+
+Safety:
+  - a chunk is only taken once it is closed: not the newest file, older than
+    `settle_s`, and ending in a newline;
+  - partitions are written to a temp file, fsynced, verified and renamed to a
+    new versioned name; the manifest is swapped atomically afterwards, so a
+    crash leaves either the old or the new state, never a half partition;
+  - sources already listed in the manifest are never read again (re-runs are
+    no-ops), and superseded/orphaned partition files are removed on a later run;
+  - with delete=True an original is removed only if its size and mtime still
+    match what was verified into a partition.
+
+API:
+    summary = compact("./data", settle_s=30, delete=False)
+    manifest = read_manifest("./data")          # None if nothing compacted
+    df = load_partition(path)                   # DataFrame, typed columns
+
+CLI:
+    python compact.py ./data                    # one pass
+    python compact.py ./data --every 300        # keep compacting in the background
+    python compact.py ./data --delete           # also remove verified originals
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+COMPACT_DIR = "compacted"
+MANIFEST = "manifest.json"
+CHUNK_RE = re.compile(r"^(?P<prefix>.+)_data_(?P<day>\d{8})_(?P<hms>\d{6})\.csv$")
+
+
+# ---------- manifest & partitions ----------
+def read_manifest(folder) -> Optional[dict]:
+    path = Path(folder) / COMPACT_DIR / MANIFEST
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path: Path, write):
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    tmp.replace(path)
+
+
+def _write_manifest(folder: Path, manifest: dict):
+    data = json.dumps(manifest, indent=1).encode("utf-8")
+    _write_atomic(folder / COMPACT_DIR / MANIFEST, lambda f: f.write(data))
+
+
+def load_partition(path) -> pd.DataFrame:
+    with np.load(path, allow_pickle=False) as z:
+        cols = [str(c) for c in z["__columns__"]]
+        return pd.DataFrame({c: z[c] for c in cols})
+
+
+def _typed(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    out = {}
+    for c in df.columns:
+        if c == "sample":
+            out[c] = df[c].to_numpy(np.int64)
+        elif c == "timestamp":
+            out[c] = pd.to_datetime(df[c]).to_numpy("datetime64[ms]")
+        else:
+            out[c] = pd.to_numeric(df[c], errors="coerce").to_numpy(np.float64)
+    return out
+
+
+def _time_range(cols: Dict[str, np.ndarray], names):
+    """(first, last) ISO times from the timestamp column, else from the chunk file names."""
+    ts = cols.get("timestamp")
+    if ts is not None and len(ts):
+        return str(ts.min()), str(ts.max())
+    stamps = sorted(f"{m['day']}_{m['hms']}" for m in map(CHUNK_RE.match, names))
+    first, last = pd.to_datetime([stamps[0], stamps[-1]], format="%Y%m%d_%H%M%S")
+    return first.isoformat(), last.isoformat()
+
+
+# ---------- compaction ----------
+def _closed_chunks(folder: Path, covered: set, settle_s: float):
+    """Chunk CSVs that are safe to compact, grouped by (prefix, day, hour)."""
+    names = sorted(p.name for p in folder.glob("*.csv") if CHUNK_RE.match(p.name))
+    now = time.time()
+    groups = {}
+    for name in names[:-1]:                      # the newest chunk may still be written
+        if name in covered:
+            continue
+        p = folder / name
+        try:
+            st = p.stat()
+            with p.open("rb") as f:
+                f.seek(max(0, st.st_size - 1))
+                complete = f.read(1) == b"\n"
+        except OSError:
+            continue
+        if now - st.st_mtime < settle_s or not complete:
+            continue
+        m = CHUNK_RE.match(name)
+        groups.setdefault(f"{m['prefix']}_{m['day']}_{m['hms'][:2]}", []).append((p, st))
+    return groups
+
+
+def _cleanup(cdir: Path, manifest: dict, settle_s: float):
+    live = {e["file"] for e in manifest["partitions"].values()} | {MANIFEST}
+    now = time.time()
+    for p in cdir.iterdir():
+        # superseded versions and crash leftovers; left alone for settle_s so a
+        # reader that just looked the old version up can still open it
+        if p.name not in live and now - p.stat().st_mtime >= settle_s:
+            p.unlink(missing_ok=True)
+
+
+def _continues(last_sample, df) -> bool:
+    """False if df starts a new recording session (real_writer restarts `sample` at 0)."""
+    if last_sample is None or "sample" not in df.columns or not len(df):
+        return True
+    return int(df["sample"].iloc[0]) > last_sample
+
+
+def _segment_for(parts: dict, hour: str, run):
+    """
+    (key, entry or None) of the partition a run of chunks goes into. A partition
+    holds one session in write order, so `sample` only rises inside it: the run
+    is appended to the hour's newest partition if it carries on that session
+    and comes after it, else it starts a new one (<hour>, <hour>-2, ...).
+    """
+    keys = [k for k in parts if k == hour or k.startswith(hour + "-")]
+    if keys:
+        key = max(keys, key=lambda k: max(parts[k]["sources"]))
+        e = parts[key]
+        name, df, _ = run[0]
+        if name > max(e["sources"]) and _continues(e["last_sample"], df):
+            return key, e
+    n = len(keys) + 1
+    return (hour if n == 1 else f"{hour}-{n}"), None
+
+
+def compact(folder, settle_s: float = 30.0, delete: bool = False, log=print) -> dict:
+    folder = Path(folder)
+    cdir = folder / COMPACT_DIR
+    cdir.mkdir(exist_ok=True)
+    manifest = read_manifest(folder) or {"version": 1, "columns": None, "partitions": {}}
+    parts = manifest["partitions"]
+    covered = {n for e in parts.values() for n in e["sources"]}
+    summary = {"partitions": 0, "chunks": 0, "rows": 0, "deleted": 0, "skipped": 0}
+
+    for hour, files in sorted(_closed_chunks(folder, covered, settle_s).items()):
+        runs, last = [], None              # [[(name, df, stat), ...]] split where a new session starts
+        for p, st in files:
+            df = pd.read_csv(p)
+            df.columns = [c.strip() for c in df.columns]
+            if manifest["columns"] is None:
+                manifest["columns"] = list(df.columns)
+            if list(df.columns) != manifest["columns"]:
+                log(f"[Compact] skip {p.name}: columns {list(df.columns)} != {manifest['columns']}")
+                summary["skipped"] += 1
+                continue
+            if not runs or not _continues(last, df):
+                runs.append([])
+            runs[-1].append((p.name, df, st))
+            if "sample" in df.columns and len(df):
+                last = int(df["sample"].iloc[-1])
+
+        for run in runs:
+            key, old = _segment_for(parts, hour, run)
+            sources = {name: {"size": st.st_size, "mtime": st.st_mtime, "rows": len(df)} for name, df, st in run}
+            # file-name order is write order; rows are kept as written, never re-sorted
+            new = pd.concat([df for _, df, _ in run], ignore_index=True)
+            if old is not None:
+                new = pd.concat([load_partition(cdir / old["file"]), pd.DataFrame(_typed(new))], ignore_index=True)
+            cols = _typed(new)
+            cols["__columns__"] = np.array(manifest["columns"])
+            gen = (old["gen"] + 1) if old else 1
+            fname = f"{key}.v{gen}.npz"
+            _write_atomic(cdir / fname, lambda f: np.savez(f, **cols))
+
+            check = load_partition(cdir / fname)   # verify before the manifest points at it
+            expected = len(new)
+            if len(check) != expected or ("sample" in cols and not np.array_equal(check["sample"].to_numpy(), cols["sample"])):
+                (cdir / fname).unlink(missing_ok=True)
+                raise RuntimeError(f"verification failed for {fname}; originals kept")
+
+            all_sources = {**(old["sources"] if old else {}), **sources}
+            samples = cols.get("sample")
+            t_first, t_last = _time_range(cols, all_sources)
+            parts[key] = {
+                "file": fname, "gen": gen, "rows": expected,
+                "first_sample": int(samples[0]) if samples is not None and len(samples) else None,
+                "last_sample": int(samples[-1]) if samples is not None and len(samples) else None,
+                "t_first": t_first, "t_last": t_last,
+                "sort_key": min(all_sources), "sources": all_sources,
+            }
+            _write_manifest(folder, manifest)
+            summary["partitions"] += 1
+            summary["chunks"] += len(sources)
+            summary["rows"] += sum(s["rows"] for s in sources.values())
+            log(f"[Compact] {fname}: +{len(sources)} chunks -> {expected} rows")
+
+    if delete:
+        for e in parts.values():
+            for name, meta in e["sources"].items():
+                p = folder / name
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                if st.st_size == meta["size"] and st.st_mtime == meta["mtime"]:
+                    p.unlink()
+                    summary["deleted"] += 1
+    _cleanup(cdir, manifest, settle_s)
+    return summary
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compact closed chunk CSVs into hourly .npz partitions.")
+    ap.add_argument("folder", nargs="?", default="./data")
+    ap.add_argument("--settle", type=float, default=30.0, help="seconds a chunk must be untouched")
+    ap.add_argument("--delete", action="store_true", help="remove originals once verified in a partition")
+    ap.add_argument("--every", type=float, default=0, help="repeat every N seconds (0 = one pass)")
+    args = ap.parse_args()
+    while True:
+        t0 = time.perf_counter()
+        s = compact(args.folder, args.settle, args.delete)
+        print(f"[Compact] {s['chunks']} chunks ({s['rows']} rows) into {s['partitions']} partitions, "
+              f"{s['deleted']} originals deleted, {s['skipped']} skipped in {time.perf_counter() - t0:.2f}s")
+        if not args.every:
+            break
+        try:
+            time.sleep(args.every)
+        except KeyboardInterrupt:
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# histsketch.py
+"""
+Mergeable streaming histograms for the 6.2 HD dashboards.
+
+Why:
+The histogram views only covered the current window and were recomputed from
+raw values on every redraw. Histograms are additive, so we keep one per axis
+per chunk, merge them into a running total, and only touch the chunks that are
+new or changed. The "whole recording" view then renders from the totals in
+constant time, however many hours of data are in the folder.
+
+Two sketch types, both mergeable (merge / subtract are exact):
+    FixedHistogram(lo, hi, bins)   fixed edges + underflow/overflow counts
+    LogHistogram(alpha=0.001)      signed log buckets, ~alpha relative error,
+                                   no range needed up front (default)
+
+API:
+    hx = HistogramIndex(["gyro_x", "gyro_y", "gyro_z"])
+    hx.sync(chunkset)                    # add new/grown chunks, drop removed ones
+    counts, edges = hx.bins("gyro_x", 30)
+"""
+from __future__ import annotations
+
+import math
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+class FixedHistogram:
+    def __init__(self, lo: float, hi: float, bins: int = 30):
+        self.edges = np.linspace(lo, hi, bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.under = 0
+        self.over = 0
+
+    def empty_like(self):
+        return FixedHistogram(self.edges[0], self.edges[-1], len(self.counts))
+
+    def update(self, values):
+        x = np.asarray(values, dtype=np.float64)
+        x = x[~np.isnan(x)]
+        lo, hi, n = self.edges[0], self.edges[-1], len(self.counts)
+        self.under += int((x < lo).sum())
+        self.over += int((x > hi).sum())
+        x = x[(x >= lo) & (x <= hi)]
+        idx = np.minimum(((x - lo) / (hi - lo) * n).astype(np.int64), n - 1)
+        self.counts += np.bincount(idx, minlength=n)
+
+    def merge(self, other: "FixedHistogram", sign: int = 1):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("FixedHistogram edges differ; cannot merge")
+        self.counts += sign * other.counts
+        self.under += sign * other.under
+        self.over += sign * other.over
+
+    @property
+    def n(self) -> int:
+        return int(self.counts.sum()) + self.under + self.over
+
+    def to_bins(self, nbins: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        if nbins is None or nbins == len(self.counts):
+            return self.counts.copy(), self.edges.copy()
+        mids = (self.edges[:-1] + self.edges[1:]) / 2
+        return np.histogram(mids, bins=np.linspace(self.edges[0], self.edges[-1], nbins + 1), weights=self.counts)
+
+
+class LogHistogram:
+    """
+    Bucket k holds |x| in (gamma^(k-1), gamma^k], gamma = (1+alpha)/(1-alpha);
+    separate maps for positive and negative values, plus a zero bucket for
+    |x| < min_value. Same bucketing as DDSketch, so any quantile or re-binned
+    histogram is within ~alpha relative error.
+    """
+    def __init__(self, alpha: float = 0.001, min_value: float = 1e-9):
+        self.alpha = alpha
+        self.min_value = min_value
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._lg = math.log(self.gamma)
+        self.pos = Counter()
+        self.neg = Counter()
+        self.zero = 0
+
+    def empty_like(self):
+        return LogHistogram(self.alpha, self.min_value)
+
+    def _add(self, counter: Counter, mags: np.ndarray):
+        if len(mags):
+            keys, cnt = np.unique(np.ceil(np.log(mags) / self._lg).astype(np.int64), return_counts=True)
+            counter.update(dict(zip(keys.tolist(), cnt.tolist())))
+
+    def update(self, values):
+        x = np.asarray(values, dtype=np.float64)
+        x = x[~np.isnan(x)]
+        small = np.abs(x) < self.min_value
+        self.zero += int(small.sum())
+        x = x[~small]
+        self._add(self.pos, x[x > 0])
+        self._add(self.neg, -x[x < 0])
+
+    def merge(self, other: "LogHistogram", sign: int = 1):
+        if other.gamma != self.gamma:
+            raise ValueError("LogHistogram alpha differs; cannot merge")
+        for mine, theirs in ((self.pos, other.pos), (self.neg, other.neg)):
+            if sign > 0:
+                mine.update(theirs)
+            else:
+                mine.subtract(theirs)
+                for k in [k for k, v in mine.items() if v <= 0]:
+                    del mine[k]
+        self.zero += sign * other.zero
+
+    @property
+    def n(self) -> int:
+        return sum(self.pos.values()) + sum(self.neg.values()) + self.zero
+
+    def _points(self):
+        # representative value of each bucket: 2 * gamma^k / (gamma + 1)
+        keys = np.array(list(self.pos) + list(self.neg), dtype=np.float64)
+        sign = np.r_[np.ones(len(self.pos)), -np.ones(len(self.neg))]
+        vals = sign * 2 * np.exp(keys * self._lg) / (self.gamma + 1)
+        cnts = np.array(list(self.pos.values()) + list(self.neg.values()), dtype=np.int64)
+        if self.zero:
+            vals, cnts = np.r_[vals, 0.0], np.r_[cnts, self.zero]
+        return vals, cnts
+
+    def _intervals(self):
+        # bucket k covers (gamma^(k-1), gamma^k]; negative buckets are mirrored
+        keys = np.array(list(self.pos) + list(self.neg), dtype=np.float64)
+        sign = np.r_[np.ones(len(self.pos)), -np.ones(len(self.neg))]
+        a = sign * np.exp((keys - 1) * self._lg)
+        b = sign * np.exp(keys * self._lg)
+        lo, hi = np.minimum(a, b), np.maximum(a, b)
+        cnts = np.array(list(self.pos.values()) + list(self.neg.values()), dtype=np.float64)
+        if self.zero:
+            lo, hi, cnts = np.r_[lo, -self.min_value], np.r_[hi, self.min_value], np.r_[cnts, self.zero]
+        return lo, hi, cnts
+
+    def to_bins(self, nbins: int = 30) -> Tuple[np.ndarray, np.ndarray]:
+        """Re-bin onto nbins equal-width bins, spreading each bucket evenly over its interval."""
+        lo, hi, cnts = self._intervals()
+        if not len(cnts):
+            return np.zeros(0), np.zeros(0)
+        edges = np.linspace(lo.min(), hi.max(), nbins + 1)
+        frac = np.clip((edges[:, None] - lo) / (hi - lo), 0.0, 1.0)   # share of each bucket below each edge
+        return np.diff(frac @ cnts), edges
+
+    def quantile(self, q: float) -> float:
+        vals, cnts = self._points()
+        if not len(vals):
+            return float("nan")
+        order = np.argsort(vals)
+        cum = np.cumsum(cnts[order])
+        return float(vals[order][np.searchsorted(cum, q * (cum[-1] - 1), side="right")])
+
+
+class HistogramIndex:
+    """Per-axis totals built from per-chunk histograms, kept in sync with a ChunkSet."""
+    def __init__(self, axes: Iterable[str], make=LogHistogram):
+        self.axes = list(axes)
+        self.make = make
+        self.total: Dict[str, object] = {a: make() for a in self.axes}
+        self._parts: Dict[object, tuple] = {}   # key -> (version, {axis: hist})
+
+    def set_part(self, key, version, frame):
+        """Replace one chunk's contribution with histograms of `frame`."""
+        old = self._parts.get(key)
+        if old is not None and old[0] == version:
+            return False
+        self.drop_part(key)
+        part = {}
+        for a in self.axes:
+            h = self.total[a].empty_like()
+            if a in frame:
+                h.update(frame[a])
+            self.total[a].merge(h)
+            part[a] = h
+        self._parts[key] = (version, part)
+        return True
+
+    def drop_part(self, key):
+        old = self._parts.pop(key, None)
+        if old is not None:
+            for a, h in old[1].items():
+                self.total[a].merge(h, sign=-1)
+
+    def sync(self, chunkset) -> int:
+        """(Re)compute chunks that are new or changed and drop vanished ones; returns chunks touched."""
+        touched = 0
+        live = set()
+        for ch in chunkset.chunks:
+            live.add(ch.path)
+            version = (ch.mtime, ch.size, ch.rows)
+            old = self._parts.get(ch.path)
+            if old is not None and old[0] == version:
+                continue
+            self.set_part(ch.path, version, chunkset.rows(ch.offset, ch.offset + ch.rows))
+            touched += 1
+        for key in [k for k in self._parts if k not in live]:
+            self.drop_part(key)
+            touched += 1
+        return touched
+
+    def bins(self, axis: str, nbins: int = 30):
+        return self.total[axis].to_bins(nbins)
+
+    def count(self, axis: str) -> int:
+        return self.total[axis].n
@@ -7,13 +7,21 @@ from pathlib import Path
 import pandas as pd
 import serial
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # shared helpers at the repo root
+from hotmetrics import Throttle, counter, gauge, histogram, serve
+from streamfilt import make_filter
+
 # ---- fixed config ----
 PORT = r"\\.\COM14"      # hard-coded COM port (use \\.\ form for COM10+)
 BAUD = 115200            # must match Arduino sketch Serial.begin
 OUTDIR = "./data"
 ROWS_PER_FILE = 500
 PREFIX = "gyro"
-PRINT_EVERY = 50
+PRINT_EVERY_S = 2.0      # progress line at most this often (console I/O is slow)
+METRICS_PORT = 9226      # http://127.0.0.1:9226/metrics
+FILTER = None            # e.g. "median:5+ema:0.2": adds gyro_x_f/_y_f/_z_f columns (raw ones are kept);
+                         # this changes the CSV header, so start a new OUTDIR (compact.py skips mixed headers)
+SAMPLE_HZ = 50           # sketch output rate, only used by "butter:..." filters
 # -----------------------
 
 outdir = Path(OUTDIR)
@@ -22,6 +30,7 @@ outdir.mkdir(parents=True, exist_ok=True)
 col_x = f"{PREFIX}_x"
 col_y = f"{PREFIX}_y"
 col_z = f"{PREFIX}_z"
+filt = make_filter(FILTER, fs=SAMPLE_HZ)   # one block per flush; its state carries over between files
 
 try:
     ser = serial.Serial(PORT, BAUD, timeout=1)
@@ -36,15 +45,32 @@ print(f"Writing CSV chunks of {ROWS_PER_FILE} rows to: {outdir.resolve()}")
 sample_total = 0
 rows_buffer = []
 
+# ---- metrics (hotmetrics.py): a counter per sample, a histogram per flush ----
+APP = {"app": "real_writer"}
+SAMPLES_IN = counter("sit225_samples_in_total", "Samples received", APP)
+PARSE_ERRORS = counter("sit225_parse_errors_total", "Input lines or messages that could not be parsed", APP)
+ROWS_OUT = counter("sit225_rows_written_total", "Rows written to storage", {**APP, "store": "csv"})
+WRITE_S = histogram("sit225_write_seconds", "Storage write latency", {**APP, "store": "csv"})
+gauge("sit225_queue_depth", "Samples waiting in a buffer", {**APP, "queue": "rows_buffer"},
+      fn=lambda: len(rows_buffer))
+progress = Throttle(PRINT_EVERY_S)
+serve(METRICS_PORT)
+
 
 def flush_buffer():
     global rows_buffer
     if not rows_buffer:
         return
+    t0 = time.perf_counter()
     df = pd.DataFrame(rows_buffer, columns=["sample", "timestamp", col_x, col_y, col_z])
+    if filt is not None:
+        # 3 decimals (raw values have 2): full-precision floats make to_csv ~2x slower
+        df[[f"{col_x}_f", f"{col_y}_f", f"{col_z}_f"]] = filt(df[[col_x, col_y, col_z]].to_numpy()).round(3)
     fname = f"{PREFIX}_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     path = outdir / fname
     df.to_csv(path, index=False, quoting=csv.QUOTE_MINIMAL)
+    WRITE_S.since(t0)
+    ROWS_OUT.inc(len(df))
     print(f"Wrote {path} ({len(df)} rows).")
     rows_buffer = []
 
@@ -57,19 +83,22 @@ try:
             continue
         parts = line.split(",")
         if len(parts) != 3:
+            PARSE_ERRORS.inc()
             continue
         try:
             x = float(parts[0].strip())
             y = float(parts[1].strip())
             z = float(parts[2].strip())
         except ValueError:
+            PARSE_ERRORS.inc()
             continue
 
         ts_iso = datetime.now().isoformat(timespec="milliseconds")
         rows_buffer.append([sample_total, ts_iso, x, y, z])
         sample_total += 1
+        SAMPLES_IN.inc()
 
-        if sample_total % PRINT_EVERY == 0:
+        if progress():
             print(f"Read {sample_total} samples...")
 
         if len(rows_buffer) >= ROWS_PER_FILE:
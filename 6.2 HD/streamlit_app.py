@@ -1,23 +1,55 @@
 # streamlit_app.py  (robust + debug view)
+import hashlib
+import io
+import sys
+import threading
 from pathlib import Path
-import time
 import numpy as np
 import pandas as pd
 import altair as alt
 import streamlit as st
 
+from chunkset import ChunkSet
+from histsketch import HistogramIndex
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # shared helpers at the repo root
+from winstats import WindowStats
+
 st.set_page_config(page_title="Gyroscope Dashboard (Streamlit)", layout="wide")
 st.write("✅ App started")
 
-def list_csvs(folder: Path):
-    try:
-        return sorted(folder.glob("*.csv"), key=lambda p: p.stat().st_mtime)
-    except Exception:
-        return []
+@st.cache_resource
+def open_dataset(folder: str):
+    # one chunk index + LRU per folder, shared by every rerun and session;
+    # chunks are keyed on (path, mtime, size) and grown files are read from their last offset
+    return ChunkSet(folder)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_uploaded(data: bytes):
+    return load_csv(io.BytesIO(data))
+
+@st.cache_resource(max_entries=8)
+def stats_index(key: str, columns: tuple):
+    # prefix-sum / sparse-table summaries, extended as the data grows (see winstats.py);
+    # shared by every session, so the lock covers the whole sync + query
+    return {"stats": WindowStats(columns), "generation": None, "lock": threading.Lock()}
 
-def latest_csv_path(folder: Path):
-    files = list_csvs(folder)
-    return files[-1] if files else None
+def synced_summary(key, columns, total, get_rows, generation, lo, hi, axes):
+    entry = stats_index(key, tuple(columns))
+    with entry["lock"]:
+        ws = entry["stats"]
+        if entry["generation"] != generation or len(ws) > total:
+            ws.reset()
+            entry["generation"] = generation
+        if len(ws) < total:
+            ws.extend(get_rows(len(ws), total))
+        return ws.summary(lo, hi, axes)
+
+@st.cache_resource(max_entries=8)
+def hist_index(key: str, columns: tuple):
+    # mergeable per-chunk histograms; syncing only re-reads chunks that changed (see histsketch.py);
+    # shared like stats_index, so sync + bins run under its lock
+    return {"hist": HistogramIndex(columns), "lock": threading.Lock()}
 
 def load_csv(p):
     try:
@@ -44,13 +76,16 @@ st.sidebar.title("Controls")
 data_mode = st.sidebar.radio("Data source", ["Upload single CSV", "Watch folder for latest CSV"], index=1)
 
 uploaded_df = pd.DataFrame()
-watched_df = pd.DataFrame()
+dataset = None
 current_file_info = ""
+upload_digest = ""
 
 if data_mode == "Upload single CSV":
     file = st.sidebar.file_uploader("Upload CSV", type=["csv"])
     if file is not None:
-        uploaded_df = load_csv(file)
+        data = file.getvalue()
+        uploaded_df = load_uploaded(data)
+        upload_digest = hashlib.sha1(data).hexdigest()  # same name + row count is not the same file
         current_file_info = f"Uploaded file: {file.name}"
 else:
     default_folder = str((Path.cwd() / "data").resolve())
@@ -58,38 +93,54 @@ else:
     # IMPORTANT: strip quotes/spaces so paths like "C:\...\data" work
     folder = Path(folder_str.strip().strip('"').strip("'"))
     st.sidebar.caption(f"Using: {folder}")
-    st.write({"watch_folder": str(folder), "exists": folder.exists(),
-              "csv_count": len(list(folder.glob('*.csv')))})
 
     if not folder.exists():
         st.warning("Folder does not exist. Fix the path above.")
-    newest = latest_csv_path(folder)
-    if newest is not None:
-        current_file_info = f"Watching: {folder} • Latest: {newest.name}"
-        watched_df = load_csv(newest)
+    dataset = open_dataset(str(folder))
+    dataset.refresh()
+    st.write({"watch_folder": str(folder), "exists": folder.exists(), "chunk_count": len(dataset.chunks)})
+    if len(dataset):
+        current_file_info = f"Watching: {folder} • {dataset.describe()}"
     else:
         st.warning("No CSV files found in the folder yet.")
-        watched_df = pd.DataFrame()
 
-# pick active df
-df = uploaded_df if data_mode == "Upload single CSV" else watched_df
+# Watch mode pages through every chunk as one series; upload mode is one frame.
+if dataset is not None:
+    total = len(dataset)
+    def get_rows(a, b):
+        return dataset.rows(a, b)
+    def data_version(a, b):
+        return dataset.version(a, b)
+    stats_key = f"folder:{dataset.source}"
+    def sync_hists(hx):
+        hx.sync(dataset)
+else:
+    total = len(uploaded_df)
+    def get_rows(a, b):
+        return uploaded_df.iloc[a:b]
+    def data_version(a, b):
+        return (upload_digest, total)
+    stats_key = f"upload:{upload_digest}"
+    def sync_hists(hx):
+        hx.set_part("upload", total, uploaded_df)
 
 # show a small preview (even if empty) so the page is never blank
 with st.expander("Data preview / status", expanded=True):
     st.write("current_file_info:", current_file_info or "(none)")
-    st.write("df shape:", df.shape)
-    if not df.empty:
-        st.dataframe(df.head(10))
+    st.write("rows:", total)
+    if total:
+        st.dataframe(get_rows(0, 10))
     else:
         st.info("No data yet. Upload a CSV or point to a folder that has *.csv files.")
 
-if df.empty:
+if total == 0:
     st.stop()
 
 # --- plotting controls ---
-chart_type = st.sidebar.selectbox("Chart type", ["Line", "Scatter", "Histogram"], index=0)
+WHOLE = "Histogram (whole recording)"
+chart_type = st.sidebar.selectbox("Chart type", ["Line", "Scatter", "Histogram", WHOLE], index=0)
 
-axis_options = get_axis_options(df)
+axis_options = get_axis_options(get_rows(0, min(total, 50)))
 if not axis_options:
     st.error("No numeric columns available to plot.")
     st.stop()
@@ -103,74 +154,122 @@ if not axes:
 if "start_idx" not in st.session_state:
     st.session_state.start_idx = 0
 if "window_n" not in st.session_state:
-    st.session_state.window_n = min(200, len(df))
+    st.session_state.window_n = min(200, total)
 
 st.sidebar.subheader("Samples to display")
-win_n = st.sidebar.number_input("Number of samples (N)", min_value=10, max_value=int(len(df)),
-                                value=min(200, int(len(df))), step=10)
+win_n = st.sidebar.number_input("Number of samples (N)", min_value=min(10, total), max_value=int(total),
+                                value=min(200, int(total)), step=10)
 st.session_state.window_n = int(win_n)
 
 c1, c2 = st.sidebar.columns(2)
 if c1.button("Previous"):
     st.session_state.start_idx = max(0, st.session_state.start_idx - st.session_state.window_n)
 if c2.button("Next"):
-    st.session_state.start_idx = min(max(0, len(df) - st.session_state.window_n),
+    st.session_state.start_idx = min(max(0, total - st.session_state.window_n),
                                      st.session_state.start_idx + st.session_state.window_n)
 
-start = clamp(st.session_state.start_idx, 0, max(0, len(df)-1))
-end   = clamp(start + st.session_state.window_n, 1, len(df))
-window_df = df.iloc[start:end].copy()
+# optional auto refresh in watch mode: re-runs only the live view fragment below
+auto_refresh = data_mode == "Watch folder for latest CSV" and st.sidebar.checkbox("Auto refresh every 10s", value=True)
+if auto_refresh:
+    st.sidebar.caption("Auto-refresh enabled")
+
+# --- cached window data ---
+# Keyed on the (path, mtime, size) of the chunks behind the window, so reruns
+# and auto-refreshes reuse the melted frame and summary until those files change.
+@st.cache_data(max_entries=64, show_spinner=False)
+def window_view(_get_rows, version, start: int, end: int, axes: tuple):
+    window_df = _get_rows(start, end)
+    # long form for altair
+    long_df = window_df[list(axes)].reset_index(drop=True)
+    long_df.insert(0, "sample_idx", np.arange(start, start + len(long_df)))
+    return long_df.melt(id_vars=["sample_idx"], value_vars=list(axes), var_name="axis", value_name="value")
 
 # --- layout ---
 st.title("Gyroscope Dashboard — Streamlit")
-st.caption("Watch a folder for newest CSV and page through N-sample windows.")
-cols = st.columns(3)
-cols[0].metric("Total rows", len(df))
-cols[1].metric("Window size (N)", st.session_state.window_n)
-cols[2].metric("Window range", f"{start}–{end-1}")
+st.caption("Watch a folder of CSV chunks and page through N-sample windows across all of them.")
 
 if current_file_info:
     st.markdown(f"**Data source:** {current_file_info}")
 
-# long form for altair
-long_df = window_df.reset_index(drop=True).reset_index().rename(columns={"index": "sample_idx"})
-long_df = long_df.melt(id_vars=["sample_idx"], value_vars=axes, var_name="axis", value_name="value")
-
-if chart_type == "Line":
-    chart = alt.Chart(long_df).mark_line().encode(
-        x=alt.X("sample_idx:Q", title="Sample"),
-        y=alt.Y("value:Q", title="Reading"),
-        color="axis:N",
-        tooltip=["axis:N", "sample_idx:Q", "value:Q"]
-    ).properties(height=350)
-    st.altair_chart(chart, use_container_width=True)
-
-elif chart_type == "Scatter":
-    chart = alt.Chart(long_df).mark_circle(size=30).encode(
-        x=alt.X("sample_idx:Q", title="Sample"),
-        y=alt.Y("value:Q", title="Reading"),
-        color="axis:N",
-        tooltip=["axis:N", "sample_idx:Q", "value:Q"]
-    ).properties(height=350)
-    st.altair_chart(chart, use_container_width=True)
-
-else:  # Histogram
-    chart = alt.Chart(long_df).mark_bar(opacity=0.7).encode(
-        x=alt.X("value:Q", bin=alt.Bin(maxbins=40), title="Reading bins"),
-        y=alt.Y("count():Q", title="Count"),
-        color="axis:N",
-        tooltip=["axis:N", "count():Q"]
-    ).properties(height=350)
-    st.altair_chart(chart, use_container_width=True)
-
-st.subheader("Summary for displayed window")
-summary = window_df[axes].agg(["count", "mean", "std", "min", "max"]).T.reset_index().rename(columns={"index": "axis"})
-summary["mean"] = summary["mean"].round(4)
-summary["std"] = summary["std"].round(4)
-st.dataframe(summary, hide_index=True)
-
-# optional auto refresh in watch mode
-if data_mode == "Watch folder for latest CSV" and st.sidebar.checkbox("Auto refresh every 10s", value=True):
-    st.sidebar.caption("Auto-refresh enabled")
-    time.sleep(10)
-    st.rerun()
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
+@fragment(run_every=10 if auto_refresh else None)
+def live_view():
+    total_now = total
+    if dataset is not None:
+        # The ChunkSet is shared by every session, so another rerun may already
+        # have consumed refresh()'s "appended": compare with what this session
+        # last drew instead.
+        dataset.refresh()
+        total_now = len(dataset)
+        n = st.session_state.window_n
+        seen = st.session_state.get("seen_total", total_now)
+        if total_now != seen and st.session_state.start_idx >= max(0, seen - n):
+            st.session_state.start_idx = max(0, total_now - n)  # was at the end: follow the newest window
+        st.session_state.seen_total = total_now
+
+    start = clamp(st.session_state.start_idx, 0, max(0, total_now-1))
+    end   = clamp(start + st.session_state.window_n, 1, total_now)
+    long_df = window_view(get_rows, data_version(start, end), start, end, tuple(axes))
+    whole = chart_type == WHOLE
+    lo, hi = (0, total_now) if whole else (start, end)
+    summary = pd.DataFrame(synced_summary(stats_key, axis_options, total_now, get_rows,
+                                          dataset.generation if dataset is not None else None, lo, hi, axes))
+    summary["mean"] = summary["mean"].round(4)
+    summary["std"] = summary["std"].round(4)
+
+    cols = st.columns(3)
+    cols[0].metric("Total rows", total_now)
+    cols[1].metric("Window size (N)", st.session_state.window_n)
+    cols[2].metric("Window range", f"{start}–{end-1}")
+
+    if chart_type == "Line":
+        chart = alt.Chart(long_df).mark_line().encode(
+            x=alt.X("sample_idx:Q", title="Sample"),
+            y=alt.Y("value:Q", title="Reading"),
+            color="axis:N",
+            tooltip=["axis:N", "sample_idx:Q", "value:Q"]
+        ).properties(height=350)
+        st.altair_chart(chart, use_container_width=True)
+
+    elif chart_type == "Scatter":
+        chart = alt.Chart(long_df).mark_circle(size=30).encode(
+            x=alt.X("sample_idx:Q", title="Sample"),
+            y=alt.Y("value:Q", title="Reading"),
+            color="axis:N",
+            tooltip=["axis:N", "sample_idx:Q", "value:Q"]
+        ).properties(height=350)
+        st.altair_chart(chart, use_container_width=True)
+
+    elif whole:
+        entry = hist_index(stats_key, tuple(axis_options))
+        parts = []
+        with entry["lock"]:
+            hx = entry["hist"]
+            sync_hists(hx)
+            for a in axes:
+                counts, edges = hx.bins(a, 40)
+                parts.append(pd.DataFrame({"axis": a, "bin_start": edges[:-1], "bin_end": edges[1:], "count": counts}))
+        bins_df = pd.concat(parts, ignore_index=True)
+        chart = alt.Chart(bins_df).mark_bar(opacity=0.7).encode(
+            x=alt.X("bin_start:Q", title="Reading bins"),
+            x2="bin_end:Q",
+            y=alt.Y("count:Q", title="Count", stack=None),
+            color="axis:N",
+            tooltip=["axis:N", "bin_start:Q", "bin_end:Q", "count:Q"]
+        ).properties(height=350)
+        st.altair_chart(chart, use_container_width=True)
+
+    else:  # Histogram
+        chart = alt.Chart(long_df).mark_bar(opacity=0.7).encode(
+            x=alt.X("value:Q", bin=alt.Bin(maxbins=40), title="Reading bins"),
+            y=alt.Y("count():Q", title="Count"),
+            color="axis:N",
+            tooltip=["axis:N", "count():Q"]
+        ).properties(height=350)
+        st.altair_chart(chart, use_container_width=True)
+
+    st.subheader("Summary for the whole recording" if whole else "Summary for displayed window")
+    st.dataframe(summary, hide_index=True)
+
+live_view()
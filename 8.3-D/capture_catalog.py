@@ -0,0 +1,239 @@
+# capture_catalog.py
+"""
+In-memory catalog of the 8.3-D capture artifacts, persisted as a JSON-lines manifest.
+
+Why:
+Every save regex-scanned all CSVs in "data 2" to find the next sequence
+number, and the Dash image poll globbed and stat'ed every JPG every 3 s.
+Both grew with the number of captures. The catalog keeps one record per
+capture (seq -> csv/png/html/jpg names, time range, sample count, label):
+  - add() is O(1): one dict update plus one appended manifest line
+    (and one appended annotations.csv row);
+  - next_seq() and latest_image() are O(1) reads;
+  - load() replays the manifest, then reconciles it with a single directory
+    listing (names only) so files added or deleted by hand are picked up;
+    only captures missing from the manifest have their CSV read.
+Labels typed into annotations.csv are merged back in on load.
+
+API:
+    cat = CaptureCatalog(DATA_DIR)           # loads + reconciles
+    seq = cat.next_seq()
+    cat.add(seq, stem, {"csv": ..., "png": ...}, rows)   # rows: [(iso_ts, x, y, z), ...]
+    cat.add_file(seq, "jpg", path)           # once the (asynchronous) JPG is on disk
+    cat.latest_image()                       # -> (filename, version) or None
+"""
+from __future__ import annotations
+
+import csv
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# [OUTPUT_PREFIX]001_YYYYMMDDHHMMSS.csv|png|html|jpg
+ARTIFACT_RE = re.compile(r"^.*?(?P<stem>(?P<seq>\d{3,})_\d{14})\.(?P<kind>csv|png|html|jpg)$")
+
+
+@dataclass
+class Capture:
+    seq: int
+    stem: str
+    files: Dict[str, str] = field(default_factory=dict)   # kind -> file name
+    t_first: Optional[str] = None                         # ISO timestamp of the first row
+    t_last: Optional[str] = None
+    samples: int = 0
+    label: str = ""
+    saved: float = 0.0                                    # time.time() when recorded
+
+
+class CaptureCatalog:
+    def __init__(self, folder, manifest: str = "catalog.jsonl", annotations: str = "annotations.csv"):
+        self.folder = Path(folder)
+        self.manifest_path = self.folder / manifest
+        self.annot_path = self.folder / annotations
+        self._lock = threading.Lock()
+        self._by_seq: Dict[int, Capture] = {}
+        self._max_seq = 0
+        self._latest_jpg: Optional[Capture] = None
+        self.load()
+
+    # ---------- startup ----------
+    def load(self):
+        """Replay the manifest, reconcile with the folder listing, merge labels."""
+        with self._lock:
+            self._by_seq.clear()
+            lines = 0
+            if self.manifest_path.exists():
+                with self.manifest_path.open(encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            rec = Capture(**json.loads(line))
+                        except (ValueError, TypeError):
+                            continue  # a torn last line from a crash
+                        self._by_seq[rec.seq] = rec   # later lines supersede earlier ones
+                        lines += 1
+
+            on_disk: Dict[int, Capture] = {}
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    m = ARTIFACT_RE.match(entry.name)
+                    if not m:
+                        continue
+                    seq = int(m.group("seq"))
+                    cap = on_disk.setdefault(seq, Capture(seq, m.group("stem")))
+                    cap.files[m.group("kind")] = entry.name
+
+            changed = False
+            for seq in list(self._by_seq):
+                if seq not in on_disk:
+                    del self._by_seq[seq]
+                    changed = True
+            for seq, found in on_disk.items():
+                rec = self._by_seq.get(seq)
+                if rec is None:
+                    self._by_seq[seq] = rec = found
+                    self._read_csv_meta(rec)
+                    rec.saved = self._mtime(rec)
+                    changed = True
+                elif rec.files != found.files:
+                    rec.files = found.files
+                    changed = True
+
+            for stem, label in self._read_labels().items():
+                rec = self._find_stem(stem)
+                if rec is not None and label and rec.label != label:
+                    rec.label = label
+                    changed = True
+
+            self._reindex()
+            if changed or lines != len(self._by_seq):
+                self._rewrite_manifest()
+
+    def _mtime(self, rec: Capture) -> float:
+        name = rec.files.get("jpg") or rec.files.get("csv") or next(iter(rec.files.values()), None)
+        try:
+            return (self.folder / name).stat().st_mtime if name else 0.0
+        except OSError:
+            return 0.0
+
+    def _read_csv_meta(self, rec: Capture):
+        name = rec.files.get("csv")
+        if not name:
+            return
+        try:
+            with (self.folder / name).open(newline="", encoding="utf-8") as f:
+                rows = list(csv.reader(f))[1:]
+        except OSError:
+            return
+        rows = [r for r in rows if r]
+        rec.samples = len(rows)
+        if rows:
+            rec.t_first, rec.t_last = rows[0][0], rows[-1][0]
+
+    def _read_labels(self) -> Dict[str, str]:
+        if not self.annot_path.exists():
+            return {}
+        with self.annot_path.open(newline="", encoding="utf-8") as f:
+            return {r["filename"]: (r.get("label") or "") for r in csv.DictReader(f) if r.get("filename")}
+
+    def _find_stem(self, stem: str) -> Optional[Capture]:
+        m = re.match(r"(\d{3,})_\d{14}$", stem)
+        rec = self._by_seq.get(int(m.group(1))) if m else None
+        return rec if rec is not None and rec.stem == stem else None
+
+    def _reindex(self):
+        self._max_seq = max(self._by_seq, default=0)
+        jpgs = [c for c in self._by_seq.values() if "jpg" in c.files]
+        self._latest_jpg = max(jpgs, key=lambda c: (c.saved, c.seq), default=None)
+
+    def _rewrite_manifest(self):
+        # compacted copy, swapped in atomically
+        tmp = self.manifest_path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for seq in sorted(self._by_seq):
+                f.write(json.dumps(asdict(self._by_seq[seq])) + "\n")
+        os.replace(tmp, self.manifest_path)
+
+    # ---------- per save ----------
+    def next_seq(self) -> int:
+        with self._lock:
+            return self._max_seq + 1
+
+    def reserve_seq(self) -> int:
+        """Claim the next sequence number (safe when two saves race)."""
+        with self._lock:
+            self._max_seq += 1
+            return self._max_seq
+
+    def add(self, seq: int, stem: str, files: Dict[str, Path], rows: List[tuple], label: str = "") -> Capture:
+        """Record one saved window: O(1) update + one manifest line + one annotations row."""
+        rec = Capture(
+            seq=seq,
+            stem=stem,
+            files={k: Path(p).name for k, p in files.items() if p is not None},
+            t_first=rows[0][0] if rows else None,
+            t_last=rows[-1][0] if rows else None,
+            samples=len(rows),
+            label=label,
+            saved=time.time(),
+        )
+        with self._lock:
+            self._by_seq[seq] = rec
+            self._max_seq = max(self._max_seq, seq)
+            if "jpg" in rec.files:
+                self._latest_jpg = rec
+            with self.manifest_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(rec)) + "\n")
+            write_header = not self.annot_path.exists()
+            with self.annot_path.open("a", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                if write_header:
+                    w.writerow(["filename", "label"])
+                w.writerow([stem, label])
+        return rec
+
+    def add_file(self, seq: int, kind: str, path) -> Optional[Capture]:
+        """
+        Attach a file written after add() (the JpegWriter's JPG): call it only
+        once the file exists, so latest_image() never names a missing file.
+        """
+        with self._lock:
+            rec = self._by_seq.get(seq)
+            if rec is None:
+                return None
+            rec.files[kind] = Path(path).name
+            if kind == "jpg":
+                cur = self._latest_jpg
+                if cur is None or (rec.saved, rec.seq) >= (cur.saved, cur.seq):
+                    self._latest_jpg = rec
+            with self.manifest_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(rec)) + "\n")   # supersedes the add() line on load
+        return rec
+
+    # ---------- reads ----------
+    def latest_image(self):
+        """(jpg file name, version for cache-busting) of the newest capture with an image."""
+        with self._lock:
+            rec = self._latest_jpg
+            return (rec.files["jpg"], int(rec.saved)) if rec is not None else None
+
+    def get(self, seq: int) -> Optional[Capture]:
+        with self._lock:
+            return self._by_seq.get(seq)
+
+    def __len__(self):
+        return len(self._by_seq)
+
+    def describe(self) -> str:
+        with self._lock:
+            n = len(self._by_seq)
+            samples = sum(c.samples for c in self._by_seq.values())
+            labelled = sum(1 for c in self._by_seq.values() if c.label)
+        return f"{n} captures | {samples} samples | {labelled} labelled | next seq {self._max_seq + 1:03d}"
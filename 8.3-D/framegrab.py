@@ -0,0 +1,243 @@
+# framegrab.py
+"""
+Background webcam grabber with a timestamped ring buffer (SIT225 8.3D helper).
+
+Why:
+The recorder used to open the camera lazily and read one frame inside the save,
+holding cam_lock, so the JPG showed the moment of the save (not the 10 s
+window) and every save waited on camera I/O. Here a daemon thread reads frames
+at a fixed rate into a ring buffer of (time.time(), frame). A save looks up the
+frame nearest the window midpoint, or a strip of frames spread across the
+window, and hands JPEG encoding to a worker thread, so the save path never
+touches the camera. Frames more than max_skew_s from the requested time are
+never returned, so after a camera stall (or right after start-up) a save gets
+no image rather than a stale one.
+
+Sources:
+    CameraSource(index=0)      OpenCV webcam, reopened after failures
+    SyntheticSource()          generated frames (moving bar + clock), no camera/OpenCV needed
+
+API:
+    grabber = FrameGrabber(CameraSource(), fps=5, seconds=30).start()
+    writer = JpegWriter()
+    frame = grabber.nearest(t_mid)                 # -> (ts, frame) or None (nothing within max_skew_s)
+    frames = grabber.spread(t0, t1, k=5)           # -> [(ts, frame), ...] from [t0 - skew, t1 + skew]
+    fut = writer.submit(frames_or_frame, path)     # Future -> path
+    grabber.stop(); writer.close()
+"""
+from __future__ import annotations
+
+import bisect
+import io
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import cv2
+    OPENCV_OK = True
+except Exception:
+    OPENCV_OK = False
+
+
+# ---------- sources ----------
+class CameraSource:
+    """Default webcam via OpenCV; read() returns a BGR frame or None."""
+    def __init__(self, index: int = 0, retry_s: float = 5.0):
+        self.index = index
+        self.retry_s = retry_s
+        self._cam = None
+        self._next_try = 0.0
+
+    def _open(self) -> bool:
+        if self._cam is not None:
+            return True
+        if not OPENCV_OK or time.monotonic() < self._next_try:
+            return False
+        try:
+            # CAP_DSHOW helps Windows start faster; fallback if missing
+            cam = cv2.VideoCapture(self.index, cv2.CAP_DSHOW) if hasattr(cv2, "CAP_DSHOW") else cv2.VideoCapture(self.index)
+            if cam.isOpened():
+                self._cam = cam
+                return True
+            cam.release()
+        except Exception:
+            pass
+        self._next_try = time.monotonic() + self.retry_s
+        return False
+
+    def read(self):
+        if not self._open():
+            return None
+        ok, frame = self._cam.read()
+        if not ok or frame is None:
+            self.close()  # reopen on a later read
+            self._next_try = time.monotonic() + self.retry_s
+            return None
+        return frame
+
+    def close(self):
+        if self._cam is not None:
+            self._cam.release()
+            self._cam = None
+
+
+class SyntheticSource:
+    """Frames with a bar that sweeps once per `period_s`, for tests without a camera."""
+    def __init__(self, width: int = 320, height: int = 240, period_s: float = 10.0):
+        self.width, self.height, self.period_s = width, height, period_s
+        self.frames = 0
+
+    def read(self):
+        t = time.time()
+        frame = np.full((self.height, self.width, 3), 40, dtype=np.uint8)
+        x = int((t % self.period_s) / self.period_s * (self.width - 8))
+        frame[:, x:x + 8] = (0, 200, 255)
+        frame[:8, :int((t % 1.0) * self.width)] = 255   # sub-second progress bar
+        self.frames += 1
+        return frame
+
+    def close(self):
+        pass
+
+
+# ---------- grabber ----------
+class FrameGrabber:
+    def __init__(self, source, fps: float = 5.0, seconds: float = 30.0, max_skew_s: Optional[float] = 1.0):
+        self.source = source
+        self.period = 1.0 / fps
+        self.max_skew_s = max_skew_s    # None: any buffered frame will do
+        self._ring: deque = deque(maxlen=max(2, int(fps * seconds)))   # (ts, frame), ts ascending
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.grabbed = 0
+        self.failed = 0
+
+    def start(self) -> "FrameGrabber":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        next_t = time.monotonic()
+        while not self._stop.is_set():
+            frame = self.source.read()
+            ts = time.time()
+            if frame is None:
+                self.failed += 1
+            else:
+                with self._lock:
+                    self._ring.append((ts, frame))
+                self.grabbed += 1
+            next_t += self.period
+            delay = next_t - time.monotonic()
+            if delay < 0:  # fell behind (slow camera): don't try to catch up
+                next_t, delay = time.monotonic(), 0
+            self._stop.wait(delay)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.source.close()
+
+    def _snapshot(self) -> Tuple[List[float], list]:
+        with self._lock:
+            items = list(self._ring)
+        return [ts for ts, _ in items], items
+
+    def _in_range(self, lo: float, hi: float):
+        """Snapshot trimmed to frames with lo - max_skew_s <= ts <= hi + max_skew_s."""
+        times, items = self._snapshot()
+        if self.max_skew_s is not None:
+            a = bisect.bisect_left(times, lo - self.max_skew_s)
+            b = bisect.bisect_right(times, hi + self.max_skew_s)
+            times, items = times[a:b], items[a:b]
+        return times, items
+
+    def nearest(self, t: float) -> Optional[Tuple[float, np.ndarray]]:
+        """Frame whose timestamp is closest to `t` (epoch seconds), None if none is within max_skew_s."""
+        times, items = self._in_range(t, t)
+        if not items:
+            return None
+        i = bisect.bisect_left(times, t)
+        cands = [j for j in (i - 1, i) if 0 <= j < len(items)]
+        return items[min(cands, key=lambda j: abs(times[j] - t))]
+
+    def spread(self, t0: float, t1: float, k: int = 5) -> List[Tuple[float, np.ndarray]]:
+        """Up to k distinct frames nearest to evenly spaced times across [t0, t1] (within max_skew_s of it)."""
+        times, items = self._in_range(t0, t1)
+        if not items:
+            return []
+        out, used = [], set()
+        for t in np.linspace(t0, t1, k) if k > 1 else [(t0 + t1) / 2]:
+            i = bisect.bisect_left(times, t)
+            cands = [j for j in (i - 1, i) if 0 <= j < len(items)]
+            j = min(cands, key=lambda j: abs(times[j] - t))
+            if j not in used:
+                used.add(j)
+                out.append(items[j])
+        return out
+
+    def info(self) -> str:
+        with self._lock:
+            n = len(self._ring)
+            span = self._ring[-1][0] - self._ring[0][0] if n > 1 else 0.0
+        return f"frames={n} ({span:.1f}s) grabbed={self.grabbed} failed={self.failed}"
+
+
+# ---------- encoding ----------
+def make_strip(frames: List[np.ndarray], height: int = 240) -> np.ndarray:
+    """Side-by-side strip, each frame downscaled (integer step) to about `height` rows."""
+    parts = []
+    for f in frames:
+        step = max(1, f.shape[0] // height)
+        parts.append(f[::step, ::step])
+    h = min(p.shape[0] for p in parts)
+    return np.hstack([p[:h] for p in parts])
+
+
+def encode_jpeg(frame: np.ndarray, quality: int = 90) -> bytes:
+    """BGR frame -> JPEG bytes via OpenCV, or Pillow when OpenCV is missing."""
+    if OPENCV_OK:
+        ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        if not ok:
+            raise RuntimeError("cv2.imencode failed")
+        return buf.tobytes()
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise RuntimeError("JPEG encoding needs opencv-python or Pillow") from e
+    out = io.BytesIO()
+    Image.fromarray(np.ascontiguousarray(frame[..., ::-1])).save(out, format="JPEG", quality=quality)
+    return out.getvalue()
+
+
+class JpegWriter:
+    """Encode + write JPGs off the caller's thread."""
+    def __init__(self, workers: int = 1, quality: int = 90):
+        self.quality = quality
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jpeg")
+
+    def _write(self, frames, path: Path) -> Path:
+        img = make_strip(frames) if isinstance(frames, list) else frames
+        data = encode_jpeg(img, self.quality)
+        tmp = path.with_suffix(".jpg.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)   # the dashboard never serves a half-written JPG
+        return path
+
+    def submit(self, frames, path) -> Future:
+        """`frames` is one frame or a list of frames (written as a strip)."""
+        return self._pool.submit(self._write, frames, Path(path))
+
+    def close(self):
+        self._pool.shutdown(wait=True)
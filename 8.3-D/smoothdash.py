@@ -7,31 +7,59 @@ Dash usually redraws a whole figure each update, which looks jumpy.
 This wrapper uses Graph.extendData to append small batches like movie frames,
 while keeping only a sliding window of recent points. It feels smooth.
 
+Catch-up:
+If the producer outruns max_append / poll_ms, each frame grows with the
+backlog so the chart drains it within ~catchup_ticks frames. From a backlog
+larger than the visible window only the newest window_points samples are
+sent, at full resolution (older ones would scroll off anyway). The inbox is
+bounded: past inbox_max the oldest samples are dropped and counted. The
+stats line shows the display lag.
+
+Filter:
+An optional stateful filter (streamfilt.py at the repo root, or any callable
+taking and returning an (n, channels) array) is run once per frame on just the
+drained samples, so smoothing costs nothing extra per redraw.
+
 API:
     app, state = make_smooth_app(
         channel_names=["X","Y","Z"],
         window_points=600,   # how many points to keep visible per trace
-        max_append=20,       # max points appended per frame
-        poll_ms=200          # UI polling period in ms
+        max_append=20,       # points appended per frame when keeping up
+        poll_ms=200,         # UI polling period in ms
+        inbox_max=None,      # hard inbox bound (default 20 * window_points)
+        catchup_ticks=5,     # frames to drain a backlog in
+        stream_filter=None,  # e.g. streamfilt.make_filter("median:5+ema:0.2")
     )
     state["push"](timestamp_str, *values)  # thread-safe producer call
 """
 from __future__ import annotations
 
+import math
+import time
 from collections import deque
 from dataclasses import dataclass
 from threading import Lock
-from typing import List
+from typing import Callable, List, Optional
 
 from dash import Dash, dcc, html, Output, Input, no_update
+import numpy as np
 import plotly.graph_objects as go
 
 
 @dataclass
 class _Shared:
-    inbox: deque         # of tuples: (t, v1, v2, ...)
+    inbox: deque         # of tuples: (arrival_monotonic, t, v1, v2, ...)
     lock: Lock
     n_channels: int
+    dropped: int = 0     # samples evicted because the inbox was full
+    lag_s: float = 0.0   # age of the newest sample drawn in the last frame
+
+
+def _frame_size(backlog: int, max_append: int, catchup_ticks: int) -> int:
+    """How many samples to drain this frame for a given backlog."""
+    if backlog <= max_append:
+        return backlog
+    return min(backlog, max(max_append, math.ceil(backlog / catchup_ticks)))
 
 
 def make_smooth_app(
@@ -39,13 +67,18 @@ def make_smooth_app(
     window_points: int = 600,
     max_append: int = 20,
     poll_ms: int = 200,
+    inbox_max: Optional[int] = None,
+    catchup_ticks: int = 5,
+    stream_filter: Optional[Callable[[np.ndarray], np.ndarray]] = None,
 ):
     """
     Build a Dash app wired for smooth streaming via extendData.
     Returns (app, state) where state["push"](t, *values) appends to the inbox.
     """
     n = len(channel_names)
-    shared = _Shared(deque(), Lock(), n)
+    if inbox_max is None:
+        inbox_max = 20 * window_points
+    shared = _Shared(deque(maxlen=inbox_max), Lock(), n)
 
     # Empty figure scaffold
     fig = go.Figure()
@@ -79,39 +112,63 @@ def make_smooth_app(
         prevent_initial_call=False,
     )
     def _on_tick(_n):
-        # Pop up to max_append samples to draw a small frame
+        # Frame size follows the backlog so the chart catches up with real time
         with shared.lock:
-            if not shared.inbox:
-                return no_update, "Waiting… inbox=0"
-            batch = []
-            for _ in range(min(len(shared.inbox), max_append)):
-                batch.append(shared.inbox.popleft())
-
-        # batch is [(t, v1, v2, ...)]
-        ts = [row[0] for row in batch]
-        per_ch = [[] for _ in range(shared.n_channels)]
-        for _, *vals in batch:
-            for i, v in enumerate(vals):
-                per_ch[i].append(v)
+            backlog = len(shared.inbox)
+            if not backlog:
+                return no_update, f"Waiting… inbox=0 | lag={shared.lag_s * 1000:.0f} ms | dropped={shared.dropped}"
+            k = _frame_size(backlog, max_append, catchup_ticks)
+            if backlog > window_points:
+                k = backlog  # everything but the last window scrolls off anyway
+            batch = [shared.inbox.popleft() for _ in range(k)]
+            left = len(shared.inbox)
+            if stream_filter is not None:  # under the lock, so the filter state sees frames in inbox order
+                filtered = stream_filter(np.array([row[2:] for row in batch], dtype=np.float64))
+
+        # batch is [(arrival, t, v1, v2, ...)]
+        shared.lag_s = time.monotonic() - batch[-1][0]
+        ts = [row[1] for row in batch]
+        if stream_filter is not None:
+            per_ch = filtered.T.tolist()
+        else:
+            per_ch = [[] for _ in range(shared.n_channels)]
+            for _, _, *vals in batch:
+                for i, v in enumerate(vals):
+                    per_ch[i].append(v)
 
         # extendData expects:
-        #   ({'x': [ts]*n, 'y': [y0_list, y1_list, ...]}, [trace_indices], max_points)
+        #   ({'x': [x0_list, x1_list, ...], 'y': [y0_list, y1_list, ...]}, [trace_indices], max_points)
+        # With max_points = window_points anything older than the newest window
+        # is trimmed on arrival, so it is not sent at all (the filter above has
+        # still seen it).
+        drawn = f"Appended {min(len(ts), window_points)}"
+        if len(ts) > window_points:
+            drawn += f" (skipped {len(ts) - window_points} older)"
+            ts = ts[-window_points:]
+            per_ch = [vals[-window_points:] for vals in per_ch]
         extend = {"x": [ts] * shared.n_channels, "y": per_ch}
         trace_idx = list(range(shared.n_channels))
-        return (extend, trace_idx, window_points), f"Appended {len(ts)} | inbox={len(shared.inbox)}"
+        stats = f"{drawn} | inbox={left} | lag={shared.lag_s * 1000:.0f} ms | dropped={shared.dropped}"
+        if stream_filter is not None:
+            stats += f" | filter={stream_filter!r}"
+        return (extend, trace_idx, window_points), stats
 
     # thread-safe method to push one sample
     def _push(t, *values):
         if len(values) != n:
             raise ValueError(f"Expected {n} values, got {len(values)}")
         with shared.lock:
-            shared.inbox.append((t, *values))
+            if len(shared.inbox) == inbox_max:
+                shared.dropped += 1  # deque(maxlen) evicts the oldest sample
+            shared.inbox.append((time.monotonic(), t, *values))
 
     state = {
         "push": _push,
         "window_points": window_points,
         "max_append": max_append,
         "poll_ms": poll_ms,
+        "inbox_max": inbox_max,
         "channels": channel_names,
+        "filter": stream_filter,
     }
     return app, state
@@ -1,12 +1,20 @@
 import csv
+import sys
+from pathlib import Path
+
 import firebase_admin
-from firebase_admin import credentials, db
+from firebase_admin import credentials
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # shared helpers at the repo root
+from timequery import FirebaseSource, read
 
 # === Update these ===
 CRED_FILE = "MANIT.json"  # put your downloaded service account JSON filename here
 DB_URL = "https://manitfire-default-rtdb.asia-southeast1.firebasedatabase.app/"
 DB_PATH = "Manit/Gyroscope"  # change if your path is different
 CSV_NAME = "gyroscope_data.csv"
+START = None  # optional time range, e.g. "2025-08-20 10:00" (None = everything)
+END = None
 
 
 def setup_firebase():
@@ -18,10 +26,11 @@ def setup_firebase():
         firebase_admin.initialize_app(cred, {"databaseURL": DB_URL})
 
 
-def get_snapshot():
-    """Read data from the database path."""
-    ref = db.reference(DB_PATH)
-    return ref.get()  # returns dict or None
+def get_rows():
+    """Rows in [START, END) from the database path; the range is queried on the server."""
+    df = read(FirebaseSource(DB_PATH), start=START, end=END, columns=["timestamp", "x", "y", "z"])
+    df = df.drop(columns="time").dropna(subset=["timestamp", "x", "y", "z"])  # skip malformed entries
+    return df.to_dict("records")
 
 
 def save_csv(rows):
@@ -36,29 +45,8 @@ def save_csv(rows):
 def main():
     setup_firebase()
 
-    data = get_snapshot()
-
-    # If nothing in DB, still create the CSV with just the header
-    if not data:
-        with open(CSV_NAME, "w", newline="") as f:
-            w = csv.writer(f)
-            w.writerow(["timestamp", "x", "y", "z"])
-        print("Data written to gyroscope_data.csv")
-        return
-
-    # Build clean rows; skip any malformed entries
-    out_rows = []
-    for item in data.values():
-        try:
-            ts = item["timestamp"]
-            x = item["data"]["x"]
-            y = item["data"]["y"]
-            z = item["data"]["z"]
-        except (TypeError, KeyError):
-            continue
-        out_rows.append({"timestamp": ts, "x": x, "y": y, "z": z})
-
-    save_csv(out_rows)
+    # With no data the CSV still gets its header
+    save_csv(get_rows())
     print("Data written to gyroscope_data.csv")
 
 
@@ -1,10 +1,24 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
-from dash import Dash, dcc, html, Input, Output
-import plotly.express as px
+from dash import Dash, dcc, html, Input, Output, State, ctx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # shared helpers at the repo root
+from winstats import WindowStats
+from pager import PageEngine
 
 # Load data
 df = pd.read_csv("gyro_data_20250812_153117.csv")
 
+# Summary index built once: any window's count/mean/std/min/max in O(1)
+AXES = ['gyro_x', 'gyro_y', 'gyro_z']
+stats = WindowStats(AXES)
+stats.extend(df)
+
+# Rendered pages are cached and neighbours prefetched (see pager.py)
+pages = PageEngine(df, stats)
+
 # Create app
 app = Dash(__name__)
 
@@ -51,9 +65,12 @@ app.layout = html.Div([
             step=10
         ),
         html.Button("Previous", id='prev-btn', n_clicks=0),
-        html.Button("Next", id='next-btn', n_clicks=0)
+        html.Button("Next", id='next-btn', n_clicks=0),
+        html.Span(id='page-info', style={'margin-left': '10px'})
     ], style={'margin-top': '10px'}),
 
+    dcc.Store(id='page', data=0),
+
     dcc.Graph(id='gyro-graph'),
 
     html.Div(id='data-summary', style={'margin-top': '20px'})
@@ -61,37 +78,38 @@ app.layout = html.Div([
 
 @app.callback(
     [Output('gyro-graph', 'figure'),
-     Output('data-summary', 'children')],
+     Output('data-summary', 'children'),
+     Output('page', 'data'),
+     Output('page-info', 'children')],
     [Input('graph-type', 'value'),
      Input('axis-select', 'value'),
      Input('sample-count', 'value'),
      Input('prev-btn', 'n_clicks'),
-     Input('next-btn', 'n_clicks')]
+     Input('next-btn', 'n_clicks')],
+    [State('page', 'data')]
 )
-def update_graph(graph_type, selected_axes, sample_count, prev_clicks, next_clicks):
-    page = next_clicks - prev_clicks
-    start = page * sample_count
-    end = start + sample_count
-    dff = df.iloc[start:end]
-
-    if graph_type == 'line':
-        fig = px.line(dff, y=selected_axes, title="Gyroscope Line Chart")
-    elif graph_type == 'scatter':
-        fig = px.scatter(dff, y=selected_axes, title="Gyroscope Scatter Plot")
-    elif graph_type == 'histogram':
-        fig = px.histogram(dff, x=selected_axes[0], title="Gyroscope Histogram")
-
-    summary_table = dff[selected_axes].describe().reset_index()
+def update_graph(graph_type, selected_axes, sample_count, prev_clicks, next_clicks, page):
+    sample_count = max(10, int(sample_count or 200))
+    page = page or 0
+    if ctx.triggered_id == 'prev-btn':
+        page -= 1
+    elif ctx.triggered_id == 'next-btn':
+        page += 1
+    page = pages.clamp(page, sample_count)
+
+    fig, summary = pages.get(page, sample_count, selected_axes or [], graph_type)
+
     summary_html = html.Table([
-        html.Thead(html.Tr([html.Th(col) for col in summary_table.columns])),
+        html.Thead(html.Tr([html.Th("stat")] + [html.Th(r["axis"]) for r in summary])),
         html.Tbody([
-            html.Tr([
-                html.Td(summary_table.iloc[i][col]) for col in summary_table.columns
-            ]) for i in range(len(summary_table))
+            html.Tr([html.Td(stat)] + [
+                html.Td(round(r[stat], 4)) for r in summary
+            ]) for stat in ["count", "mean", "std", "min", "max"]
         ])
     ])
 
-    return fig, html.Div([html.H4("Data Summary"), summary_html])
+    info = f"Page {page + 1} / {pages.page_count(sample_count)} | {pages.info()}"
+    return fig, html.Div([html.H4("Data Summary"), summary_html]), page, info
 
 if __name__ == '__main__':
 
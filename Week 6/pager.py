@@ -0,0 +1,108 @@
+# pager.py
+"""
+Server-side paging for gyro_plotter.py.
+
+Why:
+Every Previous/Next click used to slice the DataFrame, build a Plotly Express
+figure and a describe() table from scratch, and the page number was never
+bounds-checked. PageEngine clamps pages to the data, keeps an LRU of rendered
+pages (figure dict + summary rows) keyed by (page, size, axes, chart type), and
+renders the neighbouring pages on a background thread so the next click is a
+cache hit.
+
+API:
+    pages = PageEngine(df, stats)                 # stats: winstats.WindowStats over df
+    page = pages.clamp(page, size)
+    fig, summary = pages.get(page, size, axes, chart)   # also prefetches page-1 / page+1
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import plotly.express as px
+import plotly.graph_objects as go
+
+
+class PageEngine:
+    def __init__(self, df, stats, cache_pages: int = 128, workers: int = 2):
+        self.df = df
+        self.stats = stats
+        self.cache_pages = cache_pages
+        self._cache = OrderedDict()   # key -> (fig_dict, summary)
+        self._pending = {}            # key -> Future of a render in progress
+        self._lock = Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="page")
+
+    def page_count(self, size: int) -> int:
+        return max(1, -(-len(self.df) // size))
+
+    def clamp(self, page: int, size: int) -> int:
+        return max(0, min(int(page), self.page_count(size) - 1))
+
+    def _render(self, page, size, axes, chart):
+        start = page * size
+        end = min(start + size, len(self.df))
+        dff = self.df.iloc[start:end]
+        axes = list(axes)
+        if not axes:
+            fig = go.Figure(layout=dict(title="Select at least one axis"))
+        elif chart == 'line':
+            fig = px.line(dff, y=axes, title="Gyroscope Line Chart")
+        elif chart == 'scatter':
+            fig = px.scatter(dff, y=axes, title="Gyroscope Scatter Plot")
+        else:
+            fig = px.histogram(dff, x=axes[0], title="Gyroscope Histogram")
+        return fig.to_dict(), self.stats.summary(start, end, axes)
+
+    def _store(self, key, value):
+        with self._lock:
+            self._pending.pop(key, None)
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_pages:
+                self._cache.popitem(last=False)
+
+    def _build(self, key):
+        try:
+            value = self._render(*key)
+        except BaseException:
+            with self._lock:   # don't leave the failed future behind: the next get() renders again
+                self._pending.pop(key, None)
+            raise
+        self._store(key, value)
+        return value
+
+    def _submit(self, key):
+        # lock must be held
+        fut = self._pending.get(key)
+        if fut is None:
+            fut = self._pool.submit(self._build, key)
+            self._pending[key] = fut
+        return fut
+
+    def prefetch(self, page, size, axes, chart):
+        with self._lock:
+            for p in (page + 1, page - 1):
+                if 0 <= p < self.page_count(size):
+                    key = (p, size, tuple(axes), chart)
+                    if key not in self._cache:
+                        self._submit(key)
+
+    def get(self, page, size, axes, chart):
+        page = self.clamp(page, size)
+        key = (page, size, tuple(axes), chart)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+            fut = None if hit is not None else self._pending.get(key)
+        if hit is None:
+            value = fut.result() if fut is not None else self._build(key)
+        else:
+            value = hit
+        self.prefetch(page, size, axes, chart)
+        return value
+
+    def info(self) -> str:
+        with self._lock:
+            return f"cached pages={len(self._cache)} | rendering={len(self._pending)}"
@@ -4,6 +4,7 @@
 # Adds: background saver to ./data 2 + "Force Save Now" button in the UI.
 
 from datetime import datetime
+import sys
 import threading
 import time
 from pathlib import Path
@@ -13,6 +14,16 @@ from arduino_iot_cloud import ArduinoCloudClient
 from iot_secrets import DEVICE_ID, SECRET_KEY
 from smoothdash import make_smooth_app
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # shared helpers at the repo root
+from cloudalign import CloudAligner
+from hotmetrics import counter, gauge, histogram, serve
+from streamfilt import make_filter
+try:
+    from thumbrender import render_window  # matplotlib Agg: ~0.1 s per PNG, no kaleido
+    THUMBS_OK = True
+except Exception:
+    THUMBS_OK = False
+
 import plotly.graph_objects as go
 from dash import html, dcc, Output, Input
 
@@ -20,15 +31,18 @@ from dash import html, dcc, Output, Input
 VAR_X = "accelerometer_x"
 VAR_Y = "accelerometer_y"
 VAR_Z = "accelerometer_z"
+ALIGN_TOLERANCE_S = 0.5  # x/y/z values further apart than this are not paired
 
 WINDOW_POINTS = 600
 MAX_APPEND    = 15
 POLL_MS       = 150
+FILTER        = "median:3+ema:0.3"  # chart only (CSV stays raw); None = raw, see streamfilt.py
 
 # Save sooner so you can see files appear quickly
 SAVE_EVERY_SEC     = 5           # was 10
 MIN_POINTS_TO_SAVE = 30          # was 120
 OUTPUT_PREFIX      = "accel"
+METRICS_PORT       = 9229        # http://127.0.0.1:9229/metrics
 
 DATA_DIR = (Path(__file__).resolve().parent / "data 2")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -40,6 +54,7 @@ app, state = make_smooth_app(
     window_points=WINDOW_POINTS,
     max_append=MAX_APPEND,
     poll_ms=POLL_MS,
+    stream_filter=make_filter(FILTER),
 )
 push = state["push"]
 
@@ -62,11 +77,6 @@ if hasattr(app, "layout") and hasattr(app.layout, "children"):
 else:
     app.layout = html.Div([*base_children, control_bar])
 
-# Collect full (x, y, z) trios from Cloud, then push(ts, x, y, z)
-latest = {"x": None, "y": None, "z": None}
-seen   = {"x": False, "y": False, "z": False}
-lock = threading.Lock()
-
 # Logging buffer for saving
 log_lock = threading.Lock()
 log_rows = []  # list of tuples: (iso_ts, x, y, z)
@@ -74,43 +84,27 @@ log_rows = []  # list of tuples: (iso_ts, x, y, z)
 def _now_stamp():
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
-def _try_emit():
-    # lock must be held
-    if seen["x"] and seen["y"] and seen["z"]:
-        x, y, z = latest["x"], latest["y"], latest["z"]
-
-        ts_hms = datetime.now().strftime("%H:%M:%S.%f")[:-3]  # pretty for UI
-        push(ts_hms, x, y, z)
-
-        ts_iso = datetime.now().isoformat(timespec="milliseconds")
-        with log_lock:
-            log_rows.append((ts_iso, x, y, z))
-
-        seen["x"] = seen["y"] = seen["z"] = False
-
-def on_x(_client, v):
-    with lock:
-        latest["x"] = float(v) if v is not None else None
-        seen["x"] = True
-        _try_emit()
+def _on_sample(t, x, y, z):
+    # called on the cloud thread for each aligned (x, y, z), stamped at its first arrival
+    when = datetime.fromtimestamp(t)
+    push(when.strftime("%H:%M:%S.%f")[:-3], x, y, z)  # pretty for UI
+    with log_lock:
+        log_rows.append((when.isoformat(timespec="milliseconds"), x, y, z))
 
-def on_y(_client, v):
-    with lock:
-        latest["y"] = float(v) if v is not None else None
-        seen["y"] = True
-        _try_emit()
+# Collect aligned (x, y, z) samples from Cloud
+aligner = CloudAligner({"x": VAR_X, "y": VAR_Y, "z": VAR_Z}, tolerance_s=ALIGN_TOLERANCE_S,
+                       on_sample=_on_sample)
 
-def on_z(_client, v):
-    with lock:
-        latest["z"] = float(v) if v is not None else None
-        seen["z"] = True
-        _try_emit()
+# Metrics (hotmetrics): aligner counters and the save buffer are read at scrape time
+APP = {"app": "task8_2c_dash_smooth"}
+aligner.register_metrics(APP)
+gauge("sit225_queue_depth", "Samples waiting in a buffer", {**APP, "queue": "save"}, fn=lambda: len(log_rows))
+SAVE_S = histogram("sit225_write_seconds", "Storage write latency", {**APP, "store": "save"})
+ROWS_OUT = counter("sit225_rows_written_total", "Rows written to storage", {**APP, "store": "save"})
 
 def start_cloud_thread():
     client = ArduinoCloudClient(device_id=DEVICE_ID, username=DEVICE_ID, password=SECRET_KEY)
-    client.register(VAR_X, value=None, on_write=on_x)
-    client.register(VAR_Y, value=None, on_write=on_y)
-    client.register(VAR_Z, value=None, on_write=on_z)
+    aligner.register(client)
 
     def run():
         print("[Cloud] Connecting… keep the phone app in FOREGROUND with accelerometer ON.")
@@ -129,6 +123,14 @@ def _save_csv(rows, base_path: Path) -> Path:
     return csv_path
 
 def _save_png_or_html(rows, base_path: Path):
+    png_path  = base_path.with_suffix(".png")
+    if THUMBS_OK:
+        try:
+            render_window(rows, png_path, title=f"Accelerometer window — saved {base_path.name}")
+            return ("png", png_path)
+        except Exception as e:
+            print(f"[Save] Thumbnail render failed ({e}); falling back to Plotly.")
+
     ts = [r[0] for r in rows]
     xs = [r[1] for r in rows]
     ys = [r[2] for r in rows]
@@ -147,7 +149,6 @@ def _save_png_or_html(rows, base_path: Path):
         template="plotly_white",
     )
 
-    png_path  = base_path.with_suffix(".png")
     html_path = base_path.with_suffix(".html")
     try:
         fig.write_image(str(png_path), width=1200, height=500, scale=2)  # needs kaleido
@@ -156,10 +157,18 @@ def _save_png_or_html(rows, base_path: Path):
         fig.write_html(str(html_path), include_plotlyjs="cdn")
         return ("html", html_path)
 
+# autosave thread and force-save callback take turns: hotmetrics wants one
+# writer per metric, and kaleido must not render from two threads at once
+save_lock = threading.Lock()
+
 def _save_batch(rows):
-    base = DATA_DIR / f"{OUTPUT_PREFIX}_{_now_stamp()}"
-    csv_path = _save_csv(rows, base)
-    kind, art_path = _save_png_or_html(rows, base)
+    with save_lock:
+        t0 = time.perf_counter()
+        base = DATA_DIR / f"{OUTPUT_PREFIX}_{_now_stamp()}"
+        csv_path = _save_csv(rows, base)
+        kind, art_path = _save_png_or_html(rows, base)
+        SAVE_S.since(t0)
+        ROWS_OUT.inc(len(rows))
     print(f"[Save] {len(rows)} samples | CSV -> {csv_path.name} | {kind.upper()} -> {art_path.name}")
     return f"Saved {len(rows)} samples: {csv_path.name} + {art_path.name}"
 
@@ -206,10 +215,11 @@ def show_buffer_size(_n):
     with log_lock:
         n = len(log_rows)
     # also print periodically so you can see progress in terminal
-    print(f"[Buffer] {n} samples buffered")
-    return f"Buffered: {n} samples"
+    print(f"[Buffer] {n} samples buffered | {aligner.info()}")
+    return f"Buffered: {n} samples | {aligner.info()}"
 
 if __name__ == "__main__":
+    serve(METRICS_PORT)
     start_cloud_thread()
     start_autosave_thread()
     print(f"Saving to: {DATA_DIR}")
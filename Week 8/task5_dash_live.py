@@ -9,7 +9,9 @@
 #
 from pathlib import Path
 from datetime import datetime
+import sys
 import threading
+import time
 from collections import deque
 
 import pandas as pd
@@ -19,56 +21,44 @@ from dash import Dash, dcc, html, Output, Input
 from arduino_iot_cloud import ArduinoCloudClient
 from iot_secrets import DEVICE_ID, SECRET_KEY
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # shared helpers at the repo root
+from cloudalign import CloudAligner
+from hotmetrics import counter, gauge, histogram, serve
+
 # ---- Config ----
 VAR_X = "accelerometer_x"
 VAR_Y = "accelerometer_y"
 VAR_Z = "accelerometer_z"
+ALIGN_TOLERANCE_S = 0.5       # x/y/z values further apart than this are not paired
 
 SAMPLES_PER_WINDOW = 5      # ~10s at ~50 Hz; adjust for your rate
 DASH_REFRESH_MS = 1000        # check every 1s for a fresh N-sample batch
 
+EXPORT_WORKERS = 2            # background threads writing CSV + PNG (PNG renders take turns)
+EXPORT_QUEUE_MAX = 4          # pending exports before new windows are coalesced
+EXPORT_MIN_INTERVAL_S = 0.0   # per-worker pause between exports (rate limit)
+METRICS_PORT = 9228           # http://127.0.0.1:9228/metrics
+
 ROOT = Path(__file__).resolve().parent
 PLOT_DIR = ROOT / "plots"
 PLOT_DIR.mkdir(parents=True, exist_ok=True)
 
 # ---- Buffers & state ----
-inbox = deque()          # receives (ts_str, x, y, z)
-inbox_lock = threading.Lock()
+# x/y/z cloud values -> (t_epoch, x, y, z) samples queued for the Dash poller
+aligner = CloudAligner({"x": VAR_X, "y": VAR_Y, "z": VAR_Z}, tolerance_s=ALIGN_TOLERANCE_S)
 
-latest = {"x": None, "y": None, "z": None}
-seen   = {"x": False, "y": False, "z": False}
-state_lock = threading.Lock()
+# ---- Metrics (hotmetrics): aligner counters are read at scrape time ----
+APP = {"app": "task5_dash_live"}
+aligner.register_metrics(APP)
+CALLBACK_S = histogram("sit225_callback_seconds", "Callback run time", {**APP, "callback": "refresh"})
 
 last_batch = []
 last_save_name = None
+image_lock = threading.Lock()   # kaleido's renderer process must not be driven from two threads at once
 
-# ---- Cloud callbacks ----
-def _append_if_full_trio():
-    # Called while holding state_lock
-    if seen["x"] and seen["y"] and seen["z"]:
-        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        row = (ts, latest["x"], latest["y"], latest["z"])
-        with inbox_lock:
-            inbox.append(row)
-        seen["x"] = seen["y"] = seen["z"] = False
-
-def on_x(_client, value):
-    with state_lock:
-        latest["x"] = float(value) if value is not None else None
-        seen["x"] = True
-        _append_if_full_trio()
-
-def on_y(_client, value):
-    with state_lock:
-        latest["y"] = float(value) if value is not None else None
-        seen["y"] = True
-        _append_if_full_trio()
-
-def on_z(_client, value):
-    with state_lock:
-        latest["z"] = float(value) if value is not None else None
-        seen["z"] = True
-        _append_if_full_trio()
+def _as_row(sample):
+    t, x, y, z = sample
+    return (datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3], x, y, z)
 
 def start_cloud_thread():
     client = ArduinoCloudClient(
@@ -76,9 +66,7 @@ def start_cloud_thread():
         username=DEVICE_ID,
         password=SECRET_KEY,
     )
-    client.register(VAR_X, value=None, on_write=on_x)
-    client.register(VAR_Y, value=None, on_write=on_y)
-    client.register(VAR_Z, value=None, on_write=on_z)
+    aligner.register(client)
 
     def runner():
         try:
@@ -124,11 +112,13 @@ def draw_figure(batch):
                       title=f"Latest window (N={len(batch)})")
     return fig
 
-def save_outputs(batch, fig):
+def save_outputs(batch, fig=None):
     global last_save_name
     if not batch:
         return None
-    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if fig is None:
+        fig = draw_figure(batch)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]  # ms so coalesced jobs never collide
     base = f"accel_{stamp}"
 
     # CSV
@@ -141,13 +131,71 @@ def save_outputs(batch, fig):
     html_path = PLOT_DIR / f"{base}.html"
     try:
         # Requires kaleido; if not installed, fallback to HTML
-        fig.write_image(str(png_path), width=1200, height=500, scale=2)
+        with image_lock:
+            fig.write_image(str(png_path), width=1200, height=500, scale=2)
         last_save_name = png_path.name
     except Exception:
         fig.write_html(str(html_path), include_plotlyjs="cdn")
         last_save_name = html_path.name
     return last_save_name
 
+# ---- Background export workers ----
+# The Dash callback only enqueues a window; CSV + kaleido rendering run here so
+# the chart never waits on a save. When the workers fall behind, a new window
+# is merged into the newest pending job instead of growing the queue.
+export_jobs = deque()        # pending batches (lists of rows)
+export_cv = threading.Condition()
+export_stats = {"coalesced": 0, "done": 0, "last_ms": 0.0, "avg_ms": 0.0, "busy": 0}
+gauge("sit225_queue_depth", "Samples waiting in a buffer", {**APP, "queue": "export"},
+      fn=lambda: sum(len(b) for b in list(export_jobs)))
+
+def enqueue_export(batch):
+    with export_cv:
+        if len(export_jobs) >= EXPORT_QUEUE_MAX:
+            export_jobs[-1].extend(batch)
+            export_stats["coalesced"] += 1
+        else:
+            export_jobs.append(list(batch))
+        export_cv.notify()
+
+def _export_worker(i):
+    # hotmetrics updates are unlocked (one writer per metric): a series per worker
+    labels = {**APP, "store": "export", "worker": str(i)}
+    write_s = histogram("sit225_write_seconds", "Storage write latency", labels)
+    rows_out = counter("sit225_rows_written_total", "Rows written to storage", labels)
+    while True:
+        with export_cv:
+            while not export_jobs:
+                export_cv.wait()
+            batch = export_jobs.popleft()
+            export_stats["busy"] += 1
+        t0 = time.perf_counter()
+        try:
+            save_outputs(batch)
+            rows_out.inc(len(batch))
+        except Exception as e:
+            print("[Export] Error:", e)
+        write_s.since(t0)
+        ms = (time.perf_counter() - t0) * 1000.0
+        with export_cv:
+            export_stats["busy"] -= 1
+            export_stats["done"] += 1
+            export_stats["last_ms"] = ms
+            # running average over the last ~10 exports
+            export_stats["avg_ms"] += (ms - export_stats["avg_ms"]) / min(export_stats["done"], 10)
+        if EXPORT_MIN_INTERVAL_S:
+            time.sleep(EXPORT_MIN_INTERVAL_S)
+
+def start_export_workers():
+    for i in range(EXPORT_WORKERS):
+        threading.Thread(target=_export_worker, args=(i,), name=f"export-{i}", daemon=True).start()
+
+def export_status():
+    with export_cv:
+        return (f"export queue={len(export_jobs)} busy={export_stats['busy']} "
+                f"last={export_stats['last_ms']:.0f} ms avg={export_stats['avg_ms']:.0f} ms "
+                f"coalesced={export_stats['coalesced']}")
+
 @app.callback(
     Output("accel_graph", "figure"),
     Output("stats", "children"),
@@ -156,22 +204,24 @@ def save_outputs(batch, fig):
 )
 def refresh(_n):
     global last_batch
-    with inbox_lock:
-        if len(inbox) >= SAMPLES_PER_WINDOW:
-            batch = [inbox.popleft() for _ in range(SAMPLES_PER_WINDOW)]
-        else:
-            batch = None
+    t0 = time.perf_counter()
+    batch = aligner.take(SAMPLES_PER_WINDOW)
 
     if batch is None:
         fig = draw_figure(last_batch)
-        return fig, f"Waiting… inbox={len(inbox)}, last_save={last_save_name or '—'}"
+        CALLBACK_S.since(t0)
+        return fig, f"Waiting… inbox={len(aligner)}, last_save={last_save_name or '—'} | {export_status()} | {aligner.info()}"
 
+    batch = [_as_row(s) for s in batch]
     last_batch = batch
     fig = draw_figure(batch)
-    saved = save_outputs(batch, fig)
-    return fig, f"Saved: {saved} | inbox now {len(inbox)}"
+    enqueue_export(batch)
+    CALLBACK_S.since(t0)
+    return fig, f"Queued window | last_save={last_save_name or '—'} | inbox now {len(aligner)} | {export_status()} | {aligner.info()}"
 
 def main():
+    serve(METRICS_PORT)
+    start_export_workers()
     start_cloud_thread()
     print("Dash running at http://127.0.0.1:8050")
     app.run(debug=False, host="127.0.0.1", port=8050)  # Dash 3+
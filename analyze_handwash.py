@@ -1,5 +1,12 @@
-import argparse, os, re, pandas as pd, matplotlib.pyplot as plt
+import argparse, json, os, re, pandas as pd, matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
+from wash_detect import detect_params, redetect
+
+CACHE_NAME = ".handwash_cache.json"   # per-file results, keyed by path + mtime + size
+CACHE_VERSION = 1                     # bump when analyze_file() output changes
+TRACE_TAIL = 300                      # samples kept for example_trace.png
 
 
 def load_csvs(paths):
@@ -20,23 +27,96 @@ def class_from_name(name):
     return "unlabeled"
 
 
-def summarize_file(path):
+def analyze_file(path, detect=None):
+    """Everything main() needs from one CSV, from a single read.
+    detect: wash_detect parameters to recompute event/dur_s from distance_cm (None = device events)."""
+    path = Path(path)
     df = pd.read_csv(path)
-    ends = df[df.get("event", "") == "end"].copy()
-    if ends.empty:
-        return {"file": path.name, "events": 0, "avg_s": 0, "median_s": 0, "ge20_pct": 0,
-                "label": class_from_name(path.name)}
-    dur = ends["dur_s"].astype(float)
+    if detect is not None and "distance_cm" in df.columns:
+        df = redetect(df, **detect)
+    if "event" in df.columns and "dur_s" in df.columns:
+        dur = pd.to_numeric(df.loc[df["event"] == "end", "dur_s"], errors="coerce").dropna()
+    else:
+        dur = pd.Series(dtype=float)
+    if dur.empty:
+        summary = {"file": path.name, "events": 0, "avg_s": 0, "median_s": 0, "ge20_pct": 0,
+                   "label": class_from_name(path.name)}
+    else:
+        summary = {
+            "file": path.name,
+            "events": len(dur),
+            "avg_s": round(dur.mean(), 1),
+            "median_s": round(dur.median(), 1),
+            "ge20_pct": round((dur >= 20).mean() * 100, 1),
+            "label": class_from_name(path.name)
+        }
+    tail = df.tail(TRACE_TAIL)
     return {
-        "file": path.name,
-        "events": len(dur),
-        "avg_s": round(dur.mean(), 1),
-        "median_s": round(dur.median(), 1),
-        "ge20_pct": round((dur >= 20).mean() * 100, 1),
-        "label": class_from_name(path.name)
+        "summary": summary,
+        "durations": dur.tolist(),
+        "max_dur": float(dur.max()) if len(dur) else 0.0,
+        "tail_t": ((tail["ts"] / 1000.0) if "ts" in tail.columns else pd.Series(range(len(tail)))).tolist(),
+        "tail_cm": tail["distance_cm"].tolist() if "distance_cm" in tail.columns else [],
     }
 
 
+def summarize_file(path):
+    return analyze_file(path)["summary"]
+
+
+def _file_key(path):
+    st = path.stat()
+    return str(path.resolve()), [st.st_mtime_ns, st.st_size]
+
+
+def _load_cache(cache_path):
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data.get("files", {}) if data.get("version") == CACHE_VERSION else {}
+
+
+def _save_cache(cache_path, entries):
+    tmp = cache_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "files": entries}), encoding="utf-8")
+    tmp.replace(cache_path)
+
+
+def analyze_all(files, cache_path=None, workers=None, detect=None):
+    """analyze_file() for every path: cache hits are reused, misses run on a process pool."""
+    cache = _load_cache(cache_path) if cache_path else {}
+    # the resolved detector settings, so a changed wash_detect default misses the cache
+    settings = None if detect is None else detect_params(**detect)
+    keys = [(k, stamp + [settings]) for k, stamp in map(_file_key, files)]
+    results = [None] * len(files)
+    todo = []
+    for i, (k, stamp) in enumerate(keys):
+        hit = cache.get(k)
+        if hit is not None and hit["stamp"] == stamp:
+            results[i] = hit["result"]
+        else:
+            todo.append(i)
+
+    if todo:
+        workers = workers or min(len(todo), os.cpu_count() or 1)
+        paths = [files[i] for i in todo]
+        job = partial(analyze_file, detect=detect)
+        if workers <= 1:
+            fresh = [job(p) for p in paths]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                fresh = list(pool.map(job, paths, chunksize=max(1, len(paths) // (4 * workers))))
+        for i, r in zip(todo, fresh):
+            results[i] = r
+
+    if cache_path:
+        # only the current inputs are kept, so deleted sessions drop out of the cache
+        _save_cache(cache_path, {k: {"stamp": stamp, "result": r} for (k, stamp), r in zip(keys, results)})
+    print(f"Analyzed {len(todo)} file(s), {len(files) - len(todo)} from cache")
+    return results
+
+
 def plot_hist(durations, outpng):
     plt.figure(figsize=(7, 4))
     plt.hist(durations, bins=12)
@@ -48,12 +128,13 @@ def plot_hist(durations, outpng):
     plt.close()
 
 
-def plot_sample_trace(path, outpng):
-    df = pd.read_csv(path)
-    # show last ~300 samples or whole file if short
-    tail = df.tail(300)
-    x = (tail["ts"] / 1000.0) if "ts" in tail.columns else range(len(tail))
-    y = tail["distance_cm"]
+def plot_sample_trace(path, outpng, x=None, y=None):
+    if x is None or y is None:
+        df = pd.read_csv(path)
+        # show last ~300 samples or whole file if short
+        tail = df.tail(TRACE_TAIL)
+        x = (tail["ts"] / 1000.0) if "ts" in tail.columns else range(len(tail))
+        y = tail["distance_cm"]
     plt.figure(figsize=(8, 4))
     plt.plot(x, y)
     plt.xlabel("Time (s)");
@@ -68,6 +149,10 @@ def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--in", dest="inputs", nargs="+", required=True, help="CSV files and/or folders")
     ap.add_argument("--outdir", default="figs", help="Output folder for figures/tables")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    ap.add_argument("--no-cache", action="store_true", help="re-read every file and skip the result cache")
+    ap.add_argument("--redetect", action="store_true",
+                    help="recompute start/end events from distance_cm (wash_detect.py defaults)")
     args = ap.parse_args()
 
     outdir = Path(args.outdir);
@@ -77,18 +162,17 @@ def main():
     if not files:
         raise SystemExit("No CSV files found.")
 
+    # One read per file (or a cache hit), fanned out over a process pool
+    detect = {} if args.redetect else None
+    results = analyze_all(files, None if args.no_cache else outdir / CACHE_NAME, args.workers, detect)
+
     # Per-file summaries
-    rows = [summarize_file(p) for p in files]
+    rows = [r["summary"] for r in results]
     df_sum = pd.DataFrame(rows).sort_values(["label", "file"])
     df_sum.to_csv(outdir / "table_by_file.csv", index=False)
 
     # Overall metrics (all events)
-    all_dur = []
-    for p in files:
-        df = pd.read_csv(p)
-        ends = df[df.get("event", "") == "end"]
-        if not ends.empty:
-            all_dur += ends["dur_s"].astype(float).tolist()
+    all_dur = [d for r in results for d in r["durations"]]
 
     if all_dur:
         overall = pd.DataFrame({
@@ -115,16 +199,13 @@ def main():
     # Distance trace from the longest-duration file (nice figure)
     longest = None;
     best = 0
-    for p in files:
-        df = pd.read_csv(p)
-        ends = df[df.get("event", "") == "end"]
-        if not ends.empty:
-            d = float(ends["dur_s"].max())
-            if d > best:
-                best = d;
-                longest = p
+    for p, r in zip(files, results):
+        if r["max_dur"] > best:
+            best = r["max_dur"];
+            longest = (p, r)
     if longest:
-        plot_sample_trace(longest, outdir / "example_trace.png")
+        p, r = longest
+        plot_sample_trace(p, outdir / "example_trace.png", r["tail_t"], r["tail_cm"])
 
     # Console summary for quick copy-paste
     print("\n=== Overall (all files) ===")
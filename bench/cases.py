@@ -0,0 +1,388 @@
+# cases.py
+"""
+Benchmark cases: the course's hot paths, each called directly (SIT225 bench helper).
+
+Why:
+The scripts are mostly module-level programs wired to a serial port, an MQTT
+broker, a Dash/Bokeh server or a cloud database. Each case here loads the real
+module from its folder, feeds it generated data (gen.py) and hands run.py one
+callable to time. Nothing is re-implemented: a regression in the script is a
+regression here.
+
+A case is a function (manifest, workdir) -> Case, registered with @case. It
+runs inside its own run.py child process (cwd = workdir), so module-level side
+effects and peak RSS stay per case. Cases that need something missing (a
+package, a local MongoDB/Redis) raise Skip and are reported as skipped.
+
+Local services (plot_history / subscriber cases), overridable by env:
+    BENCH_MONGO_URI   mongodb://localhost:27017     (database sit225_bench, dropped after)
+    BENCH_REDIS_HOST  localhost     BENCH_REDIS_PORT  6379
+    BENCH_REDIS_USER  default       BENCH_REDIS_PASS  (empty)
+"""
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import itertools
+import os
+import sys
+import types
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))   # shared helpers at the repo root
+from streamfilt import make_filter
+from timequery import REDIS_INDEX
+
+from gen import gyro_docs
+
+MONGO_URI = os.environ.get("BENCH_MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB = "sit225_bench"
+REDIS = {"host": os.environ.get("BENCH_REDIS_HOST", "localhost"),
+         "port": int(os.environ.get("BENCH_REDIS_PORT", "6379")),
+         "user": os.environ.get("BENCH_REDIS_USER", "default"),
+         "password": os.environ.get("BENCH_REDIS_PASS", "")}
+DB_DOCS = 50_000     # documents seeded into the local Mongo/Redis
+
+
+class Skip(Exception):
+    """The case cannot run here (missing package or service)."""
+
+
+@dataclass
+class Case:
+    call: Callable[[], object]            # the timed call
+    items: float = 1                      # items handled per call, for throughput
+    unit: str = "rows"
+    before: Optional[Callable] = None     # untimed, runs before every call
+    teardown: Optional[Callable] = None
+    repeat: int = 200                     # default timed calls (run.py --repeat overrides)
+
+
+CASES = {}
+
+
+def case(name):
+    def deco(fn):
+        CASES[name] = fn
+        return fn
+    return deco
+
+
+# ---------- helpers ----------
+def need(*modules):
+    for m in modules:
+        try:
+            importlib.import_module(m)
+        except ImportError:
+            raise Skip(f"{m} not installed")
+
+
+def load_module(rel: str, name: str, argv=None):
+    """Import a repo script from its own folder (its sibling imports resolve), with sys.argv set."""
+    path = REPO / rel
+    sys.path.insert(0, str(path.parent))
+    old_argv = sys.argv
+    sys.argv = [str(path), *(argv or [])]
+    try:
+        spec = importlib.util.spec_from_file_location(name, path)
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules[name] = mod
+        spec.loader.exec_module(mod)
+    finally:
+        sys.argv = old_argv
+    return mod
+
+
+def _mongo():
+    need("pymongo")
+    from pymongo import MongoClient
+    client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=1500)
+    try:
+        client.admin.command("ping")
+    except Exception as e:
+        raise Skip(f"no MongoDB at {MONGO_URI} ({type(e).__name__})")
+    return client
+
+
+def _redis():
+    """A local Redis client, or None when there is none (the cases then run Mongo-only)."""
+    try:
+        import redis
+        r = redis.Redis(host=REDIS["host"], port=REDIS["port"], username=REDIS["user"] or None,
+                        password=REDIS["password"] or None, socket_timeout=2)
+        r.ping()
+        return r
+    except Exception:
+        return None
+
+
+def _local_config(with_redis: bool):
+    """A 5.2D config module pointing at the local services instead of the cloud ones."""
+    cfg = types.ModuleType("config")
+    cfg.MQTT_BROKER, cfg.MQTT_PORT, cfg.MQTT_TOPIC = "localhost", 1883, "bench/gyroscope"
+    cfg.MQTT_USER, cfg.MQTT_PASS = "bench", "bench"
+    cfg.MONGO_URI, cfg.MONGO_DB, cfg.MONGO_COLLECTION = MONGO_URI, MONGO_DB, "gyro_readings"
+    if with_redis:
+        cfg.REDIS_HOST, cfg.REDIS_PORT = REDIS["host"], REDIS["port"]
+        cfg.REDIS_USER, cfg.REDIS_PASS = REDIS["user"], REDIS["password"]
+    sys.modules["config"] = cfg
+    return cfg
+
+
+def _drop_redis_docs(r, lo_score):
+    """Remove the bench keys (index score >= lo_score) from a local Redis."""
+    keys = r.zrangebyscore(REDIS_INDEX, lo_score, "+inf")
+    for i in range(0, len(keys), 1000):
+        r.delete(*keys[i:i + 1000])
+    r.zremrangebyscore(REDIS_INDEX, lo_score, "+inf")
+
+
+def _dash_callback(app, output):
+    """The undecorated Dash callback writing `output` (e.g. "extendData")."""
+    for key, entry in app.callback_map.items():
+        if output in key:
+            fn = entry["callback"]
+            return getattr(fn, "__wrapped__", fn)
+    raise KeyError(output)
+
+
+# ---------- 6.2 HD: serial ingest ----------
+class _ReplaySerial:
+    """Stands in for the Arduino: replays generated lines, then stops the script like Ctrl+C."""
+    def __init__(self, lines):
+        self.lines = list(reversed(lines))
+
+    def reset_input_buffer(self):
+        pass
+
+    def readline(self):
+        if not self.lines:
+            raise KeyboardInterrupt
+        return self.lines.pop()
+
+    def close(self):
+        pass
+
+
+@case("real_writer.flush_buffer")
+def real_writer_flush(m, work):
+    chunk = pd.read_csv(sorted(Path(m["gyro_dir"]).glob("*.csv"))[0])
+    lines = [f"{x},{y},{z}\r\n".encode() for x, y, z in chunk[["gyro_x", "gyro_y", "gyro_z"]].itertuples(index=False)]
+    sys.modules["serial"] = types.SimpleNamespace(Serial=lambda *a, **k: _ReplaySerial(lines))
+    mod = load_module("6.2 HD/real_writer.py", "real_writer")    # runs the ingest loop over `lines`
+    rows = chunk.values.tolist()
+
+    def before():
+        mod.rows_buffer = list(rows)
+    return Case(mod.flush_buffer, items=len(rows), before=before)
+
+
+@case("real_writer.flush_buffer[filter]")
+def real_writer_flush_filter(m, work):
+    c = real_writer_flush(m, work)
+    sys.modules["real_writer"].filt = make_filter("median:5+ema:0.2")   # FILTER set in the script
+    return c
+
+
+# ---------- streamfilt: one chunk of gyro samples per call ----------
+def _streamfilt(m, spec):
+    chunk = pd.read_csv(sorted(Path(m["gyro_dir"]).glob("*.csv"))[0])
+    block = chunk[["gyro_x", "gyro_y", "gyro_z"]].to_numpy(np.float64)
+    f = make_filter(spec, fs=50)
+    return Case(lambda: f(block), items=len(block), unit="samples", repeat=2_000)
+
+
+@case("streamfilt[ema]")
+def streamfilt_ema(m, work):
+    return _streamfilt(m, "ema:0.2")
+
+
+@case("streamfilt[median+ema]")
+def streamfilt_median_ema(m, work):
+    return _streamfilt(m, "median:5+ema:0.2")
+
+
+@case("streamfilt[butter]")
+def streamfilt_butter(m, work):
+    need("scipy")
+    return _streamfilt(m, "butter:4:5")
+
+
+# ---------- 5.2D: MQTT -> Mongo/Redis ----------
+@case("subscriber.on_message")
+def subscriber_on_message(m, work):
+    need("paho.mqtt.client")
+    client = _mongo()
+    client.drop_database(MONGO_DB)
+    r = _redis()
+    _local_config(with_redis=r is not None)
+    mod = load_module("5.2D/subscriber.py", "subscriber")
+    docs = itertools.cycle(gyro_docs(2_000))
+    msg = types.SimpleNamespace(payload=b"")
+    t_start = pd.Timestamp.now(tz="UTC").timestamp() - 1
+
+    def before():
+        d = next(docs)
+        msg.payload = f'{{"x": {d["x"]}, "y": {d["y"]}, "z": {d["z"]}}}'.encode()
+
+    def teardown():
+        client.drop_database(MONGO_DB)
+        if r is not None:
+            _drop_redis_docs(r, t_start)
+    return Case(lambda: mod.on_message(None, None, msg), items=1, unit="messages",
+                before=before, teardown=teardown, repeat=2_000)
+
+
+@case("plot_history.make_dataframe")
+def plot_history_make_dataframe(m, work):
+    client = _mongo()
+    r = _redis()
+    docs = gyro_docs(DB_DOCS)
+    client.drop_database(MONGO_DB)
+    client[MONGO_DB]["gyro_readings"].insert_many([dict(d) for d in docs])
+    if r is not None:
+        pipe = r.pipeline()
+        for d in docs:
+            pipe.set(d["ts_iso"], f'{{"ts_iso": "{d["ts_iso"]}", "x": {d["x"]}, "y": {d["y"]}, "z": {d["z"]}}}')
+            pipe.zadd(REDIS_INDEX, {d["ts_iso"]: pd.Timestamp(d["ts_iso"]).timestamp()})
+        pipe.execute()
+    _local_config(with_redis=r is not None)
+    need("matplotlib")
+    mod = load_module("5.2D/plot_history.py", "plot_history")
+    lo = pd.Timestamp(docs[0]["ts_iso"]).timestamp()
+
+    def teardown():
+        client.drop_database(MONGO_DB)
+        if r is not None:
+            _drop_redis_docs(r, lo)
+    return Case(lambda: mod.make_dataframe(use_mongo=True, use_redis=r is not None),
+                items=DB_DOCS * (2 if r is not None else 1), teardown=teardown, repeat=10)
+
+
+@case("plot_history.make_dataframe[range]")
+def plot_history_range(m, work):
+    c = plot_history_make_dataframe(m, work)
+    mod = sys.modules["plot_history"]
+    docs = gyro_docs(DB_DOCS)
+    start, end = docs[DB_DOCS // 2]["ts_iso"], docs[DB_DOCS // 2 + DB_DOCS // 20]["ts_iso"]   # 5 % slice
+    use_redis = hasattr(mod.config, "REDIS_HOST")
+    c.call = lambda: mod.make_dataframe(use_mongo=True, use_redis=use_redis, start=start, end=end)
+    c.items = (DB_DOCS // 20) * (2 if use_redis else 1)
+    c.repeat = 50
+    return c
+
+
+# ---------- 8.x: smooth Dash stream ----------
+def _accel_rows(m):
+    df = pd.read_csv(m["accel_csv"])
+    return list(df.itertuples(index=False, name=None))
+
+
+def _smoothdash(m, per_tick, spec=None):
+    need("dash")
+    sd = load_module("Week 8.2 C/smoothdash.py", "smoothdash")
+    app, state = sd.make_smooth_app(["X", "Y", "Z"], window_points=600, max_append=15, poll_ms=150,
+                                    stream_filter=make_filter(spec))
+    tick = _dash_callback(app, "extendData")
+    rows = itertools.cycle(_accel_rows(m))
+    push = state["push"]
+
+    def before():
+        for _ in range(per_tick):
+            push(*next(rows))
+    return Case(lambda: tick(0), items=per_tick, unit="samples", before=before, repeat=1_000)
+
+
+@case("smoothdash._on_tick")
+def smoothdash_tick(m, work):
+    return _smoothdash(m, per_tick=15)          # producer keeping pace with max_append
+
+
+@case("smoothdash._on_tick[backlog]")
+def smoothdash_backlog(m, work):
+    c = _smoothdash(m, per_tick=3_000)          # a stalled tab catching up: only the newest window is sent
+    c.repeat = 100
+    return c
+
+
+@case("smoothdash._on_tick[filter]")
+def smoothdash_tick_filter(m, work):
+    return _smoothdash(m, per_tick=15, spec="median:3+ema:0.3")    # task8_2c_dash_smooth's FILTER
+
+
+# ---------- 6.2 HD: Bokeh dashboard ----------
+def _bokeh(m, chart="Line", n=1_000):
+    need("bokeh")
+    mod = load_module("6.2 HD/bokeh_app.py", "bokeh_app", argv=[m["gyro_dir"]])
+    mod.chart_select.value = chart
+    mod.n_input.value = str(n)
+    return mod
+
+
+@case("bokeh_app.draw_plot[next]")
+def bokeh_next(m, work):
+    mod = _bokeh(m)
+    n = mod.parse_n()
+
+    def before():
+        if mod.start_idx >= mod.total_rows - n:
+            mod.start_idx = 0
+        mod.start_idx += n        # what on_next() does before drawing
+    return Case(mod.draw_plot, items=n, before=before, repeat=300)
+
+
+@case("bokeh_app.draw_plot[jump]")
+def bokeh_jump(m, work):
+    mod = _bokeh(m)
+    n = mod.parse_n()
+    starts = itertools.cycle(np.random.default_rng(0).integers(0, max(1, mod.total_rows - n), 1_000).tolist())
+
+    def before():
+        mod.start_idx = next(starts)   # far jumps: the resident block is reloaded from the chunks
+    return Case(mod.draw_plot, items=n, before=before, repeat=100)
+
+
+@case("bokeh_app.draw_plot[whole histogram]")
+def bokeh_whole(m, work):
+    mod = _bokeh(m, chart="Histogram (whole recording)")
+    return Case(mod.draw_plot, items=mod.total_rows, repeat=300)
+
+
+# ---------- Week 9: handwash logs ----------
+@case("analyze_handwash.summarize_file")
+def handwash_summarize(m, work):
+    mod = load_module("Week 9/analyze_handwash.py", "analyze_handwash")
+    files = sorted(Path(m["handwash_dir"]).glob("*.csv"))
+    it = itertools.cycle(files)
+    return Case(lambda: mod.summarize_file(next(it)), items=m["handwash_rows"] / len(files),
+                repeat=5 * len(files))
+
+
+# ---------- week 7: regression fits ----------
+@case("model_search.fit_weighted")
+def week7_fit_weighted(m, work):
+    mod = load_module("week7/model_search.py", "model_search")
+    x, y, _ = mod.load(m["dht_csv"])
+    B = 200
+    W = np.random.default_rng(0).multinomial(len(x), np.full(len(x), 1 / len(x)), size=B).astype(np.float64)
+    degs = itertools.cycle([1, 2, 3])
+    return Case(lambda: mod.fit_weighted(x, y, next(degs), W), items=B, unit="fits", repeat=30)
+
+
+@case("streaming_lr.BinnedOLS")
+def week7_binned_ols(m, work):
+    mod = load_module("week7/streaming_lr.py", "streaming_lr")
+    df = pd.read_csv(m["dht_csv"])
+    x, y = df[mod.X_COL].to_numpy(np.float64), df[mod.Y_COL].to_numpy(np.float64)
+
+    def call():
+        b = mod.BinnedOLS()
+        b.update(x, y)
+        return mod.scenarios(b)
+    return Case(call, items=len(x), repeat=50)
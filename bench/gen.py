@@ -0,0 +1,184 @@
+# gen.py
+"""
+Deterministic synthetic data for the benchmark suite (SIT225 bench helper).
+
+Why:
+Timings are only comparable run to run if every run sees the same input. This
+writes the four kinds of data the course scripts consume, from a fixed seed and
+fixed start times, in the exact formats the scripts read:
+
+  gyro/gyro_data_<YYYYmmdd_HHMMSS>.csv   real_writer.py chunks (sample, timestamp, gyro_x/y/z), 50 Hz
+  accel.csv                              8.2C accelerometer rows (timestamp, x, y, z)
+  dht22.csv                              week-7 DHT22 log (Timestamp, Temperature_C, Humidity_%)
+  handwash/{proper_wash,quick_rinse}_NNN.csv
+                                         Week 9 sessions (ts, distance_cm, pir, event, dur_s)
+
+plus gyro_docs(), the subscriber.py documents ({ts_iso, x, y, z}) used to seed
+a local MongoDB/Redis. Same scale + seed -> byte-identical files; a data folder
+that already holds them is reused (manifest.json records scale, seed, version).
+
+API:
+    manifest = generate("bench/.data", scale=1.0)   # dict of paths and row counts
+    docs = gyro_docs(10_000)
+
+CLI:
+    python gen.py bench/.data [--scale 2] [--seed 225]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Week 9"))
+from wash_detect import redetect
+
+GEN_VERSION = 1
+SEED = 225
+T0 = datetime(2025, 9, 1, 10, 0, 0)          # fixed, so file names and timestamps repeat
+GYRO_HZ = 50
+ROWS_PER_FILE = 500                          # as real_writer.py
+
+# rows / files at scale 1.0
+SIZES = {"gyro_rows": 200_000, "accel_rows": 50_000, "dht_rows": 20_000, "handwash_files": 40}
+
+
+def sizes(scale: float = 1.0) -> dict:
+    return {k: max(1, int(round(v * scale))) for k, v in SIZES.items()}
+
+
+def _motion(rng, n, hz):
+    """Three smooth axes with noise and occasional spikes, two decimals like the sketches print."""
+    t = np.arange(n) / hz
+    out = []
+    for axis in range(3):
+        f = 0.2 + 0.15 * axis
+        v = 40 * np.sin(2 * np.pi * f * t + axis) + rng.normal(0, 3, n)
+        spikes = rng.random(n) < 0.002
+        v[spikes] += rng.normal(0, 150, spikes.sum())
+        out.append(np.round(v, 2))
+    return out
+
+
+def _iso_ms(times):
+    return [t.isoformat(timespec="milliseconds") for t in times]
+
+
+# ---------- writers ----------
+def write_gyro(folder: Path, n: int, rng) -> int:
+    folder.mkdir(parents=True, exist_ok=True)
+    x, y, z = _motion(rng, n, GYRO_HZ)
+    times = pd.date_range(T0, periods=n, freq=pd.Timedelta(seconds=1 / GYRO_HZ)).to_pydatetime()
+    ts = _iso_ms(times)
+    files = 0
+    for lo in range(0, n, ROWS_PER_FILE):
+        hi = min(n, lo + ROWS_PER_FILE)
+        # real_writer names a chunk by the wall clock at flush, i.e. just after its last row
+        name = f"gyro_data_{(times[hi - 1] + timedelta(seconds=1)).strftime('%Y%m%d_%H%M%S')}.csv"
+        pd.DataFrame({"sample": np.arange(lo, hi), "timestamp": ts[lo:hi],
+                      "gyro_x": x[lo:hi], "gyro_y": y[lo:hi], "gyro_z": z[lo:hi]}).to_csv(folder / name, index=False)
+        files += 1
+    return files
+
+
+def write_accel(path: Path, n: int, rng):
+    x, y, z = _motion(rng, n, 10)
+    times = pd.date_range(T0, periods=n, freq="100ms").to_pydatetime()
+    pd.DataFrame({"timestamp": _iso_ms(times), "x": np.round(x / 10, 3), "y": np.round(y / 10, 3),
+                  "z": np.round(z / 10, 3)}).to_csv(path, index=False)
+
+
+def write_dht22(path: Path, n: int, rng):
+    times = pd.date_range(T0, periods=n, freq="1min")
+    hour = times.hour.to_numpy() + times.minute.to_numpy() / 60
+    temp = 24 + 2.5 * np.sin(2 * np.pi * (hour - 9) / 24) + rng.normal(0, 0.6, n)
+    hum = -1.1 * temp + 98.9 + rng.normal(0, 3, n)
+    bad = rng.random(n) < 0.005                                  # the odd sensor glitch
+    temp[bad] += rng.choice([-15, 15], bad.sum())
+    pd.DataFrame({"Timestamp": times.strftime("%Y-%m-%d %H:%M:%S"),
+                  "Temperature_C": np.round(temp, 2), "Humidity_%": np.round(hum, 2)}).to_csv(path, index=False)
+
+
+def _session(rng, proper: bool):
+    parts = []
+    for _ in range(rng.integers(3, 7)):
+        wash = rng.integers(110, 200) if proper else rng.integers(20, 80)   # samples at 5 Hz
+        parts += [rng.normal(55, 2, rng.integers(20, 60)), np.linspace(50, 18, 8),
+                  rng.uniform(5, 24, wash), np.linspace(24, 55, 8)]
+    d = np.round(np.concatenate(parts + [rng.normal(55, 2, 20)]), 1)
+    df = pd.DataFrame({"ts": 256_000 + np.arange(len(d)) * 200, "distance_cm": d, "pir": (d < 45).astype(int)})
+    return redetect(df)          # device-style event/dur_s columns
+
+
+def write_handwash(folder: Path, n_files: int, rng) -> int:
+    folder.mkdir(parents=True, exist_ok=True)
+    rows = 0
+    for i in range(n_files):
+        proper = i % 2 == 0
+        df = _session(rng, proper)
+        df.to_csv(folder / f"{'proper_wash' if proper else 'quick_rinse'}_{i:03d}.csv", index=False)
+        rows += len(df)
+    return rows
+
+
+def gyro_docs(n: int, seed: int = SEED) -> list:
+    """subscriber.py documents, UTC ts_iso at 50 Hz from T0."""
+    rng = np.random.default_rng(seed)
+    x, y, z = _motion(rng, n, GYRO_HZ)
+    t0 = T0.replace(tzinfo=timezone.utc)
+    step = timedelta(seconds=1 / GYRO_HZ)
+    return [{"ts_iso": (t0 + i * step).isoformat(timespec="milliseconds"),
+             "x": float(x[i]), "y": float(y[i]), "z": float(z[i])} for i in range(n)]
+
+
+# ---------- entry point ----------
+def generate(out, scale: float = 1.0, seed: int = SEED) -> dict:
+    out = Path(out)
+    stamp = {"version": GEN_VERSION, "scale": scale, "seed": seed}
+    mpath = out / "manifest.json"
+    try:
+        manifest = json.loads(mpath.read_text(encoding="utf-8"))
+        if manifest.get("stamp") == stamp:
+            return manifest
+    except (OSError, ValueError):
+        pass
+
+    out.mkdir(parents=True, exist_ok=True)
+    for old in list(out.glob("gyro/*.csv")) + list(out.glob("handwash/*.csv")):
+        old.unlink()
+    n = sizes(scale)
+    rngs = [np.random.default_rng([seed, k]) for k in range(4)]   # one stream per dataset
+    manifest = {
+        "stamp": stamp,
+        "gyro_dir": str(out / "gyro"), "gyro_rows": n["gyro_rows"],
+        "gyro_files": write_gyro(out / "gyro", n["gyro_rows"], rngs[0]),
+        "accel_csv": str(out / "accel.csv"), "accel_rows": n["accel_rows"],
+        "dht_csv": str(out / "dht22.csv"), "dht_rows": n["dht_rows"],
+        "handwash_dir": str(out / "handwash"), "handwash_files": n["handwash_files"],
+    }
+    write_accel(out / "accel.csv", n["accel_rows"], rngs[1])
+    write_dht22(out / "dht22.csv", n["dht_rows"], rngs[2])
+    manifest["handwash_rows"] = write_handwash(out / "handwash", n["handwash_files"], rngs[3])
+    mpath.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    return manifest
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Write the deterministic benchmark data set.")
+    ap.add_argument("out", nargs="?", default=str(Path(__file__).resolve().parent / ".data"))
+    ap.add_argument("--scale", type=float, default=1.0, help="multiplies every row/file count")
+    ap.add_argument("--seed", type=int, default=SEED)
+    args = ap.parse_args()
+    m = generate(args.out, args.scale, args.seed)
+    print(f"{m['gyro_rows']:,} gyro rows in {m['gyro_files']} chunks, {m['accel_rows']:,} accel rows, "
+          f"{m['dht_rows']:,} DHT22 rows, {m['handwash_files']} handwash sessions ({m['handwash_rows']:,} rows)")
+    print("Data in:", Path(args.out).resolve())
+
+
+if __name__ == "__main__":
+    main()
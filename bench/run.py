@@ -0,0 +1,250 @@
+# run.py
+"""
+Benchmark runner: latency percentiles, throughput and peak RSS per case (SIT225 bench).
+
+Why:
+Without numbers there is no telling whether a change made the ingest, storage
+or dashboard paths faster or slower. This times every case in cases.py on the
+generated data set (gen.py) and compares the run with a stored baseline.
+
+How:
+  - each case runs in its own child process (cwd = a fresh temp folder), so
+    imports, module-level state and peak RSS never leak between cases;
+  - the child builds the case (untimed), runs `--warmup` calls, then times
+    `--repeat` calls one by one with perf_counter (the `before` hook of a case
+    runs outside the timed region);
+  - per case: p50/p90/p99/max latency, throughput (items/s over the timed
+    calls) and the child's peak RSS;
+  - every run is written to bench/results/<stamp>.json; --save stores it as the
+    baseline; later runs print the change against it and flag a case when its
+    p50 latency or peak RSS grew by more than --tolerance.
+Baselines are only comparable on the same machine; the runner says so when the
+recorded platform/CPU count differ.
+
+CLI:
+    python bench/run.py                      # every case, compared with bench/baseline.json
+    python bench/run.py -k smoothdash bokeh  # cases whose name contains any of the words
+    python bench/run.py --save               # store this run as the baseline
+    python bench/run.py --check              # exit code 1 on a regression
+    python bench/run.py --list
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+HERE = Path(__file__).resolve().parent
+DATA_DIR = HERE / ".data"
+RESULTS_DIR = HERE / "results"
+BASELINE = HERE / "baseline.json"
+CASE_TIMEOUT_S = 900
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)   # bytes on macOS, KiB elsewhere
+    except ImportError:                                                               # Windows
+        try:
+            import psutil
+            return round(psutil.Process().memory_info().peak_wset / 2 ** 20, 1)
+        except Exception:
+            return None
+
+
+# ---------- child: one case ----------
+def run_child(name, manifest, repeat, warmup) -> dict:
+    sys.path.insert(0, str(HERE))
+    from cases import CASES, Skip
+
+    c = None
+    sink = io.StringIO()      # the scripts print per message/flush; keep that out of the timings
+    try:
+        with redirect_stdout(sink):
+            t0 = time.perf_counter()
+            c = CASES[name](manifest, Path.cwd())
+            setup_s = time.perf_counter() - t0
+            repeat = repeat or c.repeat
+            for _ in range(warmup):
+                if c.before:
+                    c.before()
+                c.call()
+            lat = np.empty(repeat)
+            for i in range(repeat):
+                if c.before:
+                    c.before()
+                t0 = time.perf_counter()
+                c.call()
+                lat[i] = time.perf_counter() - t0
+                sink.seek(0)
+                sink.truncate()
+    except Skip as e:
+        return {"skipped": str(e)}
+    except Exception:
+        return {"error": traceback.format_exc(limit=4)}
+    finally:
+        if c is not None and c.teardown:
+            with redirect_stdout(sink):
+                c.teardown()
+
+    ms = lat * 1000
+    return {
+        "calls": int(repeat), "items_per_call": c.items, "unit": c.unit, "setup_s": round(setup_s, 2),
+        "mean_ms": round(float(ms.mean()), 4), "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p90_ms": round(float(np.percentile(ms, 90)), 4), "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "max_ms": round(float(ms.max()), 4),
+        "throughput": round(c.items * repeat / lat.sum(), 1),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# ---------- parent ----------
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _machine():
+    return {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()}
+
+
+def run_case(name, data_dir, repeat, warmup) -> dict:
+    with tempfile.TemporaryDirectory(prefix="sit225_bench_") as work, \
+            tempfile.NamedTemporaryFile("r", suffix=".json", delete=False) as out:
+        cmd = [sys.executable, str(Path(__file__).resolve()), "--child", name, "--data", str(data_dir),
+               "--out", out.name, "--repeat", str(repeat), "--warmup", str(warmup)]
+        try:
+            env = {**os.environ, "SIT225_METRICS_PORT": "off"}    # no hotmetrics endpoint inside a case
+            p = subprocess.run(cmd, cwd=work, env=env, capture_output=True, text=True, timeout=CASE_TIMEOUT_S)
+            res = json.loads(Path(out.name).read_text(encoding="utf-8") or "null")
+            if res is None:
+                res = {"error": (p.stderr or p.stdout)[-2000:] or f"exit code {p.returncode}"}
+        except subprocess.TimeoutExpired:
+            res = {"error": f"timed out after {CASE_TIMEOUT_S}s"}
+        finally:
+            Path(out.name).unlink(missing_ok=True)
+    return res
+
+
+def _fmt(r):
+    if "skipped" in r:
+        return f"skipped: {r['skipped']}"
+    if "error" in r:
+        return "ERROR"
+    rss = "-" if r["peak_rss_mb"] is None else f"{r['peak_rss_mb']:.0f} MB"
+    return (f"p50 {r['p50_ms']:9.3f} ms  p90 {r['p90_ms']:9.3f}  p99 {r['p99_ms']:9.3f}  "
+            f"{r['throughput']:>12,.0f} {r['unit']}/s  rss {rss}")
+
+
+def compare(run: dict, base: dict, tolerance: float):
+    """Rows (name, p50 ratio, rss ratio, regressed) for cases timed in both runs."""
+    if base.get("machine") != run["machine"]:
+        print(f"\nNote: baseline is from another machine/Python ({base.get('machine')}); ratios are indicative only.")
+    if base.get("scale") != run["scale"]:
+        print(f"Note: baseline used --scale {base.get('scale')}, this run {run['scale']}.")
+    rows = []
+    for name, r in run["cases"].items():
+        b = base.get("cases", {}).get(name)
+        if not b or "p50_ms" not in b or "p50_ms" not in r:
+            continue
+        lat = r["p50_ms"] / b["p50_ms"] if b["p50_ms"] else float("nan")
+        rss = (r["peak_rss_mb"] / b["peak_rss_mb"]) if r["peak_rss_mb"] and b.get("peak_rss_mb") else float("nan")
+        rows.append((name, lat, rss, lat > 1 + tolerance or rss > 1 + tolerance))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time the SIT225 hot paths and compare with a baseline.")
+    ap.add_argument("-k", nargs="+", default=None, metavar="WORD", help="only cases whose name contains a word")
+    ap.add_argument("--list", action="store_true", help="list the cases and exit")
+    ap.add_argument("--scale", type=float, default=1.0, help="data set size (gen.py)")
+    ap.add_argument("--data", default=str(DATA_DIR), help="data folder (generated if missing)")
+    ap.add_argument("--repeat", type=int, default=0, help="timed calls per case (0 = the case default)")
+    ap.add_argument("--warmup", type=int, default=3)
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--save", action="store_true", help="store this run as the baseline")
+    ap.add_argument("--check", action="store_true", help="exit 1 if a case regressed")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="allowed p50 / RSS growth (0.15 = +15%%)")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    ap.add_argument("--out", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    sys.path.insert(0, str(HERE))
+    if args.child:
+        manifest = json.loads((Path(args.data) / "manifest.json").read_text(encoding="utf-8"))
+        res = run_child(args.child, manifest, args.repeat, args.warmup)
+        Path(args.out).write_text(json.dumps(res), encoding="utf-8")
+        return
+
+    from cases import CASES
+    names = [n for n in CASES if not args.k or any(w in n for w in args.k)]
+    if args.list:
+        print("\n".join(names))
+        return
+    if not names:
+        raise SystemExit("No case matches.")
+
+    from gen import generate
+    t0 = time.perf_counter()
+    m = generate(args.data, args.scale)
+    print(f"Data: {args.data} ({m['gyro_rows']:,} gyro rows, {m['handwash_files']} sessions) "
+          f"ready in {time.perf_counter() - t0:.1f}s\n")
+
+    run = {"when": datetime.now().isoformat(timespec="seconds"), "git": _git_rev(),
+           "machine": _machine(), "scale": args.scale, "cases": {}}
+    width = max(len(n) for n in names)
+    for name in names:
+        r = run_case(name, args.data, args.repeat, args.warmup)
+        run["cases"][name] = r
+        print(f"{name:<{width}}  {_fmt(r)}", flush=True)
+        if "error" in r:
+            print("    " + r["error"].strip().replace("\n", "\n    "))
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    out = RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    out.write_text(json.dumps(run, indent=1), encoding="utf-8")
+    print(f"\nSaved: {out}")
+
+    base_path = Path(args.baseline)
+    base = None
+    if base_path.exists():
+        base = json.loads(base_path.read_text(encoding="utf-8"))
+        rows = compare(run, base, args.tolerance)
+        if rows:
+            print(f"\nAgainst baseline {base_path.name} ({base.get('when')}, git {base.get('git')}):")
+            for name, lat, rss, bad in rows:
+                print(f"  {name:<{width}}  p50 x{lat:5.2f}  rss x{rss:5.2f}" + ("   <-- REGRESSION" if bad else ""))
+        regressed = [n for n, *_, bad in rows if bad]
+    else:
+        regressed = []
+        print("\nNo baseline yet (run with --save to store one).")
+
+    if args.save:
+        if base is not None and args.k:
+            base["cases"].update(run["cases"])     # a partial run refreshes only its cases
+            run = {**run, "cases": base["cases"]}
+        base_path.write_text(json.dumps(run, indent=1), encoding="utf-8")
+        print(f"Baseline saved: {base_path}")
+    if args.check and regressed:
+        raise SystemExit(f"{len(regressed)} case(s) regressed beyond {args.tolerance:.0%}: {', '.join(regressed)}")
+
+
+if __name__ == "__main__":
+    main()
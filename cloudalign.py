@@ -0,0 +1,201 @@
+# cloudalign.py
+"""
+Align Arduino IoT Cloud variables (e.g. accelerometer_x/y/z) into timestamped samples.
+
+Why:
+Week 8, 8.2C and 8.3-D each carried their own latest/seen dicts and
+on_x/on_y/on_z callbacks with nested locks. They stamped a trio with
+datetime.now() only when the third value arrived, and silently overwrote a
+value when one axis arrived twice. CloudAligner keeps:
+  - the arrival time of every pending value; a sample is stamped with the
+    first arrival of its set, and values older than `tolerance_s` relative to
+    the newest are dropped instead of being paired with a later reading;
+  - counters for emitted samples, overwritten values, stale drops and queue
+    overflow;
+  - a bounded deque toward consumers. The cloud client calls back from a
+    single thread, so the producer side takes no lock (deque append/popleft
+    are atomic); only consumers share a small lock between themselves.
+
+Shared by Week 8, Week 8.2 C and 8.3-D; the scripts put the repo root on sys.path.
+
+API:
+    aligner = CloudAligner({"x": "accelerometer_x", "y": "accelerometer_y", "z": "accelerometer_z"})
+    aligner.register(client)                 # ArduinoCloudClient
+    batch = aligner.take(50)                 # [(t_epoch, x, y, z), ...] or None until 50 are queued
+    rows = aligner.drain()                   # everything queued
+    CloudAligner(..., on_sample=fn)          # or get fn(t_epoch, x, y, z) on the client thread instead
+    aligner.register_metrics({"app": "task5_dash_live"})   # counters on the hotmetrics endpoint
+
+Bench (per-sample cost vs. the old locked trio):
+    python cloudalign.py --bench [-n 300000]
+"""
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+
+def _to_float(v):
+    return float(v) if v is not None else None
+
+
+class CloudAligner:
+    def __init__(self, variables: Dict[str, str], tolerance_s: float = 0.5,
+                 on_sample: Optional[Callable] = None, queue_max: int = 100_000,
+                 clock: Callable[[], float] = time.time):
+        self.keys = list(variables)               # sample field order, e.g. ["x", "y", "z"]
+        self.variables = dict(variables)          # key -> cloud variable name
+        self.tolerance_s = tolerance_s
+        self.on_sample = on_sample
+        self.clock = clock
+        self._slot = {k: None for k in self.keys}   # key -> (arrival, value) or None
+        self._filled = 0
+        self._queue: deque = deque(maxlen=queue_max)
+        self._take_lock = threading.Lock()        # consumers only
+        self.emitted = 0
+        self.overwritten = 0                      # a value replaced before its set completed
+        self.dropped = 0                          # values discarded as older than tolerance_s
+        self.queue_dropped = 0                    # samples evicted because consumers fell behind
+
+    # ---------- producer (cloud client thread) ----------
+    def register(self, client):
+        for key, name in self.variables.items():
+            client.register(name, value=None, on_write=self._callback(key))
+
+    def _callback(self, key):
+        def on_write(_client, value):
+            self.feed(key, value)
+        return on_write
+
+    def feed(self, key: str, value, t: Optional[float] = None):
+        t = self.clock() if t is None else t
+        slot = self._slot
+        if slot[key] is None:
+            self._filled += 1
+        else:
+            self.overwritten += 1
+        slot[key] = (t, _to_float(value))
+
+        if self._filled < len(self.keys):
+            # expire partial values that are too old to belong with this one
+            cutoff = t - self.tolerance_s
+            for k in self.keys:
+                s = slot[k]
+                if s is not None and s[0] < cutoff:
+                    slot[k] = None
+                    self._filled -= 1
+                    self.dropped += 1
+            return
+
+        t0 = min(s[0] for s in slot.values())
+        if t - t0 > self.tolerance_s:
+            # complete but spread too wide: keep only the values inside the window
+            for k in self.keys:
+                if slot[k][0] < t - self.tolerance_s:
+                    slot[k] = None
+                    self._filled -= 1
+                    self.dropped += 1
+            return
+        sample = (t0, *(slot[k][1] for k in self.keys))
+        for k in self.keys:
+            slot[k] = None
+        self._filled = 0
+        self.emitted += 1
+        if self.on_sample is not None:
+            self.on_sample(*sample)
+        else:
+            if len(self._queue) == self._queue.maxlen:
+                self.queue_dropped += 1
+            self._queue.append(sample)
+
+    # ---------- consumers ----------
+    def __len__(self):
+        return len(self._queue)
+
+    def take(self, n: int) -> Optional[List[tuple]]:
+        """Exactly n samples (oldest first), or None if fewer are queued."""
+        with self._take_lock:
+            if len(self._queue) < n:
+                return None
+            return [self._queue.popleft() for _ in range(n)]
+
+    def drain(self, max_n: Optional[int] = None) -> List[tuple]:
+        with self._take_lock:
+            n = len(self._queue) if max_n is None else min(max_n, len(self._queue))
+            return [self._queue.popleft() for _ in range(n)]
+
+    def register_metrics(self, labels: Dict[str, str]):
+        """Expose the counters and queue depth on the hotmetrics endpoint (read at scrape time)."""
+        from hotmetrics import counter, gauge
+        counter("sit225_samples_in_total", "Samples received", labels, fn=lambda: self.emitted)
+        counter("sit225_samples_dropped_total", "Samples or values dropped before use", labels,
+                fn=lambda: self.dropped + self.overwritten + self.queue_dropped)
+        gauge("sit225_queue_depth", "Samples waiting in a buffer", {**labels, "queue": "aligner"},
+              fn=lambda: len(self._queue))
+
+    def info(self) -> str:
+        return (f"aligned={self.emitted} queued={len(self._queue)} overwritten={self.overwritten} "
+                f"dropped={self.dropped} queue_dropped={self.queue_dropped}")
+
+
+# ---------- bench ----------
+def _legacy_trio():
+    """The per-script pattern this replaces: latest/seen dicts, nested locks, stamp on the third value."""
+    from datetime import datetime
+    inbox, inbox_lock = deque(), threading.Lock()
+    latest = {"x": None, "y": None, "z": None}
+    seen = {"x": False, "y": False, "z": False}
+    state_lock = threading.Lock()
+
+    def _append_if_full_trio():
+        if seen["x"] and seen["y"] and seen["z"]:
+            ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+            row = (ts, latest["x"], latest["y"], latest["z"])
+            with inbox_lock:
+                inbox.append(row)
+            seen["x"] = seen["y"] = seen["z"] = False
+
+    def make(k):
+        def on(_client, value):
+            with state_lock:
+                latest[k] = float(value) if value is not None else None
+                seen[k] = True
+                _append_if_full_trio()
+        return on
+    return {k: make(k) for k in "xyz"}, inbox
+
+
+def bench(n: int = 300_000):
+    values = [0.1 * (i % 97) for i in range(n)]
+    keys = ["x", "y", "z"]
+
+    cbs, inbox = _legacy_trio()
+    t0 = time.perf_counter()
+    for i, v in enumerate(values):
+        cbs[keys[i % 3]](None, v)
+    legacy = time.perf_counter() - t0
+
+    al = CloudAligner({k: f"accelerometer_{k}" for k in keys}, queue_max=n)
+    cb = {k: al._callback(k) for k in keys}
+    t0 = time.perf_counter()
+    for i, v in enumerate(values):
+        cb[keys[i % 3]](None, v)
+    aligned = time.perf_counter() - t0
+
+    print(f"{n} callbacks ({n // 3} samples)")
+    print(f"  legacy trio : {legacy / n * 1e9:7.0f} ns/callback  -> {len(inbox)} rows")
+    print(f"  CloudAligner: {aligned / n * 1e9:7.0f} ns/callback  -> {len(al)} rows | {al.info()}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="CloudAligner micro-benchmark.")
+    ap.add_argument("--bench", action="store_true")
+    ap.add_argument("-n", type=int, default=300_000, help="callbacks to simulate")
+    args = ap.parse_args()
+    if args.bench:
+        bench(args.n)
+    else:
+        ap.print_help()
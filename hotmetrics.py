@@ -0,0 +1,350 @@
+# hotmetrics.py
+"""
+In-process counters, gauges and latency histograms with a Prometheus text endpoint (SIT225 helper).
+
+Why:
+subscriber.py, real_writer.py, live_plot.py and the Week 8 Dash apps reported
+health with a print() per sample, and at a few hundred samples/s the console
+write costs more than the work being reported. This keeps the numbers in
+plain Python attributes on the hot path (no lock, no allocation: an int add,
+or a bisect + int add for a histogram) and formats them only when scraped.
+Prints become rate-limited with Throttle.
+
+Cost (python hotmetrics.py --bench, slow 1-CPU box): counter/gauge ~0.05-0.1 us,
+histogram or Throttle ~0.2-0.3 us; perf_counter + a counter + a histogram + a
+Throttle 0.9-1.0 us, already the whole 1 us budget. So per sample the scripts
+use only counters and a Throttle, and histograms time per-batch work (flush,
+Dash callback). subscriber.py, whose unit of work is one message, observes its
+callback, write and latency histograms on every TIME_EVERY-th message only.
+
+Threading: updates are not locked. Each metric should have a single writer
+thread (the ingest loop, the MQTT thread, ...); the HTTP thread only reads.
+Callable metrics (gauge/counter(..., fn=...)) are evaluated at scrape time, so
+queue depths and counts an object already keeps cost nothing per sample.
+
+API:
+    SAMPLES = counter("sit225_samples_in_total", "Samples received", {"source": "serial"})
+    DEPTH = gauge("sit225_queue_depth", "Rows waiting", fn=lambda: len(rows_buffer))
+    WRITE = histogram("sit225_write_seconds", "CSV write latency")
+    SAMPLES.inc(); WRITE.observe(secs); WRITE.since(t0)   # t0 = time.perf_counter()
+    log_tick = Throttle(2.0)
+    n = log_tick()            # 0, or the number of calls since the last non-zero return
+    serve(9226)               # http://127.0.0.1:9226/metrics ; SIT225_METRICS_PORT overrides, "off" disables
+
+CLI:
+    python hotmetrics.py --bench
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+_perf_counter = time.perf_counter     # module-level names: the hot path skips an attribute lookup
+_monotonic = time.monotonic
+
+LATENCY_BUCKETS = (50e-6, 100e-6, 250e-6, 500e-6, 1e-3, 2.5e-3, 5e-3, 10e-3, 25e-3,
+                   50e-3, 100e-3, 250e-3, 500e-3, 1.0, 2.5, 5.0)   # seconds
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> str:
+    if not labels:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+def _num(v) -> str:
+    if v != v:
+        return "NaN"
+    if v in (float("inf"), float("-inf")):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+# ---------- metric types ----------
+class Counter:
+    __slots__ = ("name", "labels", "value", "fn")
+    kind = "counter"
+
+    def __init__(self, name, labels="", fn: Optional[Callable[[], float]] = None):
+        self.name, self.labels, self.value, self.fn = name, labels, 0, fn
+
+    def inc(self, n=1):
+        self.value += n
+
+    def lines(self):
+        try:
+            v = self.fn() if self.fn is not None else self.value
+        except Exception:
+            v = float("nan")
+        yield f"{self.name}{self.labels} {_num(v)}"
+
+
+class Gauge:
+    __slots__ = ("name", "labels", "value", "fn")
+    kind = "gauge"
+
+    def __init__(self, name, labels="", fn: Optional[Callable[[], float]] = None):
+        self.name, self.labels, self.value, self.fn = name, labels, 0, fn
+
+    def set(self, v):
+        self.value = v
+
+    def inc(self, n=1):
+        self.value += n
+
+    def dec(self, n=1):
+        self.value -= n
+
+    def lines(self):
+        try:
+            v = self.fn() if self.fn is not None else self.value
+        except Exception:
+            v = float("nan")
+        yield f"{self.name}{self.labels} {_num(v)}"
+
+
+class _Timer:
+    __slots__ = ("h", "t0")
+
+    def __init__(self, h):
+        self.h = h
+
+    def __enter__(self):
+        self.t0 = _perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.h.observe(_perf_counter() - self.t0)
+        return False
+
+
+class Histogram:
+    __slots__ = ("name", "labels", "bounds", "counts", "sum")
+    kind = "histogram"
+
+    def __init__(self, name, labels="", buckets=LATENCY_BUCKETS):
+        self.name, self.labels = name, labels
+        self.bounds = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.bounds) + 1)    # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, v):
+        self.counts[bisect_left(self.bounds, v)] += 1   # bucket i holds bounds[i-1] < v <= bounds[i]
+        self.sum += v
+
+    def since(self, t0):
+        """observe(perf_counter() - t0), inlined."""
+        v = _perf_counter() - t0
+        self.counts[bisect_left(self.bounds, v)] += 1
+        self.sum += v
+
+    def time(self):
+        """with h.time(): ...  (a context manager; a little slower than since())."""
+        return _Timer(self)
+
+    def lines(self):
+        counts, total = list(self.counts), self.sum
+        lab = self.labels[1:-1] + "," if self.labels else ""
+        cum = 0
+        for b, c in zip(self.bounds + (float("inf"),), counts):
+            cum += c
+            yield f'{self.name}_bucket{{{lab}le="{_num(b)}"}} {cum}'
+        yield f"{self.name}_sum{self.labels} {_num(total)}"
+        yield f"{self.name}_count{self.labels} {cum}"
+
+
+# ---------- registry ----------
+class Registry:
+    def __init__(self):
+        self._metrics = {}     # (name, labels text) -> metric
+        self._help = {}        # name -> (kind, help)
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, labels, **kw):
+        key = (name, _labels(labels))
+        with self._lock:       # registration only; never on the hot path
+            m = self._metrics.get(key)
+            if m is None:
+                kind, _ = self._help.setdefault(name, (cls.kind, help))
+                if kind != cls.kind:
+                    raise ValueError(f"{name} is already registered as a {kind}")
+                m = self._metrics[key] = cls(name, key[1], **kw)
+            elif not isinstance(m, cls):
+                raise ValueError(f"{name} is already registered as a {m.kind}")
+            return m
+
+    def counter(self, name, help="", labels=None, fn=None) -> Counter:
+        c = self._get(Counter, name, help, labels)
+        if fn is not None:
+            c.fn = fn
+        return c
+
+    def gauge(self, name, help="", labels=None, fn=None) -> Gauge:
+        g = self._get(Gauge, name, help, labels)
+        if fn is not None:
+            g.fn = fn
+        return g
+
+    def histogram(self, name, help="", labels=None, buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            items = sorted(self._metrics.items())
+        out, seen = [], set()
+        for (name, _), m in items:
+            if name not in seen:
+                seen.add(name)
+                kind, help = self._help[name]
+                out.append(f"# HELP {name} {help.replace(chr(92), chr(92) * 2).replace(chr(10), ' ')}")
+                out.append(f"# TYPE {name} {kind}")
+            out.extend(m.lines())
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+class Throttle:
+    """
+    Rate limit for log lines: calling it returns 0 while within `every_s` of the
+    last report, otherwise the number of calls since then (>= 1, truthy).
+        if (n := saved_tick()): print(f"Saved {n} messages, last: {doc}")
+    """
+    __slots__ = ("every", "next", "count")
+
+    def __init__(self, every_s: float = 2.0):
+        self.every, self.next, self.count = every_s, 0.0, 0
+
+    def __call__(self) -> int:
+        self.count += 1
+        now = _monotonic()
+        if now < self.next:
+            return 0
+        self.next = now + self.every
+        n, self.count = self.count, 0
+        return n
+
+
+# ---------- HTTP endpoint ----------
+def _process_metrics(registry: Registry):
+    start = time.time()
+    registry.gauge("process_start_time_seconds", "Start time of the process (unix seconds)").set(start)
+    registry.gauge("process_uptime_seconds", "Seconds since serve() was called",
+                   fn=lambda: time.time() - start)
+    try:
+        import resource
+        scale = 1 if os.uname().sysname == "Darwin" else 1024     # ru_maxrss: bytes on macOS, KiB elsewhere
+        registry.gauge("process_peak_rss_bytes", "Peak resident set size",
+                       fn=lambda: resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale)
+    except ImportError:
+        pass
+    registry.gauge("process_threads", "Live Python threads", fn=threading.active_count)
+
+
+def serve(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY):
+    """Serve registry.render() at http://host:port/metrics on a daemon thread. Returns the server or None."""
+    env = os.environ.get("SIT225_METRICS_PORT")
+    if env:
+        if env.lower() in ("0", "off", "no", "false"):
+            return None
+        port = int(env)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        print(f"[Metrics] endpoint not started on {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    _process_metrics(registry)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"[Metrics] http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+# ---------- bench ----------
+def bench(n: int = 1_000_000):
+    reg = Registry()
+    c = reg.counter("bench_total")
+    g = reg.gauge("bench_depth")
+    h = reg.histogram("bench_seconds")
+    tick = Throttle(2.0)
+    pc = _perf_counter
+
+    def per_op(fn):
+        t0 = pc()
+        fn()
+        return (pc() - t0) / n * 1e9
+
+    def loop_empty():
+        for _ in range(n):
+            pass
+
+    def loop_inc():
+        for _ in range(n):
+            c.inc()
+
+    def loop_set():
+        for i in range(n):
+            g.set(i)
+
+    def loop_observe():
+        for i in range(n):
+            h.observe(i * 1e-9)
+
+    def loop_tick():
+        for _ in range(n):
+            tick()
+
+    def loop_sample():      # what an ingest loop adds per sample
+        for _ in range(n):
+            t0 = pc()
+            c.inc()
+            h.since(t0)
+            tick()
+
+    base = per_op(loop_empty)
+    print(f"{n:,} iterations, loop overhead {base:.0f} ns subtracted")
+    for label, fn in [("counter.inc()", loop_inc), ("gauge.set(v)", loop_set),
+                      ("histogram.observe(v)", loop_observe), ("Throttle()", loop_tick),
+                      ("per sample: inc + since(t0) + Throttle", loop_sample)]:
+        print(f"  {label:<40} {per_op(fn) - base:6.0f} ns")
+    t0 = pc()
+    text = reg.render()
+    print(f"  render() of {len(text.splitlines())} lines: {(pc() - t0) * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="hotmetrics micro-benchmark.")
+    ap.add_argument("--bench", action="store_true")
+    ap.add_argument("-n", type=int, default=1_000_000)
+    args = ap.parse_args()
+    if args.bench:
+        bench(args.n)
+    else:
+        ap.print_help()
@@ -0,0 +1,297 @@
+# streamfilt.py
+"""
+Stateful streaming filters for the gyro / accelerometer streams (SIT225 helper).
+
+Why:
+Every view plotted the raw, noisy IMU values, and smoothing them with pandas
+(rolling/ewm) means recomputing over the whole window on every redraw. These
+filters keep their state between calls instead: each call takes only the new
+samples as one NumPy block of shape (n,) or (n, channels) and returns the
+filtered block of the same shape, continuing exactly where the previous block
+stopped. Splitting a stream into blocks of any size gives the same output as
+filtering it in one go.
+
+Filters (all causal, the first sample primes the state so there is no ramp
+from zero):
+  - EMA(alpha)                  y += alpha * (x - y)
+  - Median(window)              moving median of the last `window` samples
+                                (spike / dropout removal)
+  - Butter(order, cutoff_hz, fs, btype="low")
+                                IIR Butterworth as second-order sections with
+                                the sosfilt state (zi) kept between blocks
+  - Chain(f1, f2, ...)          e.g. median to remove spikes, then EMA
+Non-finite inputs (NaN from a bad parse) are held at the channel's previous
+value, so one bad sample cannot poison an IIR state.
+
+Speed (python streamfilt.py --bench, 3-channel samples, one core of a slow
+1-CPU box; blocks of 500 / one 1M block): EMA 20 / 30 M samples/s, Median(5)
+4.5 / 3.7 M, Median(9) 2.5 / 3.7 M, Butter(4) 9.5 / 30 M. Each call costs a
+fixed ~10-30 us, so filter batches (a redraw, a flush, a Dash frame), not
+single samples. EMA and Median only need NumPy (EMA uses scipy.signal.lfilter
+when it is installed); Butter needs scipy.
+
+Used by 5.2D/live_plot.py, 6.2 HD/real_writer.py and smoothdash.py
+(make_smooth_app(..., stream_filter=...)); the scripts put the repo root on
+sys.path.
+
+API:
+    f = make_filter("median:5+ema:0.2")      # or EMA(0.2), Butter(4, 5.0, fs=50), ...
+    f = make_filter("butter:4:5", fs=50)     # order 4, 5 Hz low-pass
+    y = f(block)                             # (n,) or (n, channels) -> same shape
+    f.reset()                                # forget the state (new recording)
+
+CLI:
+    python streamfilt.py --bench
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from scipy import signal as _signal
+except ImportError:
+    _signal = None
+
+
+class _Filter:
+    """Shape handling and NaN holding; subclasses implement _run(x2d) on float64 (n, channels)."""
+
+    def __init__(self):
+        self._last_in = None      # previous finite input per channel
+
+    def __call__(self, block) -> np.ndarray:
+        x = np.asarray(block, dtype=np.float64)
+        flat = x.ndim == 1
+        if flat:
+            x = x[:, None]
+        if not len(x):
+            return x[:, 0] if flat else x
+        x = self._hold_nonfinite(x)
+        if self._last_in is None:
+            self._prime(x[0])
+        self._last_in = x[-1].copy()
+        y = self._run(x)
+        return y[:, 0] if flat else y
+
+    def _hold_nonfinite(self, x):
+        bad = ~np.isfinite(x)
+        if not bad.any():
+            return x
+        x = x.copy()
+        first = self._last_in
+        if first is None:         # nothing before this block: the channel's first finite value, else 0
+            good = ~bad
+            first = np.where(good.any(axis=0), x[good.argmax(axis=0), np.arange(x.shape[1])], 0.0)
+        rows = np.where(bad, -1, np.arange(len(x))[:, None])
+        np.maximum.accumulate(rows, axis=0, out=rows)       # index of the last good row, -1 = none yet
+        x[bad] = np.where(rows < 0, first[None, :], x[np.maximum(rows, 0), np.arange(x.shape[1])])[bad]
+        return x
+
+    def reset(self):
+        self._last_in = None
+        self._reset_state()
+
+    # subclass hooks
+    def _prime(self, x0: np.ndarray):
+        pass
+
+    def _reset_state(self):
+        pass
+
+    def _run(self, x: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class EMA(_Filter):
+    def __init__(self, alpha: float):
+        super().__init__()
+        if not 0 < alpha <= 1:
+            raise ValueError("EMA alpha must be in (0, 1]")
+        self.alpha = float(alpha)
+        self.y = None
+
+    @classmethod
+    def from_tau(cls, tau_s: float, fs: float) -> "EMA":
+        """Time constant in seconds at sample rate fs."""
+        return cls(1.0 - np.exp(-1.0 / (tau_s * fs)))
+
+    def _prime(self, x0):
+        self.y = x0.copy()
+
+    def _reset_state(self):
+        self.y = None
+
+    def _run(self, x):
+        a, d = self.alpha, 1.0 - self.alpha
+        if d == 0.0:
+            out = x.copy()
+        elif _signal is not None:
+            out, _ = _signal.lfilter([a], [1.0, -d], x, axis=0, zi=(d * self.y)[None, :])
+        else:
+            out = _ema_numpy(x, a, self.y)
+        self.y = out[-1].copy()
+        return out
+
+    def __repr__(self):
+        return f"EMA({self.alpha:g})"
+
+
+def _ema_numpy(x, a, y_prev):
+    """
+    Closed form y[k] = d^(k+1) * (y_prev + a * sum_{j<=k} x[j] / d^(j+1)), in runs
+    short enough (d^L >= 1e-6) that the 1/d^j weights do not cost precision.
+    """
+    d = 1.0 - a
+    run = int(max(1, min(len(x), np.log(1e-6) / np.log(d))))
+    p = d ** np.arange(1, run + 1)[:, None]
+    out = np.empty_like(x)
+    y = y_prev
+    for s in range(0, len(x), run):
+        seg = x[s:s + run]
+        pm = p[:len(seg)]
+        out[s:s + len(seg)] = pm * (y + a * np.cumsum(seg / pm, axis=0))
+        y = out[s + len(seg) - 1]
+    return out
+
+
+class Median(_Filter):
+    def __init__(self, window: int):
+        super().__init__()
+        if window < 1:
+            raise ValueError("Median window must be >= 1")
+        self.window = int(window)
+        self.tail = None          # last window-1 inputs
+
+    def _prime(self, x0):
+        self.tail = np.repeat(x0[None, :], self.window - 1, axis=0)
+
+    def _reset_state(self):
+        self.tail = None
+
+    def _run(self, x):
+        w = self.window
+        if w == 1:
+            return x.copy()
+        buf = np.concatenate([self.tail, x])
+        self.tail = buf[len(buf) - (w - 1):].copy()
+        win = sliding_window_view(buf, w, axis=0)           # (n, channels, w), no copy
+        h = w // 2
+        if w % 2:                                           # partition is ~3x faster than np.median here
+            return np.partition(win, h, axis=-1)[..., h]
+        part = np.partition(win, (h - 1, h), axis=-1)
+        return 0.5 * (part[..., h - 1] + part[..., h])
+
+    def __repr__(self):
+        return f"Median({self.window})"
+
+
+class Butter(_Filter):
+    def __init__(self, order: int, cutoff_hz, fs: float, btype: str = "low"):
+        super().__init__()
+        if _signal is None:
+            raise RuntimeError("Butter needs scipy (pip install scipy); EMA and Median work without it")
+        self.order, self.cutoff_hz, self.fs, self.btype = int(order), cutoff_hz, float(fs), btype
+        self.sos = _signal.butter(self.order, cutoff_hz, btype=btype, fs=self.fs, output="sos")
+        self.zi = None            # (sections, 2, channels)
+
+    def _prime(self, x0):
+        # steady state for a constant input x0 (high-pass: settles to 0 from x0)
+        self.zi = _signal.sosfilt_zi(self.sos)[:, :, None] * x0[None, None, :]
+
+    def _reset_state(self):
+        self.zi = None
+
+    def _run(self, x):
+        out, self.zi = _signal.sosfilt(self.sos, x, axis=0, zi=self.zi)
+        return out
+
+    def __repr__(self):
+        return f"Butter({self.order}, {self.cutoff_hz}, fs={self.fs:g}, {self.btype!r})"
+
+
+class Chain(_Filter):
+    def __init__(self, *filters: _Filter):
+        super().__init__()
+        self.filters = filters
+
+    def _reset_state(self):
+        for f in self.filters:
+            f.reset()
+
+    def _run(self, x):
+        for f in self.filters:
+            x = f(x)
+        return x
+
+    def __repr__(self):
+        return " -> ".join(map(repr, self.filters))
+
+
+def make_filter(spec, fs: Optional[float] = None) -> Optional[_Filter]:
+    """
+    A filter from a config value: None / "" / "none" -> None, a filter object is
+    returned as is, text is "+"-separated stages:
+        "ema:0.2"  "median:5"  "butter:ORDER:CUTOFF_HZ[:low|high]" (needs fs)
+    """
+    if spec is None or isinstance(spec, _Filter):
+        return spec
+    stages = []
+    for part in str(spec).replace(" ", "").lower().split("+"):
+        if part in ("", "none", "raw"):
+            continue
+        name, *args = part.split(":")
+        if name == "ema" and len(args) == 1:
+            stages.append(EMA(float(args[0])))
+        elif name == "median" and len(args) == 1:
+            stages.append(Median(int(args[0])))
+        elif name == "butter" and len(args) in (2, 3):
+            if fs is None:
+                raise ValueError(f"'{part}' needs the sample rate (fs)")
+            stages.append(Butter(int(args[0]), float(args[1]), fs, *args[2:]))
+        else:
+            raise ValueError(f"Unknown filter stage '{part}' (ema:A, median:N, butter:ORDER:HZ)")
+    if not stages:
+        return None
+    return stages[0] if len(stages) == 1 else Chain(*stages)
+
+
+# ---------- bench ----------
+def bench(n: int = 1_000_000, channels: int = 3, block: int = 500):
+    rng = np.random.default_rng(0)
+    x = np.cumsum(rng.normal(size=(n, channels)), axis=0)
+    print(f"{n:,} samples x {channels} channels, scipy {'yes' if _signal is not None else 'no'}")
+    specs = ["ema:0.2", "median:5", "median:9", "median:5+ema:0.2"]
+    if _signal is not None:
+        specs += ["butter:2:5", "butter:4:5"]
+    for spec in specs:
+        for size in (block, n):
+            f = make_filter(spec, fs=50)
+            t0 = time.perf_counter()
+            for s in range(0, n, size):
+                f(x[s:s + size])
+            dt = time.perf_counter() - t0
+            print(f"  {spec:<18} blocks of {size:>9,}: {n / dt / 1e6:6.2f} M samples/s "
+                  f"({n * channels / dt / 1e6:6.1f} M values/s)")
+    # block boundaries do not change the output
+    f1, f2 = make_filter("median:6+ema:0.3"), make_filter("median:6+ema:0.3")
+    head = x[:10_000]
+    whole = f1(head)
+    split = np.concatenate([f2(head[s:s + 337]) for s in range(0, len(head), 337)])
+    print(f"  split vs whole max |diff|: {np.abs(whole - split).max():.2e}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="streamfilt micro-benchmark.")
+    ap.add_argument("--bench", action="store_true")
+    ap.add_argument("-n", type=int, default=1_000_000)
+    ap.add_argument("--block", type=int, default=500)
+    args = ap.parse_args()
+    if args.bench:
+        bench(args.n, block=args.block)
+    else:
+        ap.print_help()
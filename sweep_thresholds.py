@@ -0,0 +1,175 @@
+import argparse, itertools, os, time, numpy as np, pandas as pd, matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from analyze_handwash import load_csvs, class_from_name
+from wash_detect import detect_events, MIN_GAP_S
+
+# Sweep wash-detector thresholds against the quick_rinse / proper_wash labels (SIT225 9.1).
+# Every labelled trace is read once and packed into one shared-memory array
+# (ts, distance_cm); workers attach to it instead of re-reading CSVs. Each
+# detector setting (near/far distance, debounce, minimum duration) runs once
+# per file on a process pool; the compliance cut-off is scored from those
+# durations without re-detecting. A file counts as proper_wash when its
+# longest detected wash is >= the cut-off.
+#
+# Outputs in --outdir:
+#   sweep_ranked.csv   one row per grid point, best first
+#                      (balanced accuracy, then class margin, then |host - device| duration error)
+#   sweep_heatmap.png  best balanced accuracy for each near/far pair
+#
+# Usage:
+#   python sweep_thresholds.py --in figs --outdir figs/out [--workers 4]
+
+ON_CM = np.arange(15.0, 37.5, 2.5)       # near (hands in) threshold
+OFF_CM = np.arange(35.0, 65.0, 5.0)      # far (hands away) threshold
+DEBOUNCE = [1, 2, 3, 4]
+MIN_DUR_S = [0.5, 1.0, 2.0]
+CUT_S = np.arange(10.0, 32.0, 2.0)       # compliance cut-off
+
+_SHM = {}
+
+
+# ---------- shared traces ----------
+def pack_traces(files):
+    """Read every file once -> (shared memory, offsets, labels, device max durations, names)."""
+    parts, labels, device, names = [], [], [], []
+    for p in files:
+        label = class_from_name(p.name)
+        if label == "unlabeled":
+            continue
+        df = pd.read_csv(p)
+        ts = df["ts"].to_numpy(np.float64) if "ts" in df.columns else np.arange(len(df)) * 200.0
+        parts.append(np.column_stack((ts, pd.to_numeric(df["distance_cm"], errors="coerce"))))
+        labels.append(label)
+        if "event" in df.columns and "dur_s" in df.columns:
+            dur = pd.to_numeric(df.loc[df["event"] == "end", "dur_s"], errors="coerce").dropna()
+            device.append(float(dur.max()) if len(dur) else np.nan)
+        else:
+            device.append(np.nan)
+        names.append(p.name)
+    if not parts:
+        return None, None, [], np.zeros(0), []
+    data = np.concatenate(parts)
+    offsets = np.concatenate(([0], np.cumsum([len(x) for x in parts])))
+    shm = shared_memory.SharedMemory(create=True, size=data.nbytes)
+    np.ndarray(data.shape, data.dtype, buffer=shm.buf)[:] = data
+    return shm, offsets, labels, np.array(device), names
+
+
+def _attach(name, shape, offsets):
+    shm = shared_memory.SharedMemory(name=name)
+    _SHM["shm"] = shm   # keep the mapping alive for the worker's lifetime
+    _SHM["data"] = np.ndarray(shape, np.float64, buffer=shm.buf)
+    _SHM["offsets"] = offsets
+
+
+# ---------- scoring ----------
+def _score(setting, proper, device):
+    """All CUT_S rows for one detector setting."""
+    on_cm, off_cm, debounce, min_dur = setting
+    data, off = _SHM["data"], _SHM["offsets"]
+    longest = np.zeros(len(off) - 1)
+    events = np.zeros(len(off) - 1, int)
+    for i in range(len(off) - 1):
+        seg = data[off[i]:off[i + 1]]
+        _, _, dur = detect_events(seg[:, 0], seg[:, 1], on_cm, off_cm, debounce, MIN_GAP_S, min_dur)
+        longest[i] = dur.max() if len(dur) else 0.0
+        events[i] = len(dur)
+
+    quick = ~proper
+    margin = (longest[proper].min() if proper.any() else np.nan) - (longest[quick].max() if quick.any() else np.nan)
+    has_dev = ~np.isnan(device)
+    dur_err = float(np.abs(longest[has_dev] - device[has_dev]).mean()) if has_dev.any() else np.nan
+    missed = int((events == 0).sum())
+
+    pred = longest[None, :] >= CUT_S[:, None]                   # (cuts, files)
+    tpr = (pred & proper).sum(1) / max(1, proper.sum())
+    tnr = (~pred & quick).sum(1) / max(1, quick.sum())
+    rows = []
+    for c, cut in enumerate(CUT_S):
+        rows.append({"on_cm": on_cm, "off_cm": off_cm, "debounce": debounce, "min_dur_s": min_dur,
+                     "cut_s": cut, "balanced_acc": round((tpr[c] + tnr[c]) / 2, 4),
+                     "proper_recall": round(tpr[c], 4), "quick_recall": round(tnr[c], 4),
+                     "margin_s": round(margin, 2), "dur_err_s": round(dur_err, 2), "missed_files": missed})
+    return rows
+
+
+def _score_chunk(job):
+    settings, proper, device = job
+    return [r for s in settings for r in _score(s, proper, device)]
+
+
+def sweep(files, workers=None):
+    shm, offsets, labels, device, names = pack_traces(files)
+    if shm is None:
+        raise SystemExit("No labelled (quick/proper) CSV files found.")
+    proper = np.array([lb == "proper_wash" for lb in labels])
+    settings = [s for s in itertools.product(ON_CM, OFF_CM, DEBOUNCE, MIN_DUR_S) if s[0] < s[1]]
+    workers = workers or os.cpu_count() or 1
+    n_chunks = min(len(settings), 8 * workers)
+    jobs = [(settings[i::n_chunks], proper, device) for i in range(n_chunks)]
+    try:
+        init = (shm.name, (int(offsets[-1]), 2), offsets)
+        if workers <= 1:
+            _attach(*init)
+            rows = [r for j in jobs for r in _score_chunk(j)]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=init) as pool:
+                rows = [r for chunk in pool.map(_score_chunk, jobs) for r in chunk]
+    finally:
+        _SHM.clear()
+        shm.close()
+        shm.unlink()
+    keys = ["balanced_acc", "margin_s", "dur_err_s", "on_cm", "off_cm", "debounce", "min_dur_s", "cut_s"]
+    table = pd.DataFrame(rows).sort_values(keys, ascending=[False, False, True] + [True] * 5,
+                                           na_position="last", kind="stable")
+    return table.reset_index(drop=True), names
+
+
+def plot_heatmap(table, outpng):
+    best = table.pivot_table(index="on_cm", columns="off_cm", values="balanced_acc", aggfunc="max")
+    plt.figure(figsize=(7, 5))
+    plt.imshow(best.values, origin="lower", aspect="auto", cmap="viridis", vmin=0.5, vmax=1.0)
+    plt.colorbar(label="best balanced accuracy")
+    plt.xticks(range(len(best.columns)), [f"{c:g}" for c in best.columns])
+    plt.yticks(range(len(best.index)), [f"{c:g}" for c in best.index])
+    for (i, j), v in np.ndenumerate(best.values):
+        if not np.isnan(v):
+            plt.text(j, i, f"{v:.2f}", ha="center", va="center", fontsize=7, color="w" if v < 0.8 else "k")
+    plt.xlabel("far threshold off_cm (cm)")
+    plt.ylabel("near threshold on_cm (cm)")
+    plt.title("Detector sweep — quick_rinse vs proper_wash")
+    plt.tight_layout()
+    plt.savefig(outpng)
+    plt.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sweep wash-detector thresholds against filename labels.")
+    ap.add_argument("--in", dest="inputs", nargs="+", required=True, help="CSV files and/or folders")
+    ap.add_argument("--outdir", default="figs", help="Output folder for the table and heat-map")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    args = ap.parse_args()
+
+    outdir = Path(args.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    files = load_csvs(args.inputs)
+    if not files:
+        raise SystemExit("No CSV files found.")
+
+    t0 = time.perf_counter()
+    table, names = sweep(files, args.workers)
+    took = time.perf_counter() - t0
+    table.to_csv(outdir / "sweep_ranked.csv", index=False)
+    plot_heatmap(table, outdir / "sweep_heatmap.png")
+
+    print(f"{len(table)} grid points over {len(names)} labelled files in {took:.1f}s")
+    print(table.head(10).to_string(index=False))
+    print("\nSaved outputs in:", outdir.resolve())
+    for f in ["sweep_ranked.csv", "sweep_heatmap.png"]:
+        print(" -", outdir / f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# thumbrender.py
+"""
+Fast headless PNG renderer for saved accelerometer windows (SIT225 8.2C / 8.3D).
+
+Why:
+The recorders built a Plotly figure per saved window and exported it through
+kaleido, which starts a browser renderer, often takes seconds, and falls back
+to a multi-megabyte HTML file when kaleido is missing. This draws the same
+three-axis line chart with matplotlib's Agg backend (Figure + FigureCanvasAgg,
+no pyplot state, safe from worker threads) in roughly 0.1 s per window.
+Batch mode re-renders a whole folder of saved CSVs on a process pool.
+
+Shared by Week 8.2 C and 8.3-D; the scripts put the repo root on sys.path.
+
+API:
+    render_window(rows, png_path, title="")     # rows: [(iso_ts, x, y, z), ...]
+    render_csv(csv_path)                        # -> png next to the CSV
+    render_dir(folder, workers=None, force=False)
+
+CLI:
+    python thumbrender.py "8.3-D/data 2" [--workers 4] [--force] [--pattern "*.csv"]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+COLORS = ("#636efa", "#ef553b", "#00cc96")   # plotly_white defaults, so thumbnails match the live chart
+NAMES = ("X", "Y", "Z")
+
+
+def render_window(rows: Sequence[tuple], png_path, title: str = "",
+                  width: int = 1200, height: int = 500, dpi: int = 100) -> Path:
+    """Draw (timestamp, x, y, z) rows as three lines against seconds from the first sample."""
+    png_path = Path(png_path)
+    ts = np.array([r[0] for r in rows], dtype="datetime64[ms]")
+    vals = np.array([r[1:4] for r in rows], dtype=np.float64).reshape(-1, 3)
+    secs = (ts - ts[0]).astype(np.float64) / 1000.0 if len(ts) else ts.astype(np.float64)
+
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(1, 1, 1)
+    for i in range(3):
+        ax.plot(secs, vals[:, i], color=COLORS[i], linewidth=1.2, label=NAMES[i])
+    start = str(ts[0]).replace("T", " ") if len(ts) else ""
+    ax.set_xlabel(f"time (s from {start})")
+    ax.set_ylabel("accel")
+    ax.set_title(title or png_path.stem, loc="left", fontsize=11)
+    ax.grid(True, color="#e5ecf6", linewidth=0.8)
+    ax.legend(loc="upper right", ncol=3, frameon=False, fontsize=9)
+    for side in ("top", "right"):
+        ax.spines[side].set_visible(False)
+    # fixed margins instead of tight_layout (which draws the figure an extra time);
+    # light zlib compression: a slightly bigger file for a noticeably faster save
+    fig.subplots_adjust(left=0.06, right=0.98, bottom=0.12, top=0.92)
+
+    tmp = png_path.with_suffix(".png.tmp")
+    fig.savefig(tmp, format="png", pil_kwargs={"compress_level": 1})
+    tmp.replace(png_path)   # never leave a half-written PNG for the dashboard to serve
+    return png_path
+
+
+def read_window_csv(csv_path) -> List[tuple]:
+    with Path(csv_path).open(newline="", encoding="utf-8") as f:
+        rd = csv.reader(f)
+        next(rd, None)  # timestamp,x,y,z
+        return [(r[0], *r[1:4]) for r in rd if len(r) >= 4]
+
+
+def render_csv(csv_path, png_path=None, title: str = "") -> Tuple[Path, float]:
+    """Render one saved window CSV; returns (png path, seconds taken)."""
+    t0 = time.perf_counter()
+    csv_path = Path(csv_path)
+    out = render_window(read_window_csv(csv_path), png_path or csv_path.with_suffix(".png"),
+                        title=title or f"Accelerometer window — {csv_path.stem}")
+    return out, time.perf_counter() - t0
+
+
+def _needs_render(csv_path: Path, force: bool) -> bool:
+    png = csv_path.with_suffix(".png")
+    return force or not png.exists() or png.stat().st_mtime < csv_path.stat().st_mtime
+
+
+def render_dir(folder, pattern: str = "*.csv", workers: Optional[int] = None, force: bool = False):
+    """Render every window CSV in `folder` whose PNG is missing or stale (all with force=True)."""
+    todo = [p for p in sorted(Path(folder).glob(pattern))
+            if p.name != "annotations.csv" and _needs_render(p, force)]
+    if not todo:
+        return []
+    workers = workers or min(len(todo), os.cpu_count() or 1)
+    if workers <= 1:
+        return [render_csv(p) for p in todo]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render_csv, todo, chunksize=max(1, len(todo) // (4 * workers))))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Re-render saved accelerometer windows as PNG thumbnails.")
+    ap.add_argument("folder")
+    ap.add_argument("--pattern", default="*.csv")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    ap.add_argument("--force", action="store_true", help="re-render even if the PNG is up to date")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    done = render_dir(args.folder, args.pattern, args.workers, args.force)
+    wall = time.perf_counter() - t0
+    if not done:
+        print("[Render] Nothing to do (all PNGs up to date; use --force to redo).")
+        return
+    per = [s for _, s in done]
+    print(f"[Render] {len(done)} PNGs in {wall:.2f}s | per window: median {np.median(per) * 1000:.0f} ms, "
+          f"max {max(per) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+# timequery.py
+"""
+One time-range query API over every place this repo stores sensor data.
+
+Why:
+Each script had its own loader (load_csv in the 6.2 HD dashboards,
+load_from_mongo / load_from_redis in 5.2D/plot_history.py, Week 5
+csvdownload.py, plain pd.read_csv in weeks 2/3/7/9), and all of them loaded
+everything before filtering by time. Here a source answers
+    (device, start, end, columns) -> DataFrame batches
+and prunes before reading:
+  - CSV folders: chunk files whose name embeds a time (gyro_data_20250903_031955,
+    accel_20250915_170208, 026_20250923003951, ...) are skipped when their
+    span cannot overlap [start, end). A file's span is taken as running from
+    the previous file's name time to the next one's, counting only files of
+    the same device (file-name prefix), which is safe whether a logger names
+    files when it opens or closes them. Hourly partitions from
+    6.2 HD/compact.py are pruned by their manifest time range and replace the
+    CSVs they cover;
+  - MongoDB: the range becomes a {time: {$gte, $lt}} filter plus a
+    projection, streamed from the cursor in batches; read(newest=N) becomes a
+    descending sort + limit(N);
+  - Redis: ZRANGEBYSCORE on the sorted-set index that 5.2D/subscriber.py
+    keeps (REDIS_INDEX), then MGET in batches (ZREVRANGEBYSCORE ... LIMIT for
+    read(newest=N)); without the index, keys (which are the ISO timestamps)
+    are range-filtered before any GET;
+  - Firebase: a live order_by_child(time).start_at().end_at() query, or a JSON
+    export of the same tree.
+
+Every batch has a `time` column (datetime64, naive; timezone-aware stamps are
+converted to UTC) followed by the requested columns. `end` is exclusive.
+
+Shared by 5.2D and Week 5; the scripts put the repo root on sys.path.
+
+API:
+    for batch in query("6.2 HD/data", start="2025-09-03 03:20", end="2025-09-03 03:25"): ...
+    df = read(MongoSource.from_config(config), start=t0, end=t1, columns=["x", "y", "z"])
+    df = read(FirebaseSource(export="export.json", root="Manit/Gyroscope"), start=t0)
+    df = read("week-2", device="accel_data")    # file-name prefix selects a device
+    df = read(MongoSource.from_config(config), newest=5000)   # the last 5000 rows, oldest first
+"""
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+TIME_CANDIDATES = ("timestamp", "ts_iso", "Timestamp", "time", "ts")
+NAME_TIME_RE = re.compile(r"(?<!\d)(\d{8})_?(\d{6})(?!\d)")
+REDIS_INDEX = "gyro:index"      # sorted set: member = key (ts_iso), score = epoch seconds
+BATCH_ROWS = 50_000
+
+
+# ---------- time helpers ----------
+def to_time(v) -> Optional[pd.Timestamp]:
+    """str / datetime / epoch seconds -> naive Timestamp (aware values in UTC); None passes through."""
+    if v is None:
+        return None
+    t = pd.Timestamp(v, unit="s") if isinstance(v, (int, float)) else pd.Timestamp(v)
+    return t.tz_convert("UTC").tz_localize(None) if t.tzinfo is not None else t
+
+
+def parse_times(values) -> pd.Series:
+    s = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(s):
+        t = s.dt.tz_convert("UTC").dt.tz_localize(None) if s.dt.tz is not None else s
+    else:
+        # utc=True: aware stamps land in UTC, naive ones keep their wall-clock time
+        t = pd.to_datetime(s, errors="coerce", format="ISO8601", utc=True)
+        if t.isna().all() and len(s):
+            t = pd.to_datetime(s, errors="coerce", utc=True)
+        t = t.dt.tz_localize(None)
+    return t.astype("datetime64[ms]")
+
+
+def name_time(name: str) -> Optional[pd.Timestamp]:
+    m = NAME_TIME_RE.search(name)
+    if not m:
+        return None
+    try:
+        return pd.to_datetime(m.group(1) + m.group(2), format="%Y%m%d%H%M%S")
+    except ValueError:
+        return None
+
+
+def name_device(name: str) -> str:
+    """File-name prefix before the embedded time (gyro_data, accel); a bare sequence number is no prefix."""
+    m = NAME_TIME_RE.search(name)
+    head = (name[:m.start()] if m else Path(name).stem).rstrip("_- ")
+    return "" if head.isdigit() else head
+
+
+def _finish(df: pd.DataFrame, tcol: Optional[str], start, end, columns) -> pd.DataFrame:
+    """Add `time`, apply the exact row filter, keep the requested columns."""
+    if tcol is not None and tcol in df.columns:
+        t = parse_times(df[tcol]).to_numpy()
+        keep = np.ones(len(df), bool)
+        if start is not None:
+            keep &= t >= np.datetime64(start)
+        if end is not None:
+            keep &= t < np.datetime64(end)
+        df = df.loc[keep].copy()
+        df.insert(0, "time", t[keep])
+    elif "time" not in df.columns:
+        df = df.copy()
+        df.insert(0, "time", pd.NaT)
+    cols = ["time"] + [c for c in (columns or df.columns) if c != "time" and c in df.columns]
+    return df[cols].reset_index(drop=True)
+
+
+# ---------- CSV folders ----------
+class CsvSource:
+    """A folder (or glob, or single file) of CSVs, optionally with compact.py partitions."""
+    def __init__(self, path, pattern: str = "*.csv", time_col: Optional[str] = None):
+        path = Path(path)
+        if any(ch in path.name for ch in "*?["):
+            path, pattern = path.parent, path.name
+        self.path = path
+        self.pattern = pattern
+        self.time_col = time_col
+
+    def _units(self, device):
+        """[(lo, hi, exact, kind, path, device)] sorted by time; None bounds = unknown."""
+        if self.path.is_file():
+            return [(None, None, False, "csv", self.path, "")]
+        units, covered = [], set()
+        manifest = self.path / "compacted" / "manifest.json"
+        if manifest.exists():
+            m = json.loads(manifest.read_text(encoding="utf-8"))
+            exact = "timestamp" in (m.get("columns") or [])
+            for e in m["partitions"].values():
+                covered.update(e["sources"])
+                if device and not e["sort_key"].startswith(device):
+                    continue
+                units.append((to_time(e["t_first"]), to_time(e["t_last"]), exact, "npz",
+                              manifest.parent / e["file"], name_device(e["sort_key"])))
+        for p in self.path.glob(self.pattern):
+            if p.name in covered or p.name == "annotations.csv" or (device and not p.name.startswith(device)):
+                continue
+            t = name_time(p.name)
+            units.append((t, t, False, "csv", p, name_device(p.name)))
+        units.sort(key=lambda u: (u[0] is None, u[0] or pd.Timestamp.min, u[4].name))
+        return units
+
+    def files(self, device=None, start=None, end=None) -> List[tuple]:
+        """(kind, path) of every unit that can hold rows in [start, end)."""
+        start, end = to_time(start), to_time(end)
+        units = self._units(device)
+        prev, nxt, last = {}, {}, {}    # neighbours within the same device
+        for i, u in enumerate(units):
+            if u[5] in last:
+                prev[i], nxt[last[u[5]]] = last[u[5]], i
+            last[u[5]] = i
+        out = []
+        for i, (lo, hi, exact, kind, path, _) in enumerate(units):
+            if lo is None:
+                out.append((kind, path))
+                continue
+            if not exact:   # widen to the neighbours' name times
+                lo = units[prev[i]][1] if i in prev else None
+                hi = units[nxt[i]][0] if i in nxt else None
+            if (end is not None and lo is not None and lo >= end) or (start is not None and hi is not None and hi < start):
+                continue
+            out.append((kind, path))
+        return out
+
+    def batches(self, device=None, start=None, end=None, columns=None, batch_rows=BATCH_ROWS):
+        start, end = to_time(start), to_time(end)
+        for kind, path in self.files(device, start, end):
+            if kind == "npz":
+                with np.load(path, allow_pickle=False) as z:
+                    names = [str(c) for c in z["__columns__"]]
+                    df = pd.DataFrame({c: z[c] for c in names})
+                parts = [df]
+            else:
+                parts = pd.read_csv(path, chunksize=batch_rows)
+            for df in parts:
+                df.columns = [c.strip() for c in df.columns]
+                tcol = self.time_col or next((c for c in TIME_CANDIDATES if c in df.columns), None)
+                out = _finish(df, tcol, start, end, columns)
+                if len(out):
+                    yield out
+
+
+# ---------- MongoDB ----------
+class MongoSource:
+    def __init__(self, uri, db, collection, time_field="ts_iso", device_field="device", client=None):
+        self.uri, self.db, self.collection = uri, db, collection
+        self.time_field, self.device_field = time_field, device_field
+        self._client = client
+
+    @classmethod
+    def from_config(cls, config, **kw):
+        return cls(config.MONGO_URI, config.MONGO_DB, config.MONGO_COLLECTION, **kw)
+
+    def filter(self, device=None, start=None, end=None) -> dict:
+        """The pushed-down predicate. ts_iso is stored as UTC ISO text, which sorts like time."""
+        q, rng = {}, {}
+        start, end = to_time(start), to_time(end)
+        if start is not None:
+            rng["$gte"] = _iso_utc(start)
+        if end is not None:
+            rng["$lt"] = _iso_utc(end)
+        if rng:
+            q[self.time_field] = rng
+        if device:
+            q[self.device_field] = device
+        return q
+
+    def batches(self, device=None, start=None, end=None, columns=None, batch_rows=BATCH_ROWS, newest=None):
+        start, end = to_time(start), to_time(end)
+        client = self._client
+        if client is None:
+            from pymongo import MongoClient
+            client = MongoClient(self.uri)
+        try:
+            proj = {"_id": 0}
+            if columns:
+                proj.update({c: 1 for c in [self.time_field, *columns]})
+            cur = client[self.db][self.collection].find(self.filter(device, start, end), proj)
+            if newest:   # walk the time index backwards, then hand the rows out oldest first
+                rows = list(cur.sort(self.time_field, -1).limit(int(newest)))[::-1]
+            else:
+                rows = cur.sort(self.time_field, 1).batch_size(min(batch_rows, 10_000))
+            yield from _rows_to_batches(rows, self.time_field, None, None, columns, batch_rows)
+        finally:
+            if self._client is None:
+                client.close()
+
+
+def _iso_utc(t: pd.Timestamp) -> str:
+    # subscriber.py writes datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+    return t.strftime("%Y-%m-%dT%H:%M:%S.") + f"{t.microsecond // 1000:03d}+00:00"
+
+
+def _rows_to_batches(rows, tcol, start, end, columns, batch_rows) -> Iterator[pd.DataFrame]:
+    buf = []
+    for r in rows:
+        buf.append(r)
+        if len(buf) >= batch_rows:
+            out = _finish(pd.DataFrame(buf), tcol, start, end, columns)
+            buf = []
+            if len(out):
+                yield out
+    if buf:
+        out = _finish(pd.DataFrame(buf), tcol, start, end, columns)
+        if len(out):
+            yield out
+
+
+# ---------- Redis ----------
+class RedisSource:
+    """Keys are ts_iso strings holding JSON docs (5.2D/subscriber.py)."""
+    def __init__(self, client=None, index=REDIS_INDEX, config=None):
+        self._client = client
+        self._config = config
+        self.index = index
+
+    @classmethod
+    def from_config(cls, config, **kw):
+        return cls(config=config, **kw)
+
+    def _connect(self):
+        if self._client is not None:
+            return self._client
+        import redis
+        c = self._config
+        for ssl_flag in (True, False):   # TLS first, plain as fallback (Windows OpenSSL quirk)
+            try:
+                r = redis.Redis(host=c.REDIS_HOST, port=int(c.REDIS_PORT), username=getattr(c, "REDIS_USER", None),
+                                password=c.REDIS_PASS, ssl=ssl_flag, ssl_cert_reqs=None, socket_timeout=3)
+                r.ping()
+                self._client = r
+                return r
+            except Exception:
+                if not ssl_flag:
+                    raise
+        return None
+
+    def keys(self, start=None, end=None, newest=None) -> List[str]:
+        """Keys in [start, end) in time order; newest=N keeps the last N."""
+        r = self._connect()
+        start, end = to_time(start), to_time(end)
+        if r.exists(self.index):
+            lo = start.timestamp() if start is not None else "-inf"
+            hi = f"({end.timestamp()}" if end is not None else "+inf"
+            if newest:
+                return [_text(k) for k in r.zrevrangebyscore(self.index, hi, lo, start=0, num=int(newest))][::-1]
+            return [_text(k) for k in r.zrangebyscore(self.index, lo, hi)]
+        keys = sorted(_text(k) for k in r.scan_iter(count=1000) if _text(k) != self.index)
+        lo = _iso_utc(start) if start is not None else None
+        hi = _iso_utc(end) if end is not None else None
+        keys = [k for k in keys if (lo is None or k >= lo) and (hi is None or k < hi)]
+        return keys[-int(newest):] if newest else keys
+
+    def batches(self, device=None, start=None, end=None, columns=None, batch_rows=BATCH_ROWS, newest=None):
+        start, end = to_time(start), to_time(end)
+        r = self._connect()
+        # the device is only known after the GET, so with one the limit is applied by read()
+        keys = self.keys(start, end, newest=None if device else newest)
+
+        def docs():
+            for i in range(0, len(keys), 1000):
+                for k, v in zip(keys[i:i + 1000], r.mget(keys[i:i + 1000])):
+                    if not v:
+                        continue
+                    try:
+                        d = json.loads(v)
+                    except ValueError:
+                        continue
+                    if device and d.get("device", device) != device:
+                        continue
+                    d.setdefault("ts_iso", k)
+                    yield d
+        yield from _rows_to_batches(docs(), "ts_iso", start, end, columns, batch_rows)
+
+
+def _text(k):
+    return k.decode() if isinstance(k, bytes) else k
+
+
+# ---------- Firebase ----------
+class FirebaseSource:
+    """
+    Realtime Database tree of push-id -> {"timestamp": iso, "data": {x, y, z}} (Week 5).
+    Either live (firebase_admin already initialised) or from a JSON export of that tree.
+    """
+    def __init__(self, root="Manit/Gyroscope", export=None, time_field="timestamp"):
+        self.root = root.strip("/")
+        self.export = Path(export) if export else None
+        self.time_field = time_field
+
+    def _snapshot(self, device, start, end):
+        if self.export is not None:
+            data = json.loads(self.export.read_text(encoding="utf-8"))
+            for part in self.root.split("/") if self.root else []:
+                if isinstance(data, dict) and part in data:
+                    data = data[part]
+            return data.get(device, {}) if device and isinstance(data, dict) else data
+        from firebase_admin import db
+        ref = db.reference(f"{self.root}/{device}" if device else self.root)
+        if start is None and end is None:
+            return ref.get()
+        q = ref.order_by_child(self.time_field)
+        if start is not None:
+            q = q.start_at(start.isoformat())
+        if end is not None:
+            q = q.end_at(end.isoformat())
+        try:
+            return q.get()
+        except Exception:   # no ".indexOn" rule for the field: read everything, filter below
+            return ref.get()
+
+    def batches(self, device=None, start=None, end=None, columns=None, batch_rows=BATCH_ROWS):
+        start, end = to_time(start), to_time(end)
+        data = self._snapshot(device, start, end) or {}
+
+        def rows():
+            for item in (data.values() if isinstance(data, dict) else data):
+                if not isinstance(item, dict) or self.time_field not in item:
+                    continue
+                row = {self.time_field: item[self.time_field]}
+                row.update(item.get("data") if isinstance(item.get("data"), dict) else
+                           {k: v for k, v in item.items() if k != self.time_field})
+                yield row
+        yield from _rows_to_batches(rows(), self.time_field, start, end, columns, batch_rows)
+
+
+# ---------- entry points ----------
+def open_source(source):
+    if hasattr(source, "batches"):
+        return source
+    p = Path(source)
+    if p.suffix.lower() == ".json":
+        return FirebaseSource(root="", export=p)
+    return CsvSource(p)
+
+
+def query(source, device: Optional[str] = None, start=None, end=None,
+          columns: Optional[Sequence[str]] = None, batch_rows: int = BATCH_ROWS) -> Iterator[pd.DataFrame]:
+    """Stream DataFrame batches (time + columns) with start <= time < end."""
+    yield from open_source(source).batches(device, start, end, list(columns) if columns else None, batch_rows)
+
+
+def read(source, device=None, start=None, end=None, columns=None, newest: Optional[int] = None) -> pd.DataFrame:
+    """All rows with start <= time < end; newest=N keeps only the last N (pushed down for Mongo and Redis)."""
+    src = open_source(source)
+    if newest and isinstance(src, (MongoSource, RedisSource)):
+        parts = list(src.batches(device, start, end, list(columns) if columns else None, newest=newest))
+    else:
+        parts = list(query(src, device, start, end, columns))
+    if not parts:
+        return pd.DataFrame(columns=["time", *(columns or [])])
+    df = pd.concat(parts, ignore_index=True)
+    return df.tail(int(newest)).reset_index(drop=True) if newest else df
@@ -0,0 +1,208 @@
+import argparse, os, tempfile, time, numpy as np, pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Host-side wash-event detector (SIT225 9.1).
+# The logs keep the raw distance_cm trace next to the event/dur_s columns the
+# device emitted. If the on-device threshold was wrong, recompute the events
+# here instead of re-recording: hysteresis on distance (hands in below ON_CM,
+# away above OFF_CM), each transition debounced over DEBOUNCE consecutive
+# samples, washes closer than MIN_GAP_S merged and washes shorter than
+# MIN_DUR_S dropped. Everything is array operations, no per-sample loop.
+#
+# Output schema matches the device: event = none/start/running/end and dur_s on
+# the end row (time from start to the last in-zone sample).
+#
+# Usage:
+#   python wash_detect.py --in figs --compare               # device vs host durations
+#   python wash_detect.py --in figs --out figs/redetected   # rewrite event/dur_s
+#   python analyze_handwash.py --in figs --redetect         # analyze with host events
+#   python wash_detect.py --bench 2000                      # synthetic sessions
+
+ON_CM = 25.0       # hands in the basin
+OFF_CM = 50.0      # hands clearly away
+DEBOUNCE = 2       # consecutive samples needed to switch state
+MIN_GAP_S = 1.0    # a re-entry sooner than this continues the same wash
+MIN_DUR_S = 1.0    # shorter washes are noise
+
+
+def _run_end(mask, n):
+    """True at index i when mask[i-n+1..i] are all True."""
+    if n <= 1:
+        return mask
+    c = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+    out = np.zeros(len(mask), bool)
+    out[n - 1:] = (c[n:] - c[:-n]) == n
+    return out
+
+
+def detect_events(ts_ms, dist_cm, on_cm=ON_CM, off_cm=OFF_CM, debounce=DEBOUNCE,
+                  min_gap_s=MIN_GAP_S, min_dur_s=MIN_DUR_S):
+    """
+    Returns (starts, ends, dur_s): sample indices of start/end events and each
+    wash's duration. ts_ms and dist_cm are 1-D arrays of equal length.
+    """
+    ts = np.asarray(ts_ms, dtype=np.float64)
+    d = np.asarray(dist_cm, dtype=np.float64)
+    n = len(d)
+    if n == 0:
+        return np.zeros(0, int), np.zeros(0, int), np.zeros(0)
+    near = d < on_cm                                    # NaN compares False on both sides
+    go_in = _run_end(near, debounce)
+    go_out = _run_end(d > off_cm, debounce)
+
+    # hysteresis: last switch wins, forward-filled (0 = away, 1 = in)
+    code = np.where(go_in, 1, np.where(go_out, 0, -1))
+    idx = np.where(code >= 0, np.arange(n), 0)
+    np.maximum.accumulate(idx, out=idx)
+    state = np.where(code[idx] >= 0, code[idx], 0)
+    state[: np.argmax(code >= 0) if (code >= 0).any() else n] = 0
+
+    edge = np.diff(np.concatenate(([0], state)))
+    starts = np.flatnonzero(edge == 1)
+    ends = np.flatnonzero(edge == -1)
+    if len(ends) < len(starts):                          # log stopped mid-wash: end on the last row
+        ends = np.append(ends, n - 1)
+
+    # duration: start to the last in-zone sample before the end
+    near_idx = np.where(near, np.arange(n), -1)
+    np.maximum.accumulate(near_idx, out=near_idx)
+    last_in = near_idx[np.maximum(ends - 1, 0)]
+
+    if len(starts) > 1 and min_gap_s > 0:
+        # merge: drop an end and the following start when the gap is short
+        gap = (ts[starts[1:]] - ts[last_in[:-1]]) / 1000.0
+        keep = np.concatenate((gap >= min_gap_s, [True]))
+        starts = starts[np.concatenate(([True], keep[:-1]))]
+        ends, last_in = ends[keep], last_in[keep]
+
+    dur = (ts[last_in] - ts[starts]) / 1000.0
+    ok = dur >= min_dur_s
+    return starts[ok], ends[ok], dur[ok]
+
+
+def detect_params(**overrides):
+    """The settings detect_events() runs with: its defaults, then the overrides (a cache key)."""
+    params = {"on_cm": ON_CM, "off_cm": OFF_CM, "debounce": DEBOUNCE,
+              "min_gap_s": MIN_GAP_S, "min_dur_s": MIN_DUR_S}
+    unknown = set(overrides) - set(params)
+    if unknown:
+        raise TypeError(f"unknown detector setting(s): {', '.join(sorted(unknown))}")
+    params.update(overrides)
+    return params
+
+
+def redetect(df, **params):
+    """Copy of a session DataFrame with event/dur_s recomputed from distance_cm."""
+    out = df.copy()
+    n = len(out)
+    ts = out["ts"].to_numpy(np.float64) if "ts" in out.columns else np.arange(n) * 200.0
+    starts, ends, dur = detect_events(ts, pd.to_numeric(out["distance_cm"], errors="coerce"), **params)
+    inside = np.zeros(n + 1, np.int64)
+    np.add.at(inside, starts, 1)
+    np.add.at(inside, ends, -1)
+    running = np.cumsum(inside[:n]) > 0
+    event = np.where(running, "running", "none").astype(object)
+    event[starts] = "start"
+    event[ends] = "end"
+    dur_s = np.full(n, np.nan)
+    dur_s[ends] = np.round(dur, 1)
+    out["event"] = event
+    out["dur_s"] = dur_s
+    return out
+
+
+def _device_durations(df):
+    if "event" not in df.columns or "dur_s" not in df.columns:
+        return []
+    return pd.to_numeric(df.loc[df["event"] == "end", "dur_s"], errors="coerce").dropna().tolist()
+
+
+def process_file(path, out_dir=None, params=None):
+    """Redetect one CSV; optionally write it to out_dir. Returns (name, device durs, host durs)."""
+    path = Path(path)
+    df = pd.read_csv(path)
+    new = redetect(df, **(params or {}))
+    if out_dir is not None:
+        new.to_csv(Path(out_dir) / path.name, index=False)
+    return path.name, _device_durations(df), _device_durations(new)
+
+
+def process_files(files, out_dir=None, params=None, workers=None):
+    if out_dir is not None:
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
+    workers = workers or min(len(files), os.cpu_count() or 1)
+    args = [(f, out_dir, params) for f in files]
+    if workers <= 1:
+        return [process_file(*a) for a in args]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(process_file, *zip(*args), chunksize=max(1, len(files) // (4 * workers))))
+
+
+def _synthetic_session(rng, n_washes=3):
+    parts, ts0 = [], 0
+    for _ in range(n_washes):
+        idle = rng.integers(20, 60)
+        wash = rng.integers(25, 150)
+        parts += [rng.normal(55, 2, idle), np.linspace(50, 18, 8),
+                  rng.uniform(5, 24, wash), np.linspace(24, 55, 8)]
+    d = np.round(np.concatenate(parts + [rng.normal(55, 2, 20)]), 1)
+    return pd.DataFrame({"ts": np.arange(len(d)) * 200, "distance_cm": d,
+                         "pir": (d < 45).astype(int), "event": "none", "dur_s": np.nan})
+
+
+def bench(n_files, workers=None):
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for i in range(n_files):
+            _synthetic_session(rng).to_csv(tmp / f"sim_{i:05d}.csv", index=False)
+        files = sorted(tmp.glob("*.csv"))
+        rows = sum(1 for f in files for _ in open(f)) - len(files)
+        t0 = time.perf_counter()
+        res = process_files(files, workers=workers)
+        took = time.perf_counter() - t0
+    events = sum(len(h) for _, _, h in res)
+    print(f"{n_files} files, {rows:,} samples, {events} washes in {took:.2f}s "
+          f"({took / n_files * 1000:.2f} ms/file incl. CSV read)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Recompute wash start/end events from distance_cm.")
+    ap.add_argument("--in", dest="inputs", nargs="+", help="CSV files and/or folders")
+    ap.add_argument("--out", default=None, help="folder for rewritten CSVs")
+    ap.add_argument("--compare", action="store_true", help="print device vs host durations per file")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    ap.add_argument("--on-cm", type=float, default=ON_CM)
+    ap.add_argument("--off-cm", type=float, default=OFF_CM)
+    ap.add_argument("--debounce", type=int, default=DEBOUNCE)
+    ap.add_argument("--min-gap-s", type=float, default=MIN_GAP_S)
+    ap.add_argument("--min-dur-s", type=float, default=MIN_DUR_S)
+    ap.add_argument("--bench", type=int, default=0, metavar="N", help="time N synthetic sessions and exit")
+    args = ap.parse_args()
+
+    if args.bench:
+        bench(args.bench, args.workers)
+        return
+    if not args.inputs:
+        ap.error("--in is required (or use --bench)")
+
+    from analyze_handwash import load_csvs
+    files = load_csvs(args.inputs)
+    if not files:
+        raise SystemExit("No CSV files found.")
+    params = dict(on_cm=args.on_cm, off_cm=args.off_cm, debounce=args.debounce,
+                  min_gap_s=args.min_gap_s, min_dur_s=args.min_dur_s)
+    t0 = time.perf_counter()
+    res = process_files(files, args.out, params, args.workers)
+    print(f"Redetected {len(files)} file(s) in {time.perf_counter() - t0:.2f}s")
+    if args.compare or args.out is None:
+        print(f"{'file':<24}{'device':>20}{'host':>20}")
+        for name, dev, host in res:
+            print(f"{name:<24}{str([round(x, 1) for x in dev]):>20}{str([round(x, 1) for x in host]):>20}")
+    if args.out:
+        print("Saved redetected CSVs in:", Path(args.out).resolve())
+
+
+if __name__ == "__main__":
+    main()
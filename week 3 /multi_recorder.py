@@ -0,0 +1,311 @@
+# multi_recorder.py
+# SIT225 — record many Arduino Cloud Things from ONE process on ONE asyncio loop.
+#
+# csv_file_creator.py runs one ArduinoCloudClient per process and blocks in
+# client.start(). Here every device listed in a JSON config gets its own client
+# (or MQTT subscription) on a shared event loop; values are aligned into rows
+# per device (cloudalign.CloudAligner), buffered, and written to one CSV per
+# device in batches. Every REPORT_S seconds a line per device shows rows,
+# rate and lag (source time -> row flushed to the CSV).
+#
+# Backends:
+#   cloud  ArduinoCloudClient.run() per device, all gathered on one loop
+#   mqtt   one paho-mqtt connection driven by the asyncio loop; topics
+#          <prefix>/<device_id>/<variable>, payload {"value": v, "ts": epoch} or a bare number
+#   sim    no network: a simulator feeds the aligners directly
+#
+# Run:
+#   python multi_recorder.py devices.json                         # Arduino Cloud
+#   python multi_recorder.py devices.json --backend mqtt --simulate --duration 30
+#   python multi_recorder.py devices.json --backend sim --rate 20 --duration 10
+
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # shared helpers at the repo root
+from cloudalign import CloudAligner
+
+REPORT_S = 5.0
+
+
+# ---------- sinks & metrics ----------
+class BatchedCsvSink:
+    """
+    Append rows to one CSV, writing every flush_rows rows or flush_s seconds.
+    on_written(src_times) is called after each batch is flushed to the file.
+    """
+    def __init__(self, path: Path, columns, flush_rows=50, flush_s=2.0, on_written=None):
+        self.path = Path(path)
+        self.columns = ["timestamp", *columns]
+        self.flush_rows = flush_rows
+        self.flush_s = flush_s
+        self.on_written = on_written
+        self.rows = []
+        self.src_times = []
+        self.last_flush = time.monotonic()
+        self.written = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._header = not self.path.exists() or self.path.stat().st_size == 0
+
+    def add(self, row, src_t=None):
+        self.rows.append(row)
+        self.src_times.append(src_t)
+        if len(self.rows) >= self.flush_rows:
+            self.flush()
+
+    def due(self):
+        return self.rows and time.monotonic() - self.last_flush >= self.flush_s
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.rows:
+            return
+        with self.path.open("a", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            if self._header:
+                w.writerow(self.columns)
+                self._header = False
+            w.writerows(self.rows)
+        self.written += len(self.rows)
+        src_times, self.rows, self.src_times = self.src_times, [], []
+        if self.on_written is not None:
+            self.on_written(src_times)
+
+
+class DeviceMetrics:
+    def __init__(self):
+        self.rows = 0
+        self._rows_at_report = 0
+        self._t_report = time.monotonic()
+        self._lags = []
+
+    def sample(self):
+        self.rows += 1
+
+    def written(self, src_times):
+        now = time.time()
+        self._lags.extend(now - t for t in src_times if t is not None)
+
+    def report(self):
+        now = time.monotonic()
+        rate = (self.rows - self._rows_at_report) / max(1e-9, now - self._t_report)
+        lags = sorted(self._lags)
+        self._rows_at_report, self._t_report, self._lags = self.rows, now, []
+        if not lags:
+            return f"rows={self.rows} rate={rate:.1f}/s lag=—"
+        p50 = lags[len(lags) // 2] * 1000
+        return f"rows={self.rows} rate={rate:.1f}/s lag p50={p50:.0f} ms max={lags[-1] * 1000:.0f} ms"
+
+
+class Device:
+    def __init__(self, spec, out_dir: Path, flush_rows, flush_s):
+        self.name = spec.get("name") or spec["device_id"][:8]
+        self.device_id = spec["device_id"]
+        self.secret_key = spec.get("secret_key") or os.environ.get(spec.get("secret_key_env", ""), "")
+        self.variables = list(spec["variables"])
+        self.metrics = DeviceMetrics()
+        self.sink = BatchedCsvSink(out_dir / f"{self.name}.csv", self.variables, flush_rows, flush_s,
+                                   on_written=self.metrics.written)
+        self.aligner = CloudAligner({v: v for v in self.variables},
+                                    tolerance_s=float(spec.get("tolerance_s", 30.0)),
+                                    on_sample=self._on_row)
+
+    def _on_row(self, t, *values):
+        ts = datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        self.metrics.sample()
+        self.sink.add([ts, *values], src_t=t)
+
+    def status(self):
+        a = self.aligner
+        return (f"{self.name:>12}: {self.metrics.report()} | written={self.sink.written} "
+                f"overwritten={a.overwritten} dropped={a.dropped}")
+
+
+# ---------- backends ----------
+async def run_cloud(devices, interval=1.0, backoff=1.2):
+    from arduino_iot_cloud import ArduinoCloudClient
+    runs = []
+    for d in devices:
+        client = ArduinoCloudClient(device_id=d.device_id, username=d.device_id, password=d.secret_key)
+        d.aligner.register(client)
+        runs.append(client.run(interval, backoff))
+        print(f"[Cloud] {d.name}: registered {', '.join(d.variables)}")
+    await asyncio.gather(*runs)
+
+
+class AsyncMqtt:
+    """paho-mqtt client whose socket I/O runs on the asyncio loop (no paho network thread)."""
+    def __init__(self, loop, client_id=""):
+        import paho.mqtt.client as mqtt
+        self.loop = loop
+        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id)
+        self.client.on_socket_open = self._on_socket_open
+        self.client.on_socket_close = self._on_socket_close
+        self.client.on_socket_register_write = self._on_register_write
+        self.client.on_socket_unregister_write = self._on_unregister_write
+        self.connected = asyncio.Event()
+        self.client.on_connect = lambda *a: self.loop.call_soon(self.connected.set)
+        self._misc = None
+
+    def _on_socket_open(self, client, userdata, sock):
+        self.loop.add_reader(sock, client.loop_read)
+        self._misc = self.loop.create_task(self._misc_loop())
+
+    def _on_socket_close(self, client, userdata, sock):
+        self.loop.remove_reader(sock)
+        if self._misc is not None:
+            self._misc.cancel()
+
+    def _on_register_write(self, client, userdata, sock):
+        self.loop.add_writer(sock, client.loop_write)
+
+    def _on_unregister_write(self, client, userdata, sock):
+        self.loop.remove_writer(sock)
+
+    async def _misc_loop(self):
+        while self.client.loop_misc() == 0:   # keepalive pings, timeouts
+            await asyncio.sleep(1.0)
+
+    async def connect(self, host, port, keepalive=30):
+        self.client.connect(host, port, keepalive)
+        await asyncio.wait_for(self.connected.wait(), timeout=10)
+
+    def disconnect(self):
+        self.client.disconnect()
+
+
+async def run_mqtt(devices, host, port, prefix):
+    loop = asyncio.get_running_loop()
+    by_id = {d.device_id: d for d in devices}
+
+    def on_message(_client, _userdata, msg):
+        parts = msg.topic.split("/")
+        d = by_id.get(parts[-2]) if len(parts) >= 2 else None
+        if d is None or parts[-1] not in d.variables:
+            return
+        try:
+            data = json.loads(msg.payload)
+        except ValueError:
+            return
+        if isinstance(data, dict):
+            d.aligner.feed(parts[-1], data.get("value"), t=data.get("ts"))
+        else:
+            d.aligner.feed(parts[-1], data)
+
+    sub = AsyncMqtt(loop, client_id=f"sit225-recorder-{os.getpid()}")
+    sub.client.on_message = on_message
+    await sub.connect(host, port)
+    sub.client.subscribe(f"{prefix}/+/+", qos=0)
+    print(f"[MQTT] subscribed to {prefix}/+/+ on {host}:{port} for {len(devices)} devices")
+    try:
+        await asyncio.Event().wait()   # runs until cancelled
+    finally:
+        sub.disconnect()
+
+
+# ---------- simulator ----------
+async def simulate(devices, publish, rate_hz):
+    """Random-walk values for every device variable, `rate_hz` readings per device per second."""
+    walk = {(d.device_id, v): random.uniform(20, 40) for d in devices for v in d.variables}
+    period = 1.0 / rate_hz
+    k = 0
+    while True:
+        t = time.time()
+        for d in devices:
+            for v in d.variables:
+                walk[d.device_id, v] += random.gauss(0, 0.1) + 0.05 * math.sin(k / 50)
+                publish(d, v, round(walk[d.device_id, v], 3), t)
+        k += 1
+        await asyncio.sleep(period)
+
+
+async def mqtt_publisher(devices, host, port, prefix, rate_hz):
+    pub = AsyncMqtt(asyncio.get_running_loop(), client_id=f"sit225-sim-{os.getpid()}")
+    await pub.connect(host, port)
+
+    def publish(d, var, value, t):
+        pub.client.publish(f"{prefix}/{d.device_id}/{var}", json.dumps({"value": value, "ts": t}), qos=0)
+    try:
+        await simulate(devices, publish, rate_hz)
+    finally:
+        pub.disconnect()
+
+
+# ---------- main ----------
+async def housekeeping(devices):
+    last_report = time.monotonic()
+    while True:
+        await asyncio.sleep(0.25)
+        for d in devices:
+            if d.sink.due():
+                d.sink.flush()
+        if time.monotonic() - last_report >= REPORT_S:
+            last_report = time.monotonic()
+            print(f"[{datetime.now():%H:%M:%S}] " + f"\n{'':11}".join(d.status() for d in devices))
+
+
+async def amain(args, cfg):
+    out_dir = Path(cfg.get("out_dir", "recordings"))
+    if not out_dir.is_absolute():
+        out_dir = Path(args.config).resolve().parent / out_dir
+    devices = [Device(spec, out_dir, cfg.get("flush_rows", 50), cfg.get("flush_s", 2.0)) for spec in cfg["devices"]]
+    backend = args.backend or cfg.get("backend", "cloud")
+    mq = cfg.get("mqtt", {})
+    host, port, prefix = mq.get("host", "127.0.0.1"), int(mq.get("port", 1883)), mq.get("topic_prefix", "sit225")
+    print(f"[Init] {len(devices)} devices | backend={backend} | writing to {out_dir}")
+
+    tasks = [asyncio.create_task(housekeeping(devices))]
+    if backend == "cloud":
+        tasks.append(asyncio.create_task(run_cloud(devices)))
+    elif backend == "mqtt":
+        tasks.append(asyncio.create_task(run_mqtt(devices, host, port, prefix)))
+        if args.simulate:
+            tasks.append(asyncio.create_task(mqtt_publisher(devices, host, port, prefix, args.rate)))
+    elif backend == "sim":
+        tasks.append(asyncio.create_task(
+            simulate(devices, lambda d, v, value, t: d.aligner.feed(v, value, t=t), args.rate)))
+    else:
+        raise SystemExit(f"Unknown backend: {backend}")
+
+    try:
+        if args.duration:
+            done, _ = await asyncio.wait(tasks, timeout=args.duration, return_when=asyncio.FIRST_EXCEPTION)
+        else:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for t in done:
+            t.result()   # surface a crashed backend
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for d in devices:
+            d.sink.flush()
+            print(f"[Done] {d.status()}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Record many Arduino Cloud devices on one asyncio loop.")
+    ap.add_argument("config", help="JSON file listing devices and their variables")
+    ap.add_argument("--backend", choices=["cloud", "mqtt", "sim"], help="overrides the config's backend")
+    ap.add_argument("--simulate", action="store_true", help="mqtt backend: also publish simulated readings")
+    ap.add_argument("--rate", type=float, default=5.0, help="simulated readings per device per second")
+    ap.add_argument("--duration", type=float, default=0, help="stop after N seconds (0 = run until Ctrl+C)")
+    args = ap.parse_args()
+    cfg = json.loads(Path(args.config).read_text(encoding="utf-8"))
+    try:
+        asyncio.run(amain(args, cfg))
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# SIT225 7.1P — scenario grid + bootstrap confidence intervals for the DHT22 regression
+#
+# python_script.py fits three single-feature models through sklearn and prints
+# point estimates. This evaluates a whole grid of scenarios
+#     filter   none | percentile trims | IQR fences
+#     degree   1 | 2 | 3 (polynomial in temperature)
+#     hours    all day | day (06–18) | night
+# with closed-form least squares on NumPy arrays (no DataFrame copies), and
+# bootstraps every scenario: resamples are expressed as count weights, so a
+# whole block of resamples is a couple of matrix products plus one batched
+# solve. Blocks are spread over a process pool.
+#
+# Output: outputs/week-7/lr_search.csv in the lr_summary.csv shape
+#   Scenario,Samples,Slope,Intercept,R2  + Slope_CI_low/high, R2_CI_low/high
+# For degree > 1, Slope is dHumidity/dTemperature at the scenario's mean
+# temperature and Intercept is the fitted humidity at 0 °C.
+#
+# Usage:
+#   python model_search.py [--csv dht22_data.csv] [--boot 2000] [--workers 4] [--ci 0.95]
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CSV_PATH = "dht22_data.csv"
+TIME_COL = "Timestamp"
+X_COL = "Temperature_C"
+Y_COL = "Humidity_%"
+OUTPUT_DIR = Path("outputs/week-7")
+
+PERCENTILE_TRIMS = [(0.01, 0.99), (0.05, 0.95), (0.10, 0.90)]
+IQR_KS = [1.0, 1.5, 3.0]
+DEGREES = [1, 2, 3]
+HOURS = {"all day": None, "day 06–18": (6, 18), "night 18–06": (18, 6)}
+BLOCK_CELLS = 4_000_000   # resamples per block * rows, bounds bootstrap memory
+
+
+# ---------- data & scenarios ----------
+def load(csv_path):
+    df = pd.read_csv(csv_path)
+    df = df.dropna(subset=[X_COL, Y_COL])
+    x = df[X_COL].to_numpy(np.float64)
+    y = df[Y_COL].to_numpy(np.float64)
+    if TIME_COL in df.columns:
+        hour = pd.to_datetime(df[TIME_COL], errors="coerce").dt.hour.to_numpy(np.float64)
+    else:
+        hour = np.full(len(x), np.nan)
+    return x, y, hour
+
+
+def build_scenarios(x, hour):
+    """[(name, degree, row mask)] for every filter × degree × hours combination."""
+    s = pd.Series(x)
+    filters = [("Original", np.ones(len(x), bool))]
+    for lo_q, hi_q in PERCENTILE_TRIMS:
+        lo, hi = s.quantile(lo_q), s.quantile(hi_q)
+        filters.append((f"Filtered P{lo_q * 100:g}–P{hi_q * 100:g}", (x >= lo) & (x <= hi)))
+    q1, q3 = s.quantile(0.25), s.quantile(0.75)
+    for k in IQR_KS:
+        lo, hi = q1 - k * (q3 - q1), q3 + k * (q3 - q1)
+        filters.append((f"Filtered IQR k={k:g}", (x >= lo) & (x <= hi)))
+
+    out = []
+    for hname, span in HOURS.items():
+        if span is None:
+            hmask = np.ones(len(x), bool)
+        elif span[0] < span[1]:
+            hmask = (hour >= span[0]) & (hour < span[1])
+        else:
+            hmask = (hour >= span[0]) | (hour < span[1])
+        for fname, fmask in filters:
+            for deg in DEGREES:
+                name = fname + ("" if deg == 1 else f", degree {deg}") + ("" if span is None else f", {hname}")
+                out.append((name, deg, fmask & hmask))
+    return out
+
+
+# ---------- closed-form weighted least squares, batched over weight vectors ----------
+def _design(x, deg, center, scale):
+    z = (x - center) / scale
+    return np.vander(z, deg + 1, increasing=True)            # 1, z, z², ...
+
+
+def fit_weighted(x, y, deg, W):
+    """
+    W: (B, n) nonnegative row weights (bootstrap counts; all-ones for the plain fit).
+    Returns slope, intercept, r2 arrays of length B.
+    """
+    center, scale = x.mean(), (x.std() or 1.0)
+    V = _design(x, deg, center, scale)                        # (n, p)
+    p = V.shape[1]
+    Q = (V[:, :, None] * V[:, None, :]).reshape(len(x), p * p)
+    G = (W @ Q).reshape(-1, p, p)                            # Σ w V Vᵀ
+    r = W @ (V * y[:, None])                                 # Σ w V y
+    G += np.eye(p) * 1e-12 * np.trace(G, axis1=1, axis2=2)[:, None, None]
+    beta = np.linalg.solve(G, r[:, :, None])[:, :, 0]        # (B, p)
+
+    sw, swy, swyy = W.sum(1), W @ y, W @ (y * y)
+    sse = swyy - 2 * np.einsum("bp,bp->b", beta, r) + np.einsum("bp,bpq,bq->b", beta, G, beta)
+    sst = swyy - swy * swy / sw
+    r2 = np.where(sst > 0, 1 - sse / np.where(sst > 0, sst, 1), np.nan)
+
+    # slope at the weighted mean temperature, intercept at 0 °C, both in °C units
+    zbar = ((W @ x) / sw - center) / scale
+    k = np.arange(1, p)
+    slope = (beta[:, 1:] * k * zbar[:, None] ** (k - 1)).sum(1) / scale
+    z0 = -center / scale
+    intercept = beta @ (z0 ** np.arange(p))
+    return slope, intercept, r2
+
+
+# ---------- bootstrap on a process pool ----------
+_DATA = {}
+
+
+def _init(x, y):
+    _DATA["x"], _DATA["y"] = x, y
+
+
+def _boot_block(job):
+    idx, deg, rows, n_boot, seed = job
+    x, y = _DATA["x"][rows], _DATA["y"][rows]
+    n = len(x)
+    rng = np.random.default_rng(seed)
+    block = max(1, BLOCK_CELLS // max(1, n))
+    out = []
+    for start in range(0, n_boot, block):
+        b = min(block, n_boot - start)
+        picks = rng.integers(0, n, size=(b, n)) + (np.arange(b) * n)[:, None]
+        W = np.bincount(picks.ravel(), minlength=b * n).reshape(b, n).astype(np.float64)
+        out.append(np.column_stack(fit_weighted(x, y, deg, W)))
+    return idx, np.vstack(out)
+
+
+def search(x, y, hour, n_boot=2000, workers=None, ci=0.95, seed=225):
+    scen = build_scenarios(x, hour)
+    results, jobs = [], []
+    for i, (name, deg, mask) in enumerate(scen):
+        rows = np.flatnonzero(mask)
+        if len(rows) < deg + 2:
+            continue  # not enough rows for this fit (e.g. no night-time samples)
+        s, b0, r2 = fit_weighted(x[rows], y[rows], deg, np.ones((1, len(rows))))
+        results.append(dict(idx=i, Scenario=name, Samples=len(rows), Slope=s[0], Intercept=b0[0], R2=r2[0]))
+        if n_boot:
+            jobs.append((i, deg, rows, n_boot, seed + i))
+
+    boots = {}
+    if jobs:
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1:
+            _init(x, y)
+            boots = dict(map(_boot_block, jobs))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(x, y)) as pool:
+                boots = dict(pool.map(_boot_block, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+
+    a = (1 - ci) / 2
+    for r in results:
+        bs = boots.get(r.pop("idx"))
+        if bs is None:
+            continue
+        r["Slope_CI_low"], r["Slope_CI_high"] = np.nanquantile(bs[:, 0], [a, 1 - a])
+        r["R2_CI_low"], r["R2_CI_high"] = np.nanquantile(bs[:, 2], [a, 1 - a])
+    return pd.DataFrame(results)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Scenario grid with bootstrap CIs for the DHT22 regression.")
+    ap.add_argument("--csv", default=CSV_PATH)
+    ap.add_argument("--boot", type=int, default=2000, help="bootstrap resamples per scenario (0 = none)")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    ap.add_argument("--ci", type=float, default=0.95)
+    ap.add_argument("--seed", type=int, default=225)
+    args = ap.parse_args()
+
+    x, y, hour = load(args.csv)
+    t0 = time.perf_counter()
+    table = search(x, y, hour, args.boot, args.workers, args.ci, args.seed)
+    took = time.perf_counter() - t0
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    path = OUTPUT_DIR / "lr_search.csv"
+    table.to_csv(path, index=False)
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        print(table.sort_values("R2", ascending=False).head(10).round(4).to_string(index=False))
+    print(f"\n{len(table)} scenarios × {args.boot} resamples in {took:.2f}s")
+    print(f"Saved: {path.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,17 @@
 #   1) Put your CSV in the same folder or change CSV_PATH below.
 #   2) Run: python sit225_7_1p_lr.py
 #   3) Outputs will be saved in ./outputs/week-7/
+#   Add --stream for the one-pass, constant-memory version (no plots; see streaming_lr.py)
+#   Figures go into one outputs/week-7/report.html (plotly.js included once; see report.py)
 
+import sys
 from pathlib import Path
 import numpy as np
 import pandas as pd
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score
 import plotly.graph_objects as go
+from report import ReportBundle, scatter_points
 
 # --------------------
 # Settings
@@ -65,12 +69,7 @@ def build_fig(df_train: pd.DataFrame, model: LinearRegression, scenario_name: st
 
     fig = go.Figure()
     # training scatter
-    fig.add_trace(go.Scatter(
-        x=df_train[X_COL], y=df_train[Y_COL],
-        mode="markers",
-        name=f"{scenario_name} data",
-        marker=dict(size=6, opacity=0.7)
-    ))
+    fig.add_trace(scatter_points(df_train[X_COL], df_train[Y_COL], f"{scenario_name} data", decimate="sample"))
     # trend line
     fig.add_trace(go.Scatter(
         x=test_temps.flatten(), y=test_hums,
@@ -86,16 +85,9 @@ def build_fig(df_train: pd.DataFrame, model: LinearRegression, scenario_name: st
     )
     return fig
 
-def save_fig(fig: go.Figure, base_name: str):
-    html_path = OUTPUT_DIR / f"{base_name}.html"
-    png_path = OUTPUT_DIR / f"{base_name}.png"
-    fig.write_html(str(html_path))
-    try:
-        # requires kaleido
-        fig.write_image(str(png_path), scale=2)
-    except Exception as e:
-        print(f"PNG save skipped (install kaleido to enable). Reason: {e}")
-    print(f"Saved: {html_path}")
+def save_fig(fig: go.Figure, base_name: str, report: ReportBundle):
+    # HTML and PNGs are written together by report.write() at the end of main()
+    report.add(fig, base_name)
 
 def percentile_filter(df: pd.DataFrame, col: str, low_q=0.05, high_q=0.95) -> pd.DataFrame:
     lo = df[col].quantile(low_q)
@@ -120,29 +112,38 @@ def print_stats(tag: str, slope: float, intercept: float, r2: float, n: int, x_m
 # --------------------
 # Main
 # --------------------
-def main():
+def main(stream: bool = False):
+    if stream:
+        # chunked read + binned sufficient statistics: same scenarios, any file size
+        from streaming_lr import BinnedOLS, read_csvs, report
+        bins = BinnedOLS()
+        read_csvs([CSV_PATH], 200_000, bins)
+        report(bins)
+        return
+
     # Load data
     df = load_data(CSV_PATH)
     df = df.dropna(subset=[X_COL, Y_COL]).copy()
+    report = ReportBundle()
 
     # Scenario A: Original data
     model_A, slope_A, intercept_A, r2_A = train_lr(df, X_COL, Y_COL)
     fig_A = build_fig(df, model_A, "Original")
-    save_fig(fig_A, "scenario_A_original")
+    save_fig(fig_A, "scenario_A_original", report)
     print_stats("Original", slope_A, intercept_A, r2_A, len(df), df[X_COL].min(), df[X_COL].max())
 
     # Scenario B: Percentile trim (remove extreme low/high temperatures)
     df_B = percentile_filter(df, X_COL, 0.05, 0.95)
     model_B, slope_B, intercept_B, r2_B = train_lr(df_B, X_COL, Y_COL)
     fig_B = build_fig(df_B, model_B, "Filtered P5–P95")
-    save_fig(fig_B, "scenario_B_percentile")
+    save_fig(fig_B, "scenario_B_percentile", report)
     print_stats("Filtered P5–P95", slope_B, intercept_B, r2_B, len(df_B), df_B[X_COL].min(), df_B[X_COL].max())
 
     # Scenario C: IQR trim
     df_C = iqr_filter(df, X_COL, 1.5)
     model_C, slope_C, intercept_C, r2_C = train_lr(df_C, X_COL, Y_COL)
     fig_C = build_fig(df_C, model_C, "Filtered IQR")
-    save_fig(fig_C, "scenario_C_iqr")
+    save_fig(fig_C, "scenario_C_iqr", report)
     print_stats("Filtered IQR", slope_C, intercept_C, r2_C, len(df_C), df_C[X_COL].min(), df_C[X_COL].max())
 
     # Combined view to see how trend lines shift
@@ -152,8 +153,8 @@ def main():
     yC = model_C.predict(test_grid)
 
     fig_combo = go.Figure()
-    fig_combo.add_trace(go.Scatter(x=df[X_COL], y=df[Y_COL], mode="markers",
-                                   name="Original data", marker=dict(size=6, opacity=0.5)))
+    fig_combo.add_trace(scatter_points(df[X_COL], df[Y_COL], "Original data",
+                                       decimate="sample", marker=dict(size=6, opacity=0.5)))
     fig_combo.add_trace(go.Scatter(x=test_grid.flatten(), y=yA, mode="lines", name="Original trend"))
     fig_combo.add_trace(go.Scatter(x=test_grid.flatten(), y=yB, mode="lines", name="P5–P95 trend"))
     fig_combo.add_trace(go.Scatter(x=test_grid.flatten(), y=yC, mode="lines", name="IQR trend"))
@@ -165,7 +166,8 @@ def main():
         template="plotly_white",
         legend=dict(x=0.01, y=0.99)
     )
-    save_fig(fig_combo, "scenario_D_trend_comparison")
+    save_fig(fig_combo, "scenario_D_trend_comparison", report)
+    report.write(OUTPUT_DIR / "report.html", png_dir=OUTPUT_DIR)
 
     # Save small summary table for your report
     summary = pd.DataFrame([
@@ -178,4 +180,4 @@ def main():
     print(f"\nSaved summary: {summary_path.resolve()}")
 
 if __name__ == "__main__":
-    main()
+    main(stream="--stream" in sys.argv[1:])
@@ -0,0 +1,180 @@
+# SIT225 7.1P — one-file HTML report for the week-7 Plotly figures
+#
+# save_fig() in python_script.py wrote one HTML per scenario, and write_html()
+# inlines the whole plotly.js bundle (~4.8 MB) into every file; every raw point
+# was an SVG Scatter marker. ReportBundle collects the figures and writes a
+# single report.html with plotly.js included once and each figure embedded as a
+# <div>. scatter_points() switches point clouds above GL_THRESHOLD to WebGL
+# (Scattergl) and can decimate them (a fixed-seed random sample) or replace
+# them with a binned density heatmap. PNGs are exported on a process pool
+# (kaleido required; skipped with a message otherwise).
+#
+# Usage (from python_script.py):
+#   report = ReportBundle("Temperature vs Humidity")
+#   fig.add_trace(scatter_points(x, y, "Original data", decimate="sample"))
+#   report.add(fig, "scenario_A_original")
+#   report.write(OUTPUT_DIR / "report.html", png_dir=OUTPUT_DIR)
+#
+# Bench (per-file write_html vs one bundle, synthetic points):
+#   python report.py --bench [--points 200000] [--figures 4]
+
+import argparse
+import html
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+GL_THRESHOLD = 5_000       # points per trace above which markers go to WebGL
+MAX_POINTS = 50_000        # decimate="sample" keeps at most this many
+DENSITY_BINS = 120         # decimate="density": bins per axis
+
+
+def scatter_points(x, y, name, decimate=None, max_points=MAX_POINTS, marker=None, seed=225):
+    """
+    Marker trace for a point cloud.
+      decimate=None      every point; Scattergl above GL_THRESHOLD
+      decimate="sample"  at most max_points (fixed-seed random subset), then as above
+      decimate="density" a 2-D count heatmap instead of markers (size independent of n)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if decimate == "density" and len(x) > GL_THRESHOLD:
+        counts, xe, ye = np.histogram2d(x, y, bins=DENSITY_BINS)
+        z = np.where(counts.T > 0, counts.T, np.nan)   # empty bins stay transparent
+        return go.Heatmap(x=(xe[:-1] + xe[1:]) / 2, y=(ye[:-1] + ye[1:]) / 2, z=z,
+                          name=name, colorscale="Blues", showscale=False,
+                          hovertemplate="x=%{x:.2f}<br>y=%{y:.2f}<br>n=%{z}<extra>" + name + "</extra>")
+    if decimate == "sample" and len(x) > max_points:
+        keep = np.sort(np.random.default_rng(seed).choice(len(x), max_points, replace=False))
+        name = f"{name} ({max_points:,} of {len(x):,} shown)"
+        x, y = x[keep], y[keep]
+    trace = go.Scattergl if len(x) > GL_THRESHOLD else go.Scatter
+    return trace(x=x, y=y, mode="markers", name=name, marker=marker or dict(size=6, opacity=0.7))
+
+
+def _png_job(job):
+    fig_json, png_path, scale = job
+    t0 = time.perf_counter()
+    pio.from_json(fig_json).write_image(png_path, scale=scale)
+    return png_path, time.perf_counter() - t0
+
+
+class ReportBundle:
+    """Figures collected in order and written as one self-contained HTML file."""
+    def __init__(self, title="SIT225 7.1P — Linear Regression report"):
+        self.title = title
+        self.figures = []   # (base_name, fig)
+
+    def add(self, fig: go.Figure, base_name: str):
+        self.figures.append((base_name, fig))
+        return fig
+
+    def to_html(self) -> str:
+        parts = []
+        for base, fig in self.figures:
+            div = fig.to_html(full_html=False, include_plotlyjs=False, div_id=base,
+                              default_height="560px", config={"displaylogo": False})
+            parts.append(f'<section><h2 id="{base}-title">{html.escape(base)}</h2>{div}</section>')
+        toc = "".join(f'<li><a href="#{b}-title">{html.escape(b)}</a></li>' for b, _ in self.figures)
+        return (
+            "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+            f"<title>{html.escape(self.title)}</title>"
+            "<style>body{font-family:sans-serif;margin:24px;max-width:1200px}section{margin-bottom:32px}</style>"
+            f"<script type=\"text/javascript\">{get_plotlyjs()}</script></head><body>"
+            f"<h1>{html.escape(self.title)}</h1><ul>{toc}</ul>{''.join(parts)}</body></html>"
+        )
+
+    def write(self, html_path, png_dir=None, scale=2, workers=None) -> Path:
+        html_path = Path(html_path)
+        html_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = html_path.with_suffix(".html.tmp")
+        tmp.write_text(self.to_html(), encoding="utf-8")
+        tmp.replace(html_path)
+        print(f"Saved: {html_path} ({html_path.stat().st_size / 1e6:.1f} MB, {len(self.figures)} figures)")
+        if png_dir is not None:
+            self.write_pngs(png_dir, scale, workers)
+        return html_path
+
+    def write_pngs(self, png_dir, scale=2, workers=None):
+        """One PNG per figure, exported in parallel (each kaleido export is its own process)."""
+        try:
+            import kaleido  # noqa: F401
+        except ImportError:
+            print("PNG save skipped (install kaleido to enable).")
+            return []
+        png_dir = Path(png_dir)
+        png_dir.mkdir(parents=True, exist_ok=True)
+        jobs = [(fig.to_json(), str(png_dir / f"{base}.png"), scale) for base, fig in self.figures]
+        workers = workers or min(len(jobs), os.cpu_count() or 1)
+        try:
+            if workers <= 1:
+                done = [_png_job(j) for j in jobs]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    done = list(pool.map(_png_job, jobs))
+        except Exception as e:
+            print(f"PNG save skipped. Reason: {e}")
+            return []
+        for path, secs in done:
+            print(f"Saved: {path} ({secs:.1f}s)")
+        return done
+
+
+# ---------- bench ----------
+def _bench_fig(x, y, name, new):
+    fig = go.Figure()
+    if new:
+        fig.add_trace(scatter_points(x, y, f"{name} data", decimate="sample"))
+    else:
+        fig.add_trace(go.Scatter(x=x, y=y, mode="markers", name=f"{name} data", marker=dict(size=6, opacity=0.7)))
+    grid = np.linspace(x.min(), x.max(), 100)
+    fig.add_trace(go.Scatter(x=grid, y=-1.1 * grid + 98.9, mode="lines", name=f"{name} trend"))
+    fig.update_layout(title=f"Temperature vs Humidity — {name}", template="plotly_white")
+    return fig
+
+
+def bench(points=200_000, figures=4):
+    rng = np.random.default_rng(0)
+    x = rng.normal(24, 1.5, points)
+    y = -1.1 * x + 98.9 + rng.normal(0, 3, points)
+    with tempfile.TemporaryDirectory() as d:
+        d = Path(d)
+        t0 = time.perf_counter()
+        for i in range(figures):
+            _bench_fig(x, y, f"s{i}", new=False).write_html(str(d / f"s{i}.html"))
+        old_t = time.perf_counter() - t0
+        old_mb = sum(p.stat().st_size for p in d.glob("s*.html")) / 1e6
+
+        t0 = time.perf_counter()
+        rep = ReportBundle("bench")
+        for i in range(figures):
+            rep.add(_bench_fig(x, y, f"s{i}", new=True), f"s{i}")
+        out = d / "report.html"
+        out.write_text(rep.to_html(), encoding="utf-8")
+        new_t = time.perf_counter() - t0
+        new_mb = out.stat().st_size / 1e6
+
+    print(f"{figures} figures × {points:,} points")
+    print(f"  write_html per figure : {old_t:6.2f}s  {old_mb:7.1f} MB in {figures} files (SVG markers)")
+    print(f"  ReportBundle          : {new_t:6.2f}s  {new_mb:7.1f} MB in 1 file (Scattergl, ≤{MAX_POINTS:,} points)")
+    print("  Browser load time is not measured here: open both in a browser (DevTools > Performance).")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Week-7 report bundle benchmark.")
+    ap.add_argument("--bench", action="store_true")
+    ap.add_argument("--points", type=int, default=200_000)
+    ap.add_argument("--figures", type=int, default=4)
+    args = ap.parse_args()
+    if args.bench:
+        bench(args.points, args.figures)
+    else:
+        ap.print_help()
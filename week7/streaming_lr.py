@@ -0,0 +1,189 @@
+# SIT225 7.1P — one-pass streaming version of the DHT22 regression report
+#
+# python_script.py loads the whole CSV, takes exact quantiles for the P5–P95
+# and IQR filters, and refits LinearRegression on three filtered copies. This
+# reads the CSV (or a live feed on stdin) in chunks and keeps, per temperature
+# bin of width RESOLUTION, the OLS sufficient statistics
+#     n, Σy, Σy², Σdx, Σdx², Σdx·y      (dx = x - bin centre)
+# The bins double as a mergeable quantile sketch: quantiles come from the
+# cumulative bin counts, and each scenario's fit is the sum of the bins inside
+# its [lo, hi] range. Memory is bounded by the number of distinct bins (the
+# sensor's range / resolution), not by the number of rows, so the same report
+# runs on years of logs. With RESOLUTION at or below the logger's resolution
+# every bin holds one distinct value and the results match python_script.py.
+#
+# Usage:
+#   python streaming_lr.py                          # dht22_data.csv
+#   python streaming_lr.py logs/*.csv --chunksize 500000
+#   some_logger | python streaming_lr.py --stdin --every 600   # rows "Temperature_C,Humidity_%"
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+X_COL = "Temperature_C"
+Y_COL = "Humidity_%"
+RESOLUTION = 0.01   # °C; the CSV logs two decimals (DHT22 itself resolves 0.1)
+
+OUTPUT_DIR = Path("outputs/week-7")
+
+
+class BinnedOLS:
+    """Per-x-bin OLS sums; mergeable, quantile-capable, O(bins) memory."""
+    def __init__(self, resolution: float = RESOLUTION):
+        self.res = resolution
+        self.keys = np.zeros(0, dtype=np.int64)   # sorted bin ids
+        self.S = np.zeros((0, 6))                 # n, sy, syy, sdx, sdx2, sdxy per bin
+
+    def __len__(self):
+        return int(self.S[:, 0].sum()) if len(self.S) else 0
+
+    def update(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        ok = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[ok], y[ok]
+        if not len(x):
+            return
+        k = np.rint(x / self.res).astype(np.int64)
+        dx = x - k * self.res
+        keys, inv = np.unique(k, return_inverse=True)
+        S = np.zeros((len(keys), 6))
+        for j, v in enumerate((np.ones_like(x), y, y * y, dx, dx * dx, dx * y)):
+            S[:, j] = np.bincount(inv, weights=v, minlength=len(keys))
+        self._add(keys, S)
+
+    def merge(self, other: "BinnedOLS"):
+        if other.res != self.res:
+            raise ValueError("BinnedOLS resolutions differ; cannot merge")
+        self._add(other.keys, other.S)
+
+    def _add(self, keys, S):
+        allk = np.union1d(self.keys, keys)
+        out = np.zeros((len(allk), 6))
+        out[np.searchsorted(allk, self.keys)] += self.S
+        out[np.searchsorted(allk, keys)] += S
+        self.keys, self.S = allk, out
+
+    def _bin_means(self):
+        n = self.S[:, 0]
+        return self.keys * self.res + self.S[:, 3] / n
+
+    def quantile(self, q: float) -> float:
+        """Linear-interpolated quantile (pandas' default) over bin means weighted by counts."""
+        n = self.S[:, 0]
+        total = n.sum()
+        if total == 0:
+            return float("nan")
+        vals = self._bin_means()
+        pos = q * (total - 1)                       # 0-based order statistic
+        cum = np.cumsum(n)
+        i = int(np.searchsorted(cum, pos, side="right"))
+        lo_rank = np.floor(pos)
+        frac = pos - lo_rank
+        v_lo = vals[min(i, len(vals) - 1)]
+        j = int(np.searchsorted(cum, lo_rank + 1, side="right"))
+        v_hi = vals[min(j, len(vals) - 1)]
+        return float(v_lo + frac * (v_hi - v_lo))
+
+    def fit(self, lo: float = -np.inf, hi: float = np.inf) -> dict:
+        """OLS y = slope*x + intercept over rows with lo <= x <= hi (bin means decide membership)."""
+        m = self._bin_means() if len(self.keys) else np.zeros(0)
+        sel = (m >= lo) & (m <= hi)
+        S, c = self.S[sel], self.keys[sel] * self.res
+        n = S[:, 0].sum()
+        if n < 2:
+            return dict(n=int(n), slope=np.nan, intercept=np.nan, r2=np.nan, x_min=np.nan, x_max=np.nan)
+        shift = (S[:, 0] @ c) / n                   # centre x before forming squares
+        cc = c - shift
+        sx = S[:, 0] @ cc + S[:, 3].sum()                                   # Σ(x - shift)
+        sxx = S[:, 0] @ (cc * cc) + 2 * (cc @ S[:, 3]) + S[:, 4].sum()     # Σ(x - shift)²
+        sxy = cc @ S[:, 1] + S[:, 5].sum()                                  # Σ(x - shift)·y
+        sy, syy = S[:, 1].sum(), S[:, 2].sum()
+        vx = sxx - sx * sx / n
+        cxy = sxy - sx * sy / n
+        vy = syy - sy * sy / n
+        slope = cxy / vx if vx > 0 else np.nan
+        intercept = sy / n - slope * (shift + sx / n)
+        r2 = cxy * cxy / (vx * vy) if vx > 0 and vy > 0 else np.nan
+        mx = m[sel]
+        return dict(n=int(n), slope=float(slope), intercept=float(intercept), r2=float(r2),
+                    x_min=float(mx.min()), x_max=float(mx.max()))
+
+
+def scenarios(b: BinnedOLS):
+    """The three python_script.py scenarios from one set of bins."""
+    q05, q95 = b.quantile(0.05), b.quantile(0.95)
+    q1, q3 = b.quantile(0.25), b.quantile(0.75)
+    iqr = q3 - q1
+    return [
+        ("Original", b.fit()),
+        ("Filtered P5–P95", b.fit(q05, q95)),
+        ("Filtered IQR", b.fit(q1 - 1.5 * iqr, q3 + 1.5 * iqr)),
+    ]
+
+
+def report(b: BinnedOLS, save: bool = True):
+    rows = []
+    for tag, r in scenarios(b):
+        print(f"\n[{tag}]")
+        print(f"  Samples used: {r['n']}")
+        print(f"  Temperature range: {r['x_min']:.2f} to {r['x_max']:.2f} °C")
+        print(f"  LR equation: Humidity = {r['slope']:.4f} * Temperature + {r['intercept']:.4f}")
+        print(f"  R^2: {r['r2']:.4f}")
+        rows.append({"Scenario": tag, "Samples": r["n"], "Slope": r["slope"], "Intercept": r["intercept"], "R2": r["r2"]})
+    if save:
+        OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+        path = OUTPUT_DIR / "lr_summary_stream.csv"
+        pd.DataFrame(rows).to_csv(path, index=False)
+        print(f"\nSaved summary: {path.resolve()}")
+    return rows
+
+
+def read_csvs(paths, chunksize: int, bins: BinnedOLS):
+    for p in paths:
+        for chunk in pd.read_csv(p, usecols=[X_COL, Y_COL], chunksize=chunksize):
+            bins.update(pd.to_numeric(chunk[X_COL], errors="coerce"), pd.to_numeric(chunk[Y_COL], errors="coerce"))
+        print(f"Read {p} -> {len(bins)} rows so far, {len(bins.keys)} bins")
+
+
+def read_stdin(bins: BinnedOLS, every: int):
+    """Live feed: 'temperature,humidity' lines (a header line is skipped); report every N rows."""
+    seen = 0
+    for line in sys.stdin:
+        parts = line.strip().split(",")
+        try:
+            x, y = float(parts[-2]), float(parts[-1])
+        except (ValueError, IndexError):
+            continue
+        bins.update([x], [y])
+        seen += 1
+        if every and seen % every == 0:
+            report(bins, save=False)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="One-pass streaming LR report for DHT22 logs.")
+    ap.add_argument("csv", nargs="*", default=["dht22_data.csv"])
+    ap.add_argument("--chunksize", type=int, default=200_000)
+    ap.add_argument("--resolution", type=float, default=RESOLUTION, help="temperature bin width (°C)")
+    ap.add_argument("--stdin", action="store_true", help="read a live feed from stdin instead of CSV files")
+    ap.add_argument("--every", type=int, default=0, help="with --stdin: print a report every N rows")
+    args = ap.parse_args()
+
+    bins = BinnedOLS(args.resolution)
+    if args.stdin:
+        try:
+            read_stdin(bins, args.every)
+        except KeyboardInterrupt:
+            pass
+    else:
+        read_csvs(args.csv, args.chunksize, bins)
+    report(bins)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# winstats.py
+"""
+O(1) window summaries (count / mean / std / min / max) for the SIT225 dashboards.
+
+Why:
+The dashboards recomputed pandas agg/describe over a fresh copy of the window
+on every click. WindowStats is built once per dataset and extended on append:
+  - prefix sums and prefix sums of squares (shifted by the first value to keep
+    precision) give count / mean / std of any [start, end) in constant time;
+  - per-block min/max plus a sparse table over blocks give min / max with at
+    most two partial blocks scanned, whatever the window length.
+NaNs are skipped, like pandas.
+
+Shared by 6.2 HD (bokeh_app, streamlit_app) and Week 6 (gyro_plotter); the
+scripts put the repo root on sys.path to import it.
+
+API:
+    ws = WindowStats(["gyro_x", "gyro_y", "gyro_z"])
+    ws.extend(df)                   # any mapping/DataFrame with those columns
+    ws.summary(start, end)          # -> [{"axis", "count", "mean", "std", "min", "max"}, ...]
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+class _Grow:
+    """Append-only float/int array with amortised O(1) appends."""
+    def __init__(self, dtype=np.float64, fill=0):
+        self.a = np.full(1024, fill, dtype=dtype)
+        self.n = 0
+
+    def extend(self, vals: np.ndarray):
+        need = self.n + len(vals)
+        if need > len(self.a):
+            cap = max(need, 2 * len(self.a))
+            b = np.empty(cap, dtype=self.a.dtype)
+            b[:self.n] = self.a[:self.n]
+            self.a = b
+        self.a[self.n:need] = vals
+        self.n = need
+
+    @property
+    def view(self) -> np.ndarray:
+        return self.a[:self.n]
+
+
+class _Column:
+    def __init__(self, block: int):
+        self.block = block
+        self.shift = None                                   # first finite value
+        self.vals = _Grow()
+        self.csum = _Grow(); self.csum.extend(np.zeros(1))  # prefix sums, csum[i] = sum of first i rows
+        self.csq = _Grow(); self.csq.extend(np.zeros(1))
+        self.ccnt = _Grow(np.int64); self.ccnt.extend(np.zeros(1, dtype=np.int64))
+        self.bmin = _Grow()
+        self.bmax = _Grow()
+        self._tables = None                                 # (mins, maxs) sparse tables, rebuilt lazily
+
+    def extend(self, x: np.ndarray):
+        x = np.asarray(x, dtype=np.float64)
+        if not len(x):
+            return
+        ok = ~np.isnan(x)
+        if self.shift is None and ok.any():
+            self.shift = float(x[ok][0])
+        d = np.where(ok, x - (self.shift or 0.0), 0.0)
+        self.csum.extend(self.csum.view[-1] + np.cumsum(d))
+        self.csq.extend(self.csq.view[-1] + np.cumsum(d * d))
+        self.ccnt.extend(self.ccnt.view[-1] + np.cumsum(ok))
+
+        # block min/max: redo the last (partial) block, then add the new ones
+        B = self.block
+        first = (self.vals.n // B) * B
+        self.vals.extend(x)
+        v = self.vals.view[first:]
+        starts = np.arange(0, len(v), B)
+        nb_old = first // B
+        self.bmin.n = self.bmax.n = nb_old
+        self.bmin.extend(np.fmin.reduceat(v, starts))
+        self.bmax.extend(np.fmax.reduceat(v, starts))
+        self._tables = None
+
+    def _sparse(self):
+        if self._tables is None:
+            mins, maxs = [self.bmin.view.copy()], [self.bmax.view.copy()]
+            k = 1
+            while 2 * k <= len(mins[0]):
+                mins.append(np.fmin(mins[-1][:-k], mins[-1][k:]))
+                maxs.append(np.fmax(maxs[-1][:-k], maxs[-1][k:]))
+                k *= 2
+            self._tables = (mins, maxs)
+        return self._tables
+
+    def minmax(self, start: int, end: int):
+        B = self.block
+        b0, b1 = start // B, (end - 1) // B
+        v = self.vals.view
+        if b1 - b0 < 2:
+            seg = v[start:end]
+            return np.fmin.reduce(seg), np.fmax.reduce(seg)
+        left, right = v[start:(b0 + 1) * B], v[b1 * B:end]
+        lo, hi = b0 + 1, b1                     # full blocks [lo, hi)
+        mins, maxs = self._sparse()
+        lvl = (hi - lo).bit_length() - 1
+        k = 1 << lvl
+        mn = np.fmin(mins[lvl][lo], mins[lvl][hi - k])
+        mx = np.fmax(maxs[lvl][lo], maxs[lvl][hi - k])
+        mn = np.fmin(mn, np.fmin(np.fmin.reduce(left), np.fmin.reduce(right)))
+        mx = np.fmax(mx, np.fmax(np.fmax.reduce(left), np.fmax.reduce(right)))
+        return mn, mx
+
+
+class WindowStats:
+    def __init__(self, columns: Iterable[str], block: int = 256):
+        self.columns = list(columns)
+        self.block = block
+        self.reset()
+
+    def reset(self):
+        self._cols: Dict[str, _Column] = {c: _Column(self.block) for c in self.columns}
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def extend(self, frame):
+        """Append rows; `frame` is a DataFrame or dict of equal-length arrays."""
+        lengths = set()
+        for c, col in self._cols.items():
+            x = np.asarray(frame[c], dtype=np.float64)
+            col.extend(x)
+            lengths.add(len(x))
+        if len(lengths) > 1:
+            raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+        self.n += lengths.pop() if lengths else 0
+
+    def summary(self, start: int, end: int, columns: Optional[List[str]] = None) -> List[dict]:
+        start, end = max(0, int(start)), min(self.n, int(end))
+        out = []
+        for c in (columns if columns is not None else self.columns):
+            col = self._cols[c]
+            if end <= start:
+                out.append(dict(axis=c, count=0, mean=np.nan, std=np.nan, min=np.nan, max=np.nan))
+                continue
+            cnt = int(col.ccnt.view[end] - col.ccnt.view[start])
+            s = col.csum.view[end] - col.csum.view[start]
+            q = col.csq.view[end] - col.csq.view[start]
+            mean = (col.shift or 0.0) + s / cnt if cnt else np.nan
+            std = np.sqrt(max(0.0, (q - s * s / cnt) / (cnt - 1))) if cnt > 1 else np.nan
+            mn, mx = col.minmax(start, end)
+            out.append(dict(axis=c, count=cnt, mean=float(mean), std=float(std), min=float(mn), max=float(mx)))
+        return out